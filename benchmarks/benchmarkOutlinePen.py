@@ -0,0 +1,377 @@
+"""
+Benchmark the OutlinePen outside RoboFont.
+
+    python benchmarks/benchmarkOutlinePen.py
+    python benchmarks/benchmarkOutlinePen.py --filter curves --save
+
+Every shape is outlined with every line join, end cap, contrast and curve setting,
+with the `OutlinePen`, with `outlineContours`, streaming every contour into the result and,
+when numpy is installed, with the numpy engine. Reports the time per segment, the amount of memory blocks allocated for
+the result and the peak traced memory per glyph.
+
+`--save` stores the results as the baseline, later runs compare against the baseline
+and report regressions. The full matrix takes a few minutes, use `--filter` to run a part.
+"""
+import gc
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+import tracemalloc
+from math import cos, sin, pi
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "source", "lib"))
+
+from fontTools.pens.recordingPen import RecordingPen, RecordingPointPen  # noqa: E402
+from defcon import Glyph  # noqa: E402
+
+from outlinePen import OutlinePen, outlineContours  # noqa: E402
+
+
+defaultBaselinePath = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+# shapes
+
+
+def polygonGlyph(count=200, radius=300):
+    pen = RecordingPen()
+    pen.moveTo((radius, 0))
+    for i in range(1, count):
+        a = 2 * pi * i / count
+        pen.lineTo((round(radius * cos(a)), round(radius * sin(a))))
+    pen.closePath()
+    return pen
+
+
+def tracedGlyph(count=1000, radius=300):
+    # a dense polygon with small wiggles, like an autotraced scan
+    pen = RecordingPen()
+    for i in range(count):
+        a = 2 * pi * i / count
+        r = radius + 3 * sin(a * 97)
+        point = (round(r * cos(a), 1), round(r * sin(a), 1))
+        if i == 0:
+            pen.moveTo(point)
+        else:
+            pen.lineTo(point)
+    pen.closePath()
+    return pen
+
+
+def starGlyph(count=100, radius=300, inner=150):
+    # only sharp corners, every segment ends in a connection
+    pen = RecordingPen()
+    for i in range(count * 2):
+        a = pi * i / count
+        r = radius if i % 2 == 0 else inner
+        point = (round(r * cos(a), 1), round(r * sin(a), 1))
+        if i == 0:
+            pen.moveTo(point)
+        else:
+            pen.lineTo(point)
+    pen.closePath()
+    return pen
+
+
+def curveGlyph(count=40, radius=300):
+    pen = RecordingPen()
+    pen.moveTo((radius, 0))
+    step = 2 * pi / count
+    for i in range(count):
+        a1 = step * i
+        a2 = step * (i + 1)
+        pen.curveTo(
+            (radius * cos(a1) - 30 * sin(a1), radius * sin(a1) + 30 * cos(a1)),
+            (radius * cos(a2) + 30 * sin(a2), radius * sin(a2) - 30 * cos(a2)),
+            (radius * cos(a2), radius * sin(a2)),
+        )
+    pen.closePath()
+    return pen
+
+
+def mixedGlyph(count=20, size=300, corner=60):
+    # a row of rounded rectangles: straight sides with curved corners
+    pen = RecordingPen()
+    k = corner * OutlinePen.magicCurve
+    for i in range(count):
+        x = i * (size + 50)
+        pen.moveTo((x + corner, 0))
+        pen.lineTo((x + size - corner, 0))
+        pen.curveTo((x + size - corner + k, 0), (x + size, corner - k), (x + size, corner))
+        pen.lineTo((x + size, size - corner))
+        pen.curveTo((x + size, size - corner + k), (x + size - corner + k, size), (x + size - corner, size))
+        pen.lineTo((x + corner, size))
+        pen.curveTo((x + corner - k, size), (x, size - corner + k), (x, size - corner))
+        pen.lineTo((x, corner))
+        pen.curveTo((x, corner - k), (x + corner - k, 0), (x + corner, 0))
+        pen.closePath()
+    return pen
+
+
+def openGlyph(count=40, width=40, height=300):
+    # monoline skeleton strokes, half zigzags and half arches
+    pen = RecordingPen()
+    for i in range(count):
+        x = i * width * 2
+        pen.moveTo((x, 0))
+        if i % 2:
+            pen.lineTo((x + width * .5, height))
+            pen.lineTo((x + width, 0))
+            pen.lineTo((x + width * 1.5, height))
+        else:
+            pen.curveTo((x, height * .75), (x + width, height * .75), (x + width, 0))
+            pen.curveTo((x + width, -height * .5), (x + width * 1.5, -height * .5), (x + width * 1.5, 0))
+        pen.endPath()
+    return pen
+
+
+def lettersGlyph():
+    # hand drawn letter contours: an O with a counter, an H and an S
+    pen = RecordingPen()
+    # O
+    pen.moveTo((300, 0))
+    pen.curveTo((466, 0), (560, 150), (560, 350))
+    pen.curveTo((560, 550), (466, 700), (300, 700))
+    pen.curveTo((134, 700), (40, 550), (40, 350))
+    pen.curveTo((40, 150), (134, 0), (300, 0))
+    pen.closePath()
+    pen.moveTo((300, 90))
+    pen.curveTo((199, 90), (140, 195), (140, 350))
+    pen.curveTo((140, 505), (199, 610), (300, 610))
+    pen.curveTo((401, 610), (460, 505), (460, 350))
+    pen.curveTo((460, 195), (401, 90), (300, 90))
+    pen.closePath()
+    # H
+    pen.moveTo((640, 0))
+    pen.lineTo((740, 0))
+    pen.lineTo((740, 310))
+    pen.lineTo((1000, 310))
+    pen.lineTo((1000, 0))
+    pen.lineTo((1100, 0))
+    pen.lineTo((1100, 700))
+    pen.lineTo((1000, 700))
+    pen.lineTo((1000, 400))
+    pen.lineTo((740, 400))
+    pen.lineTo((740, 700))
+    pen.lineTo((640, 700))
+    pen.closePath()
+    # S
+    pen.moveTo((1170, 80))
+    pen.curveTo((1230, 20), (1310, -10), (1400, -10))
+    pen.curveTo((1550, -10), (1650, 70), (1650, 200))
+    pen.curveTo((1650, 330), (1560, 370), (1430, 400))
+    pen.curveTo((1330, 423), (1290, 445), (1290, 500))
+    pen.curveTo((1290, 560), (1340, 600), (1410, 600))
+    pen.curveTo((1480, 600), (1540, 575), (1590, 530))
+    pen.lineTo((1640, 610))
+    pen.curveTo((1580, 670), (1500, 700), (1410, 700))
+    pen.curveTo((1270, 700), (1180, 620), (1180, 500))
+    pen.curveTo((1180, 380), (1270, 335), (1390, 308))
+    pen.curveTo((1490, 285), (1540, 260), (1540, 200))
+    pen.curveTo((1540, 130), (1480, 90), (1400, 90))
+    pen.curveTo((1320, 90), (1260, 120), (1210, 165))
+    pen.closePath()
+    return pen
+
+
+shapes = dict(
+    lines=polygonGlyph,
+    corners=starGlyph,
+    curves=curveGlyph,
+    mixed=mixedGlyph,
+    open=openGlyph,
+    letters=lettersGlyph,
+    traced=tracedGlyph,
+)
+
+
+# settings
+
+
+curveSettings = dict(
+    none=dict(optimizeCurve=False),
+    split=dict(optimizeCurve=True),
+    adaptive=dict(optimizeCurve=True, curveTolerance=1),
+)
+
+
+def iterSettings():
+    """
+    Yield a name and the `OutlinePen` keyword arguments for every combination of settings.
+    """
+    for connection, cap, contrast, curves in itertools.product(
+            ("square", "round", "butt"),
+            ("square", "round", "butt"),
+            (0, 20),
+            curveSettings):
+        name = f"{connection}/{cap}/contrast-{contrast}/{curves}"
+        settings = dict(offset=20, connection=connection, cap=cap, contrast=contrast, contrastAngle=30)
+        settings.update(curveSettings[curves])
+        yield name, settings
+
+
+def countSegments(recording):
+    return sum(1 for operator, operands in recording.value if operator not in ("moveTo", "closePath", "endPath"))
+
+
+# drivers
+
+
+def outlineWithPen(recording, glyph, **kwargs):
+    pen = OutlinePen(None, **kwargs)
+    recording.replay(pen)
+    pen.drawSettings(drawInner=True, drawOuter=True)
+    result = RecordingPointPen()
+    pen.drawPoints(result)
+    return result
+
+
+def outlineWithContours(recording, glyph, **kwargs):
+    result = RecordingPen()
+    outlineContours(glyph, result, **kwargs)
+    return result
+
+
+def outlineWithStream(recording, glyph, **kwargs):
+    result = RecordingPointPen()
+    pen = OutlinePen(None, outputPointPen=result, **kwargs)
+    pen.drawSettings(drawInner=True, drawOuter=True)
+    recording.replay(pen)
+    return result
+
+
+def outlineWithNumpyPen(recording, glyph, **kwargs):
+    return outlineWithPen(recording, glyph, engine="numpy", **kwargs)
+
+
+drivers = dict(
+    pen=outlineWithPen,
+    contours=outlineWithContours,
+    stream=outlineWithStream,
+)
+
+try:
+    import numpy  # noqa: F401
+    drivers["numpy"] = outlineWithNumpyPen
+except ImportError:
+    pass
+
+
+def measure(driver, recording, glyph, minTime=.05, rounds=3, **kwargs):
+    """
+    Return the time in seconds of a single outline, the best of a few `rounds`,
+    the amount of memory blocks the result holds and the peak allocated bytes while outlining,
+    both the lowest of the `rounds`.
+    """
+    start = time.perf_counter()
+    driver(recording, glyph, **kwargs)
+    duration = time.perf_counter() - start
+    # repeat fast cases to get a stable time
+    repeat = max(1, min(100, int(minTime / max(duration, 1e-9))))
+    durations = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            driver(recording, glyph, **kwargs)
+        durations.append((time.perf_counter() - start) / repeat)
+
+    allocations = []
+    peaks = []
+    for _ in range(rounds):
+        # a collection between the snapshots frees unrelated blocks and makes the count differ between runs
+        gc.collect()
+        gc.disable()
+        try:
+            tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+            result = driver(recording, glyph, **kwargs)
+            after = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        finally:
+            gc.enable()
+        allocations.append(sum(stat.count_diff for stat in after.compare_to(before, "lineno") if stat.count_diff > 0))
+        peaks.append(peak)
+        del result, before, after
+    return min(durations), min(allocations), min(peaks)
+
+
+def run(filter=None, minTime=.05):
+    results = dict()
+    for shapeName, shapeFactory in shapes.items():
+        recording = shapeFactory()
+        glyph = Glyph()
+        recording.replay(glyph.getPen())
+        segments = countSegments(recording)
+        for settingsName, settings in iterSettings():
+            for driverName, driver in drivers.items():
+                name = f"{shapeName}/{settingsName}/{driverName}"
+                if filter and filter not in name:
+                    continue
+                duration, allocations, peak = measure(driver, recording, glyph, minTime=minTime, **settings)
+                results[name] = dict(
+                    segments=segments,
+                    usPerSegment=duration * 1000000 / segments,
+                    allocations=allocations,
+                    peakKiB=peak / 1024,
+                )
+                yield name, results[name]
+
+
+def compare(result, baseline, threshold):
+    """
+    Return a short description of the difference with the baseline and if it is a regression.
+    """
+    if baseline is None:
+        return "", False
+    timeRatio = result["usPerSegment"] / baseline["usPerSegment"]
+    allocationRatio = result["allocations"] / max(baseline["allocations"], 1)
+    regression = timeRatio > threshold or allocationRatio > threshold
+    return f"{timeRatio:6.2f}x time {allocationRatio:6.2f}x alloc", regression
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Benchmark the OutlinePen.")
+    parser.add_argument("--filter", help="only run cases with this text in the name, like 'traced/' or '/round/'")
+    parser.add_argument("--baseline", default=defaultBaselinePath, help="the baseline json file")
+    parser.add_argument("--save", action="store_true", help="store the results as the baseline")
+    parser.add_argument("--threshold", type=float, default=1.25, help="ratio against the baseline reported as a regression")
+    parser.add_argument("--min-time", type=float, default=.05, help="minimal seconds to time each case")
+    args = parser.parse_args(args)
+
+    baseline = dict()
+    if not args.save and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = dict()
+    regressions = []
+    for name, result in run(args.filter, args.min_time):
+        results[name] = result
+        difference, regression = compare(result, baseline.get(name), args.threshold)
+        if regression:
+            regressions.append(name)
+            difference += " REGRESSION"
+        print(f"{name:<50} {result['usPerSegment']:9.2f} us/segment {result['allocations']:8d} allocs {result['peakKiB']:9.1f} KiB peak {difference}")
+
+    if args.save:
+        if args.filter and os.path.exists(args.baseline):
+            # only replace the cases that did run
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+            baseline.update(results)
+            results = baseline
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+        print(f"saved baseline to {args.baseline}")
+    elif regressions:
+        print(f"{len(regressions)} regressions against {args.baseline}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,100 +1,377 @@
+import time
+import functools
+import threading
+import traceback
+
 import ezui
-from fontTools.misc.arrayTools import calcBounds
+from PyObjCTools.AppHelper import callAfter, callLater
+from fontTools.misc.arrayTools import unionRect
 from fontTools.pens.boundsPen import BoundsPen
+from fontTools.pens.recordingPen import RecordingPen, RecordingPointPen
+from fontTools.pens.teePen import TeePen
+from fontTools.pens.pointPen import PointToSegmentPen
+from fontTools.pens.transformPen import TransformPointPen
+from defcon import Glyph
+from merz import MerzPen
 
 from mojo.roboFont import OpenWindow, CurrentGlyph, CurrentFont
 from mojo.subscriber import Subscriber, registerGlyphEditorSubscriber, unregisterGlyphEditorSubscriber
 from mojo.extensions import getExtensionDefault, setExtensionDefault
 from mojo.events import postEvent
 
-from outlinePen import OutlinePen
+from outlinePen import OutlinePen, OutlineProfiler
+from outliner import defaultOptions, lineJoinOptions, endCapOptions, getOutlinePenOptions, getDraftOptions, getDrawSettings, recordContours, OutlineContourCache
+from outliner import removeOverlapRecording
+from outliner import getRecordingBounds, getPointRecordingBounds, getOutlineBounds, getPreserveBoundsTransform
+from outliner import OutlineCache, getCachePath, recordGlyphSet, iterOutlineChunks
 
 
 outlinePaletteDefaultKey = "com.typemytype.outliner.v3"
 
-lineJoinOptions = ["Square", "Round", "Butt"]
-endCapOptions = ["Square", "Round", "Butt", "Open"]
+# updates closer together than this, in seconds, are previewed as a draft
+# and the full outline follows when the updates stop for as long
+draftPreviewDelay = .25
 
 
 def calculate(glyph, options):
-    cap = endCapOptions[options["endCapPopUpButton"]].lower()
-    if cap == "open":
-        cap = "square"
-    closeOpenPaths = options["endCapPopUpButton"] != 3
-
+    selectedOnly = options["applyToRadioButtons"] == 3
     pen = OutlinePen(
         glyph.layer,
-        offset=options["strokeWidthField"],
-        contrast=options["strokeContrastField"],
-        contrastAngle=options["strokeContrastAngleField"],
-        connection=lineJoinOptions[options["lineJoinPopUpButton"]].lower(),
-        cap=cap,
-        miterLimit=options["miterLimitField"],
-        closeOpenPaths=closeOpenPaths,
-        optimizeCurve=options["optimizeCurvesCheckbox"],
-        preserveComponents=options["preserveComponentsCheckbox"],
-        filterDoubles=options["optimizeDoublePointsCheckbox"]
+        **getOutlinePenOptions(options)
     )
+    sourceBoundsPen = None
+    drawPen = pen
+    if options["preserveBoundsCheckbox"]:
+        # collect the bounds of the source while outlining
+        sourceBoundsPen = BoundsPen(glyph.layer)
+        drawPen = TeePen(pen, sourceBoundsPen)
 
-    if options["applyToRadioButtons"] == 3:
+    if selectedOnly:
         # only apply on selected contours/components
         for contour in glyph:
             if contour.selected:
-                contour.draw(pen)
+                contour.draw(drawPen)
         for component in glyph.components:
             if component.selected:
-                component.draw(pen)
+                component.draw(drawPen)
     else:
-        glyph.draw(pen)
+        glyph.draw(drawPen)
 
-    pen.drawSettings(
-        drawOriginal=options["outputStrokeSourceCheckbox"],
-        drawInner=options["outputStrokeLeftCheckbox"],
-        drawOuter=options["outputStrokeRightCheckbox"]
-    )
+    pen.drawSettings(**getDrawSettings(options))
 
-    result = pen.getGlyph()
+    if options["removeOverlapCheckbox"]:
+        recording = RecordingPointPen()
+        pen.drawPoints(recording)
+        result = Glyph()
+        resultPointPen = result.getPointPen()
+        for method, args, kwargs in removeOverlapRecording(recording.value, options):
+            getattr(resultPointPen, method)(*args, **kwargs)
+    else:
+        result = pen.getGlyph()
+    if sourceBoundsPen is None:
+        return result
+    return preserveBounds(glyph, result, options, sourceBoundsPen.bounds)
+
+
+def preserveBounds(glyph, result, options, sourceBounds=None):
+    """
+    Scale the outlined `result` back to the height of the source `glyph`.
+    """
+    if not options["preserveBoundsCheckbox"]:
+        return result
+    selectedOnly = options["applyToRadioButtons"] == 3
+    if sourceBounds is None:
+        sourceBounds = getRecordingBounds(recordContours(glyph, glyph.layer, options, selectedOnly=selectedOnly), glyph.layer)
+
+    boundsPen = BoundsPen(None)
+    for contour in result:
+        contour.draw(boundsPen)
+    resultBounds = boundsPen.bounds
+    if result.components:
+        # preserved components are not outlined, only measure the outline of their decomposed shapes
+        componentPen = RecordingPen()
+        for component in glyph.components:
+            if not selectedOnly or component.selected:
+                component.draw(componentPen)
+        componentBounds = getOutlineBounds(componentPen.value, options, glyph.layer, exact=True)
+        if resultBounds is None:
+            resultBounds = componentBounds
+        elif componentBounds is not None:
+            resultBounds = unionRect(resultBounds, componentBounds)
+
+    transform = getPreserveBoundsTransform(sourceBounds, resultBounds)
+    if transform is None:
+        return result
+    transformed = Glyph()
+    result.drawPoints(TransformPointPen(transformed.getPointPen(), transform))
+    return transformed
+
+
+def outlinePreview(glyph, recordings, options, contourCache):
+    """
+    Outline the contour recordings of a glyph for the glyph editor preview and return a merz path.
+    Only the contours that changed since the last call are outlined. The `contourCache` keeps
+    the outline of every contour as a point pen recording and replays them all straight into the merz pen,
+    only with preserved bounds the outline is recorded once more, to measure it before it is scaled.
+    """
+    pen = MerzPen()
+    pointPen = PointToSegmentPen(pen)
     if options["preserveBoundsCheckbox"]:
-        if result.components:
-            dummyOptions = dict(options)
-            dummyOptions["preserveBoundsCheckbox"] = False
-            dummyOptions["preserveComponentsCheckbox"] = False
-            dummyResult = calculate(glyph, dummyOptions)
-            resultBounds = dummyResult.bounds
-        else:
-            resultBounds = result.bounds
-        if glyph.bounds and resultBounds:
-            if options["applyToRadioButtons"] == 3:
-                # only apply on selected contours/components
-                bounds = []
-                for contour in glyph:
-                    if contour.selected and contour.bounds:
-                        selectedMinx, selectedMiny, selectedMaxx, selectedMaxy = contour.bounds
-                        bounds.append((selectedMinx, selectedMiny))
-                        bounds.append((selectedMaxx, selectedMaxy))
-                for component in glyph.components:
-                    if component.selected and component.bounds:
-                        selectedMinx, selectedMiny, selectedMaxx, selectedMaxy = component.bounds
-                        bounds.append((selectedMinx, selectedMiny))
-                        bounds.append((selectedMaxx, selectedMaxy))
-                minx1, miny1, maxx1, maxy1 = calcBounds(bounds)
-            else:
-                minx1, miny1, maxx1, maxy1 = glyph.bounds
-
-            minx2, miny2, maxx2, maxy2 = resultBounds
-
-            h1 = maxy1 - miny1
-
-            w2 = maxx2 - minx2
-            h2 = maxy2 - miny2
-
-            scale = h1 / h2
-            center = minx2 + w2 * .5, miny2 + h2 * .5
-
-            wrapped = RGlyph(result)
-            wrapped.scaleBy((scale, scale), center)
+        result = RecordingPointPen()
+        contourCache.outline(recordings, options, result)
+        transform = getPreserveBoundsTransform(getRecordingBounds(recordings, glyph.layer), getPointRecordingBounds(result.value))
+        if transform is not None:
+            pointPen = TransformPointPen(pointPen, transform)
+        result.replay(pointPen)
+    else:
+        contourCache.outline(recordings, options, pointPen)
+    return pen.path
+
+
+class OutlinePreviewWorker(object):
+
+    """
+    Outlines glyph editor previews in a background thread.
+
+    Only the most recent request is computed, older requests that did not start
+    yet are dropped. The callback is called on the main thread with the glyph,
+    the outlined preview path and the options, but only for the most recent request.
+    """
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.contourCache = OutlineContourCache()
+        self.draftContourCache = OutlineContourCache()
+        self._condition = threading.Condition()
+        self._request = None
+        self._requestCount = 0
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, glyph, recordings, options):
+        with self._condition:
+            self._requestCount += 1
+            self._request = self._requestCount, glyph, recordings, options
+            self._condition.notify()
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._request = None
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._running and self._request is None:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                requestCount, glyph, recordings, options = self._request
+                self._request = None
+            contourCache = self.draftContourCache if options.get("draft") else self.contourCache
+            try:
+                result = outlinePreview(glyph, recordings, options, contourCache)
+            except Exception:
+                traceback.print_exc()
+                continue
+            callAfter(self._finished, requestCount, glyph, result, options)
+
+    def _finished(self, requestCount, glyph, result, options):
+        if self._running and requestCount == self._requestCount:
+            self.callback(glyph, result, options)
+
+
+class OutlineBatchWorker(object):
+
+    """
+    Outlines glyphs chunk by chunk in a background thread, see `iterOutlineChunks`.
+
+    Every outlined chunk is send to `chunkCallback(chunk)` on the main thread, followed by
+    `progressCallback(done, total, eta)`, with the seconds left estimated from the time spent
+    on the glyphs outlined so far. `finishedCallback(done, total, cancelled)` is called at the end.
+    After `cancel` the chunk being outlined is dropped, all chunks send before are complete.
+    By default the glyphs are outlined in the background thread, more `workers` spawn worker processes,
+    but not inside RoboFont, see `getWorkerCount`.
+    """
+
+    def __init__(self, glyphSet, glyphNames, options, chunkCallback, progressCallback, finishedCallback, workers=1, profiler=None, cachePath=None, cacheSize=0, invalidateCache=False):
+        self.glyphSet = glyphSet
+        self.glyphNames = glyphNames
+        self.options = options
+        self.chunkCallback = chunkCallback
+        self.progressCallback = progressCallback
+        self.finishedCallback = finishedCallback
+        self.workers = workers
+        self.profiler = profiler
+        self.cachePath = cachePath
+        self.cacheSize = cacheSize
+        self.invalidateCache = invalidateCache
+        self.cancelled = False
+        self.done = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def cancel(self):
+        self.cancelled = True
+
+    def _run(self):
+        total = len(self.glyphNames)
+        cache = None
+        try:
+            # the cache is used by this thread only
+            if self.cachePath is not None:
+                cache = OutlineCache(self.cachePath, self.cacheSize, self.invalidateCache)
+            startTime = time.perf_counter()
+            done = 0
+            chunks = iterOutlineChunks(self.glyphSet, self.glyphNames, self.options, workers=self.workers, profiler=self.profiler, cache=cache)
+            for chunk in chunks:
+                if self.cancelled:
+                    break
+                done += len(chunk)
+                eta = (time.perf_counter() - startTime) / done * (total - done)
+                callAfter(self._chunkFinished, chunk, done, total, eta)
+            chunks.close()
+        except Exception:
+            traceback.print_exc()
+        finally:
+            if cache is not None:
+                cache.close()
+            callAfter(self._finished, total)
+
+    def _chunkFinished(self, chunk, done, total, eta):
+        if self.cancelled:
+            return
+        self.chunkCallback(chunk)
+        self.done = done
+        self.progressCallback(done, total, eta)
+
+    def _finished(self, total):
+        self.finishedCallback(self.done, total, self.cancelled)
+
+
+class OutlinePreviewBroker(object):
+
+    """
+    Shares the glyph editor previews between all glyph editors.
+
+    Every glyph is outlined once for the same contours and options, the result is handed to every
+    glyph editor showing that glyph with `subscriber.previewDidFinish(path)`. Glyphs are told
+    apart by the identity of the font data, not by their glyph editor.
+
+    Updates closer together than `draftPreviewDelay` are outlined as a draft, the full outline
+    follows when they stop. Glyphs are outlined right away or in a background thread per glyph.
+    """
+
+    def __init__(self):
+        # glyph key: the subscribers, caches, worker and latest request and result of a glyph
+        self._glyphs = dict()
+        # subscriber: glyph key
+        self._subscribers = dict()
+        self._updateCount = 0
+
+    def request(self, subscriber, glyph, recordings, options, inBackground):
+        glyphKey = id(glyph.naked())
+        isNew = self._subscribe(subscriber, glyphKey)
+        entry = self._glyphs[glyphKey]
+        requestKey = tuple(recordings), tuple(sorted(options.items()))
+        if requestKey == entry["requestKey"]:
+            # an other glyph editor asked for the same outline, subscribers get the result when it is ready
+            if isNew and not entry["pending"] and entry["path"] is not None:
+                subscriber.previewDidFinish(entry["path"])
+            return
+        entry["requestKey"] = requestKey
+        # while dragging a slider or points show a draft, the full outline follows when it stops
+        now = time.perf_counter()
+        draft = now - entry["updateTime"] < draftPreviewDelay
+        entry["updateTime"] = now
+        self._outline(glyphKey, glyph, recordings, options, inBackground, draft)
+
+    def _outline(self, glyphKey, glyph, recordings, options, inBackground, draft):
+        entry = self._glyphs[glyphKey]
+        self._updateCount += 1
+        entry["updateCount"] = self._updateCount
+        contourCache = entry["contourCache"]
+        if draft:
+            callLater(draftPreviewDelay, self._idle, glyphKey, self._updateCount, glyph, recordings, options, inBackground)
+            options = getDraftOptions(options)
+            contourCache = entry["draftContourCache"]
+        if inBackground:
+            if entry["worker"] is None:
+                entry["worker"] = OutlinePreviewWorker(functools.partial(self._workerDidFinish, glyphKey))
+            entry["pending"] = True
+            entry["worker"].submit(glyph, recordings, options)
+            return
+        self._finished(glyphKey, outlinePreview(glyph, recordings, options, contourCache))
+
+    def _idle(self, glyphKey, updateCount, glyph, recordings, options, inBackground):
+        # only when nothing changed since the draft
+        entry = self._glyphs.get(glyphKey)
+        if entry is not None and entry["updateCount"] == updateCount:
+            self._outline(glyphKey, glyph, recordings, options, inBackground, draft=False)
+
+    def _workerDidFinish(self, glyphKey, glyph, path, options):
+        # the worker only calls back for the most recent request
+        if glyphKey in self._glyphs:
+            self._finished(glyphKey, path)
+
+    def _finished(self, glyphKey, path):
+        entry = self._glyphs[glyphKey]
+        entry["pending"] = False
+        entry["path"] = path
+        for subscriber in list(entry["subscribers"]):
+            subscriber.previewDidFinish(path)
+
+    def _subscribe(self, subscriber, glyphKey):
+        # return if the subscriber is new to the glyph
+        previousGlyphKey = self._subscribers.get(subscriber)
+        if previousGlyphKey == glyphKey:
+            return False
+        if previousGlyphKey is not None:
+            self.unsubscribe(subscriber)
+        entry = self._glyphs.get(glyphKey)
+        if entry is None:
+            entry = self._glyphs[glyphKey] = dict(
+                subscribers=[],
+                contourCache=OutlineContourCache(),
+                draftContourCache=OutlineContourCache(),
+                worker=None,
+                requestKey=None,
+                path=None,
+                pending=False,
+                updateTime=0,
+                updateCount=0
+            )
+        entry["subscribers"].append(subscriber)
+        self._subscribers[subscriber] = glyphKey
+        return True
 
-    return result
+    def unsubscribe(self, subscriber):
+        """
+        Stop sending previews to a subscriber, a glyph without subscribers is forgotten.
+        """
+        glyphKey = self._subscribers.pop(subscriber, None)
+        if glyphKey is None:
+            return
+        entry = self._glyphs[glyphKey]
+        entry["subscribers"].remove(subscriber)
+        if not entry["subscribers"]:
+            if entry["worker"] is not None:
+                entry["worker"].stop()
+            del self._glyphs[glyphKey]
+
+    def stop(self):
+        """
+        Stop all background threads and forget all glyphs.
+        """
+        for entry in self._glyphs.values():
+            if entry["worker"] is not None:
+                entry["worker"].stop()
+        self._glyphs = dict()
+        self._subscribers = dict()
 
 
 class OutlinerGlyphEditor(Subscriber):
@@ -102,6 +379,7 @@ class OutlinerGlyphEditor(Subscriber):
     # debug = True
 
     controller = None
+    broker = None
 
     def build(self):
         glyphEditor = self.getGlyphEditor()
@@ -111,6 +389,8 @@ class OutlinerGlyphEditor(Subscriber):
         self.updateOutline()
 
     def destroy(self):
+        if self.broker is not None:
+            self.broker.unsubscribe(self)
         glyphEditor = self.getGlyphEditor()
         container = glyphEditor.extensionContainer(outlinePaletteDefaultKey)
         container.clearSublayers()
@@ -152,14 +432,18 @@ class OutlinerGlyphEditor(Subscriber):
         if glyph is None:
             glyph = self.getGlyphEditor().getGlyph()
 
-        if self.controller:
+        if self.controller and self.broker is not None:
             options = self.controller.getOptions()
             options["preserveComponentsCheckbox"] = False
-            result = calculate(
-                glyph=glyph,
-                options=options
-            )
-            self.path.setPath(result.getRepresentation("merz.CGPath"))
+            recordings = recordContours(glyph, glyph.layer, options, selectedOnly=options["applyToRadioButtons"] == 3)
+            # the broker outlines the glyph once for all glyph editors showing it
+            self.broker.request(self, glyph, recordings, options, self.controller.getDisplayOptions()["inBackground"])
+        else:
+            self.path.setPath(None)
+
+    def previewDidFinish(self, path):
+        if self.controller:
+            self.path.setPath(path)
         else:
             self.path.setPath(None)
 
@@ -201,6 +485,13 @@ class OutlinerWindowController(ezui.WindowController):
         [ ] Curves                        @optimizeCurvesCheckbox
         [X] Double Points                 @optimizeDoublePointsCheckbox
 
+        : Curve Tolerance:
+        --X-- [__]                        @curveToleranceField
+
+        : Remove Overlap:
+        [ ] Result                        @removeOverlapCheckbox
+        [X] Skip Non Overlapping          @skipNonOverlappingCheckbox
+
         : Apply To:
         ( ) All Glyphs                    @applyToRadioButtons
         ( ) Selected Glyphs
@@ -210,10 +501,15 @@ class OutlinerWindowController(ezui.WindowController):
         : Outline in Layer:
         [_  _]                            @outputLayerField
 
+        : Progress:
+        * ProgressBar                     @progressBar
+        Ready                             @progressLabel
+
         =---=
 
         (( Preview ...))                  @previewPullDownButton
         * ColorWell                       @previewColorWell
+        ( Cancel )                        @cancelButton
         ( Outline )                       @outlineButton
         """
         maxStrokeWidth = 500
@@ -260,8 +556,22 @@ class OutlinerWindowController(ezui.WindowController):
             preserveBoundsCheckbox=dict(),
             optimizeCurvesCheckbox=dict(),
             optimizeDoublePointsCheckbox=dict(),
+            curveToleranceField=dict(
+                valueType="float",
+                value=0,
+                minValue=0,
+                maxValue=10
+            ),
+            removeOverlapCheckbox=dict(),
+            skipNonOverlappingCheckbox=dict(),
             applyToRadioButtons=dict(),
             outputLayerComboBox=dict(),
+            progressBar=dict(
+                minValue=0,
+                maxValue=100,
+                value=0
+            ),
+            progressLabel=dict(),
             previewPullDownButton=dict(
                 itemDescriptions=[
                     dict(
@@ -274,6 +584,11 @@ class OutlinerWindowController(ezui.WindowController):
                         text="Stroke",
                         state=getExtensionDefault(f"{outlinePaletteDefaultKey}.previewStroke", False)
                     ),
+                    dict(
+                        identifier="backgroundMenuItem",
+                        text="Compute in Background",
+                        state=getExtensionDefault(f"{outlinePaletteDefaultKey}.previewBackground", True)
+                    ),
                 ],
                 gravity="leading"
             ),
@@ -282,6 +597,7 @@ class OutlinerWindowController(ezui.WindowController):
                 gravity="leading",
                 color=getExtensionDefault(f"{outlinePaletteDefaultKey}.previewColor", (0, 1, 1, .8))
             ),
+            cancelButton=dict(),
             outlineButton=dict(),
         )
         self.w = ezui.EZPanel(
@@ -292,25 +608,37 @@ class OutlinerWindowController(ezui.WindowController):
         )
 
         defaults = getExtensionDefault(outlinePaletteDefaultKey, dict())
-        self.w.setItemValues(defaults)
+        self.w.setItemValues({key: value for key, value in defaults.items() if key in defaultOptions})
+        self.batchWorker = None
+        # callbacks of a cancelled batch can still be queued on the main thread when the palette closes
+        self._destroyed = False
+        self.setBatchRunning(False)
 
     def started(self):
         self.w.open()
         OutlinerGlyphEditor.controller = self
+        OutlinerGlyphEditor.broker = OutlinePreviewBroker()
         registerGlyphEditorSubscriber(OutlinerGlyphEditor)
 
     def destroy(self):
+        self._destroyed = True
+        if self.batchWorker is not None:
+            self.batchWorker.cancel()
         unregisterGlyphEditorSubscriber(OutlinerGlyphEditor)
+        OutlinerGlyphEditor.broker.stop()
+        OutlinerGlyphEditor.broker = None
         OutlinerGlyphEditor.controller = None
 
     def getOptions(self):
-        return self.w.getItemValues()
+        # only the outline options, not the progress
+        return {key: value for key, value in self.w.getItemValues().items() if key in defaultOptions}
 
     def getDisplayOptions(self):
         previewPullDownButton = self.w.getItem("previewPullDownButton")
         return dict(
             shouldFill=previewPullDownButton.getMenuItemState("fillMenuItem"),
             shouldStroke=previewPullDownButton.getMenuItemState("strokeMenuItem"),
+            inBackground=previewPullDownButton.getMenuItemState("backgroundMenuItem"),
             color=self.w.getItemValue("previewColorWell")
         )
 
@@ -328,12 +656,18 @@ class OutlinerWindowController(ezui.WindowController):
         setExtensionDefault(f"{outlinePaletteDefaultKey}.previewStroke", value)
         postEvent("com.typemytype.outliner.displayChanged")
 
+    def backgroundMenuItemCallback(self, sender):
+        value = not sender.state()
+        previewPullDownButton = self.w.getItem("previewPullDownButton")
+        previewPullDownButton.setMenuItemState("backgroundMenuItem", value)
+        setExtensionDefault(f"{outlinePaletteDefaultKey}.previewBackground", value)
+
     def previewColorWellCallback(self, sender):
         setExtensionDefault(f"{outlinePaletteDefaultKey}.previewColor", sender.get())
         postEvent("com.typemytype.outliner.displayChanged")
 
     def contentCallback(self, sender):
-        setExtensionDefault(outlinePaletteDefaultKey, sender.getItemValues())
+        setExtensionDefault(outlinePaletteDefaultKey, self.getOptions())
         postEvent("com.typemytype.outliner.changed")
 
     def outlineButtonCallback(self, sender):
@@ -351,31 +685,114 @@ class OutlinerWindowController(ezui.WindowController):
             # Current Glyph
             glyphs = [CurrentGlyph()]
 
-        for glyph in glyphs:
-            outline = calculate(glyph, options)
-
-            if options["outputLayerField"]:
-                layerName = options["outputLayerField"].strip()
-                if layerName:
-                    glyph = glyph.getLayer(layerName)
-
-            glyph.prepareUndo("Outline")
-
-            if options["applyToRadioButtons"] == 3:
-                for contour in list(glyph):
-                    if contour.selected:
-                        glyph.removeContour(contour)
-                for component in list(glyph.components):
-                    if component.selected:
-                        glyph.removeComponent(component)
-            else:
-                glyph.clearContours()
-                glyph.clearComponents()
+        if applyToValue in [0, 1]:
+            # outline a copy of the glyph data in chunks, in a background thread, and write the results back here
+            glyphNames = [glyph.name for glyph in glyphs]
+            if not glyphNames:
+                return
+            # set a json file path to profile the outline stages of a batch
+            profilePath = getExtensionDefault(f"{outlinePaletteDefaultKey}.profile", "")
+            profiler = OutlineProfiler() if profilePath else None
+            # keep the outlines of a saved font in a cache file next to it, the size in MB, 0 to turn it off
+            cacheSize = getExtensionDefault(f"{outlinePaletteDefaultKey}.cacheSize", 100)
+            cachePath = None
+            if cacheSize and font.path:
+                cachePath = getCachePath(font.path)
+            self.batchFont = font
+            self.batchOptions = options
+            self.batchProfiler = profiler
+            self.batchProfilePath = profilePath
+            self.batchWorker = OutlineBatchWorker(
+                recordGlyphSet(font, glyphNames),
+                glyphNames,
+                options,
+                chunkCallback=self.batchChunkDidFinish,
+                progressCallback=self.batchDidProgress,
+                finishedCallback=self.batchDidFinish,
+                profiler=profiler,
+                cachePath=cachePath,
+                cacheSize=cacheSize * 1024 * 1024,
+                invalidateCache=getExtensionDefault(f"{outlinePaletteDefaultKey}.invalidateCache", False)
+            )
+            self.setBatchRunning(True)
+            self.w.setItemValue("progressLabel", "0 of %s glyphs" % len(glyphNames))
+            self.batchWorker.start()
+        else:
+            for glyph in glyphs:
+                self.writeOutline(glyph, calculate(glyph, options), options)
+
+    def cancelButtonCallback(self, sender):
+        if self.batchWorker is not None:
+            self.batchWorker.cancel()
+
+    def setBatchRunning(self, running):
+        self.w.getItem("outlineButton").enable(not running)
+        self.w.getItem("cancelButton").enable(running)
+        if not running:
+            self.w.setItemValue("progressBar", 0)
+
+    def batchChunkDidFinish(self, chunk):
+        if self._destroyed:
+            return
+        font = self.batchFont
+        options = self.batchOptions
+        for glyphName, outlinedRecording in chunk:
+            if glyphName not in font:
+                # removed while outlining
+                continue
+            glyph = font[glyphName]
+            outline = Glyph()
+            outlinePointPen = outline.getPointPen()
+            for method, args, kwargs in outlinedRecording:
+                getattr(outlinePointPen, method)(*args, **kwargs)
+            if options["preserveBoundsCheckbox"]:
+                outline = preserveBounds(glyph, outline, options)
+            self.writeOutline(glyph, outline, options)
+
+    def batchDidProgress(self, done, total, eta):
+        if self._destroyed:
+            return
+        self.w.setItemValue("progressBar", done / total * 100)
+        minutes, seconds = divmod(int(round(eta)), 60)
+        self.w.setItemValue("progressLabel", "%s of %s glyphs, %d:%02d left" % (done, total, minutes, seconds))
+
+    def batchDidFinish(self, done, total, cancelled):
+        self.batchWorker = None
+        self.batchFont = None
+        if self._destroyed:
+            return
+        self.setBatchRunning(False)
+        if cancelled:
+            self.w.setItemValue("progressLabel", "Cancelled, %s of %s glyphs outlined" % (done, total))
+        else:
+            self.w.setItemValue("progressLabel", "%s glyphs outlined" % total)
+        if self.batchProfiler is not None:
+            print(self.batchProfiler.report())
+            self.batchProfiler.writeJSON(self.batchProfilePath)
+
+    def writeOutline(self, glyph, outline, options):
+        if options["outputLayerField"]:
+            layerName = options["outputLayerField"].strip()
+            if layerName:
+                glyph = glyph.getLayer(layerName)
+
+        glyph.prepareUndo("Outline")
+
+        if options["applyToRadioButtons"] == 3:
+            for contour in list(glyph):
+                if contour.selected:
+                    glyph.removeContour(contour)
+            for component in list(glyph.components):
+                if component.selected:
+                    glyph.removeComponent(component)
+        else:
+            glyph.clearContours()
+            glyph.clearComponents()
 
-            outline.drawPoints(glyph.getPointPen())
+        outline.drawPoints(glyph.getPointPen())
 
-            glyph.round()
-            glyph.performUndo()
+        glyph.round()
+        glyph.performUndo()
 
 
 OpenWindow(OutlinerWindowController)
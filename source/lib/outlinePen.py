@@ -1,13 +1,29 @@
 from fontTools.pens.basePen import BasePen
-from fontTools.misc.bezierTools import splitCubicAtT
+from fontTools.misc.bezierTools import splitCubicAtT, splitQuadraticAtT, calcCubicBounds, calcQuadraticBounds
+from fontTools.misc.arrayTools import unionRect
 
 from fontTools.pens.pointPen import AbstractPointPen
 from fontTools.pens.pointPen import ReverseContourPointPen
 from fontTools.pens.pointPen import PointToSegmentPen
+from fontTools.pens.pointPen import SegmentToPointPen
 
+import sys
+import time
+import json
+import heapq
+import struct
+from array import array
 
-from defcon import Glyph
-from math import sqrt, cos, sin, acos, asin, degrees, radians, pi
+try:
+    from defcon import Glyph
+except ImportError:
+    Glyph = None
+from math import sqrt, cos, sin, atan2, floor, degrees, radians, hypot
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 def roundFloat(f):
@@ -15,33 +31,46 @@ def roundFloat(f):
     return round(f*error)/error
 
 
-def checkSmooth(firstAngle, lastAngle):
-    if firstAngle is None or lastAngle is None:
-        return True
-    error = 4
-    firstAngle = degrees(firstAngle)
-    lastAngle = degrees(lastAngle)
+# directions are unit normals of a segment: the segment direction turned 90 degrees counter clockwise
 
-    if int(firstAngle) + error >= int(lastAngle) >= int(firstAngle) - error:
-        return True
-    return False
+smoothAngle = 4
+# turns up to `smoothAngle` are always smooth, turns of a degree more are always corners
+smoothCosine = cos(radians(smoothAngle))
+cornerCosine = cos(radians(smoothAngle + 1))
 
 
-def checkInnerOuter(firstAngle, lastAngle):
-    if firstAngle is None or lastAngle is None:
+def checkSmooth(firstDirection, lastDirection):
+    """
+    Return if two directions differ at most `smoothAngle` whole degrees.
+
+    Directions are compared by their angles truncated to whole degrees, a turn between
+    `smoothAngle` and `smoothAngle + 1` degrees is smooth when the truncated angles are
+    at most `smoothAngle` apart, also across the 0/360 degrees seam.
+    """
+    if firstDirection is None or lastDirection is None:
+        return True
+    dot = firstDirection[0] * lastDirection[0] + firstDirection[1] * lastDirection[1]
+    if dot >= smoothCosine:
         return True
-    dirAngle = degrees(firstAngle) - degrees(lastAngle)
+    if dot <= cornerCosine:
+        return False
+    turn = (floor(degrees(atan2(lastDirection[1], lastDirection[0]))) - floor(degrees(atan2(firstDirection[1], firstDirection[0])))) % 360
+    return min(turn, 360 - turn) <= smoothAngle
 
-    if dirAngle > 180:
-        dirAngle = 180 - dirAngle
-    elif dirAngle < -180:
-        dirAngle = -180 - dirAngle
 
-    if dirAngle > 0:
+def checkInnerOuter(firstDirection, lastDirection):
+    """
+    Return if the turn from the first to the last direction is on the outer side.
+    """
+    if firstDirection is None or lastDirection is None:
         return True
-
-    if dirAngle <= 0:
-        return False
+    fx, fy = firstDirection
+    lx, ly = lastDirection
+    cross = fy * lx - fx * ly
+    if cross == 0 and fx * lx + fy * ly < 0:
+        # turning back, the outer side is decided by the first direction
+        return fx > 0 or (fx == 0 and fy < 0)
+    return cross > 0
 
 
 def interSect(seg1, seg2):
@@ -78,8 +107,23 @@ def pointOnACurve(p1, c1, c2, p2, value):
     return MathPoint(mx, my)
 
 
+def _quadraticToCubic(p0, p1, p2):
+    # the same curve as a cubic curve
+    x0, y0 = p0
+    x1, y1 = p1
+    x2, y2 = p2
+    return (
+        MathPoint(x0, y0),
+        MathPoint(x0 + (x1 - x0) * 2 / 3, y0 + (y1 - y0) * 2 / 3),
+        MathPoint(x2 + (x1 - x2) * 2 / 3, y2 + (y1 - y2) * 2 / 3),
+        MathPoint(x2, y2)
+    )
+
+
 class MathPoint(object):
 
+    __slots__ = ("x", "y")
+
     def __init__(self, x, y=None):
         if y is None:
             x, y = x
@@ -97,8 +141,8 @@ class MathPoint(object):
         raise IndexError
 
     def __iter__(self):
-        for value in [self.x, self.y]:
-            yield value
+        yield self.x
+        yield self.y
 
     def __add__(self, p):  # p + p
         if not isinstance(p, self.__class__):
@@ -140,62 +184,62 @@ class MathPoint(object):
     def distance(self, p):
         return sqrt((p.x - self.x)**2 + (p.y - self.y)**2)
 
-    def angle(self, other, add=90):
-        # returns the angle of a Line in radians
-        b = other.x - self.x
-        a = other.y - self.y
-        c = sqrt(a**2 + b**2)
+    def direction(self, other):
+        # returns the unit normal of a Line, the Line direction turned 90 degrees counter clockwise
+        x = other.x - self.x
+        y = other.y - self.y
+        c = sqrt(x * x + y * y)
         if c == 0:
             return None
-        if add is None:
-            return b/c
-        cosAngle = degrees(acos(b/c))
-        sinAngle = degrees(asin(a/c))
-        if sinAngle < 0:
-            cosAngle = 360 - cosAngle
-        return radians(cosAngle + add)
+        return -y / c, x / c
 
 
 class CleanPointPen(AbstractPointPen):
 
-    def __init__(self, pointPen):
+    """
+    Removes line points that sit on a straight line between their neighbours.
+
+    Three line points are straight when the cross product of the two line
+    vectors, relative to their lengths, is within `tolerance` and the lines
+    point in the same direction.
+    """
+
+    def __init__(self, pointPen, tolerance=1e-6):
         self.pointPen = pointPen
+        self.tolerance = tolerance
         self.currentContour = None
 
     def processContour(self):
         pointPen = self.pointPen
         contour = self.currentContour
+        tolerance = self.tolerance
 
-        index = 0
-        prevAngle = None
-        toRemove = []
-        for data in contour:
-            if data["segmentType"] in ["line", "move"]:
-                prevPoint = contour[index-1]
-                if prevPoint["segmentType"] in ["line", "move"]:
-                    angle = MathPoint(data["point"]).angle(MathPoint(prevPoint["point"]))
-                    if prevAngle is not None and angle is not None and roundFloat(prevAngle) == roundFloat(angle):
-                        prevPoint["uniqueID"] = id(prevPoint)
-                        toRemove.append(prevPoint)
-                    prevAngle = angle
-                else:
-                    prevAngle = None
-            else:
-                prevAngle = None
-            index += 1
-
-        for data in toRemove:
-            contour.remove(data)
-
+        lineTypes = ("line", "move")
+        count = len(contour)
         pointPen.beginPath()
-        for data in contour:
-            pointPen.addPoint(data["point"], **data)
+        for index, (pt, segmentType, smooth, name, kwargs) in enumerate(contour):
+            if segmentType in lineTypes and index < count - 1:
+                prevPt, prevSegmentType = contour[index - 1][:2]
+                nextPt, nextSegmentType = contour[index + 1][:2]
+                if prevSegmentType in lineTypes and nextSegmentType in lineTypes:
+                    x, y = pt
+                    x1 = prevPt[0] - x
+                    y1 = prevPt[1] - y
+                    x2 = x - nextPt[0]
+                    y2 = y - nextPt[1]
+                    # the angle based check this replaces split directions at 0/360 degrees,
+                    # keep lines along the x axis that cross it to produce the same points
+                    if (x1 or y1) and (x2 or y2) and not (x1 > 0 and (y1 < 0) != (y2 < 0)):
+                        cross = x1 * y2 - y1 * x2
+                        dot = x1 * x2 + y1 * y2
+                        if dot > 0 and abs(cross) <= tolerance * sqrt((x1 * x1 + y1 * y1) * (x2 * x2 + y2 * y2)):
+                            continue
+            pointPen.addPoint(pt, segmentType=segmentType, smooth=smooth, name=name, **kwargs)
         pointPen.endPath()
 
     def beginPath(self, identifier=None):
         assert self.currentContour is None
         self.currentContour = []
-        self.onCurve = []
 
     def endPath(self):
         assert self.currentContour is not None
@@ -203,26 +247,354 @@ class CleanPointPen(AbstractPointPen):
         self.currentContour = None
 
     def addPoint(self, pt, segmentType=None, smooth=False, name=None, **kwargs):
-        data = dict(point=pt, segmentType=segmentType, smooth=smooth, name=name)
-        data.update(kwargs)
-        self.currentContour.append(data)
+        self.currentContour.append((pt, segmentType, smooth, name, kwargs))
 
     def addComponent(self, glyphName, transform):
         assert self.currentContour is None
         self.pointPen.addComponent(glyphName, transform)
 
 
+class ContourPoint(object):
+
+    __slots__ = ("x", "y", "segmentType", "smooth")
+
+    def __init__(self, x, y, segmentType=None, smooth=False):
+        self.x = x
+        self.y = y
+        self.segmentType = segmentType
+        self.smooth = smooth
+
+    def __repr__(self):
+        return "<ContourPoint x:%s y:%s segmentType:%s smooth:%s>" % (self.x, self.y, self.segmentType, self.smooth)
+
+
+class OutlineContour(object):
+
+    """
+    A plain list of points, used by the OutlinePen as intermediate storage.
+    """
+
+    def __init__(self):
+        self.points = []
+
+    def __len__(self):
+        return len(self.points)
+
+    def __getitem__(self, index):
+        return self.points[index]
+
+    def __iter__(self):
+        return iter(self.points)
+
+    def addPoint(self, pt, segmentType=None, smooth=False):
+        x, y = pt
+        self.points.append(ContourPoint(x, y, segmentType, smooth))
+
+    def reverse(self):
+        # same result as drawing through a ReverseContourPointPen
+        points = self.points
+        if not points:
+            return
+        closed = points[0].segmentType != "move"
+        if closed:
+            points.append(points.pop(0))
+            lastSegmentType = None
+            for point in points:
+                if point.segmentType is not None:
+                    lastSegmentType = point.segmentType
+                    break
+        else:
+            lastSegmentType = "move"
+        points.reverse()
+        if not closed:
+            while points[0].segmentType is None:
+                points.pop(0)
+        for point in points:
+            if point.segmentType is not None:
+                point.segmentType, lastSegmentType = lastSegmentType, point.segmentType
+
+    def drawPoints(self, pointPen):
+        pointPen.beginPath()
+        for point in self.points:
+            pointPen.addPoint((point.x, point.y), segmentType=point.segmentType, smooth=point.smooth)
+        pointPen.endPath()
+
+
+class OutlineSegmentPen(SegmentToPointPen):
+
+    """
+    A `SegmentToPointPen` that draws straight into an `OutlineContourBuffer`
+    and also adds a run of line points at once.
+
+    The smooth flags are guessed like the `GuessSmoothPointPen` does.
+    """
+
+    smoothError = 0.05
+
+    def __init__(self, contourBuffer):
+        SegmentToPointPen.__init__(self, contourBuffer, guessSmooth=False)
+
+    def lineToPoints(self, points):
+        # same as `lineTo` for every point, only used between a `moveTo` and the end of the contour
+        self.contour.extend([(point, "line") for point in points])
+
+    def _flushContour(self):
+        points = self.contour
+        count = len(points)
+        smooth = [False] * count
+        if count > 1:
+            # only on curve points next to an off curve point can be smooth
+            start = 1 if points[0][1] == "move" else -1
+            for index in range(start, count - 1):
+                pt, segmentType = points[index]
+                if segmentType is None:
+                    continue
+                prevPt, prevSegmentType = points[index - 1]
+                nextPt, nextSegmentType = points[index + 1]
+                if prevSegmentType is not None and nextSegmentType is not None:
+                    continue
+                if pt != prevPt and pt != nextPt:
+                    a1 = atan2(pt[1] - prevPt[1], pt[0] - prevPt[0])
+                    a2 = atan2(nextPt[1] - pt[1], nextPt[0] - pt[0])
+                    if abs(a1 - a2) < self.smoothError:
+                        smooth[index] = True
+        contour = OutlineContour()
+        contour.points = [ContourPoint(pt[0], pt[1], segmentType, pointSmooth) for (pt, segmentType), pointSmooth in zip(points, smooth)]
+        self.pen.contours.append(contour)
+
+
+class OutlineContourBuffer(AbstractPointPen):
+
+    """
+    A list of contours the OutlinePen draws into, avoiding the
+    overhead of a full glyph object.
+    """
+
+    def __init__(self):
+        self.contours = []
+
+    def __len__(self):
+        return len(self.contours)
+
+    def __getitem__(self, index):
+        return self.contours[index]
+
+    def __iter__(self):
+        return iter(self.contours)
+
+    def getPen(self):
+        return OutlineSegmentPen(self)
+
+    def removeContour(self, contour):
+        self.contours.remove(contour)
+
+    def clear(self):
+        self.contours = []
+
+    def beginPath(self, identifier=None, **kwargs):
+        self.contours.append(OutlineContour())
+
+    def addPoint(self, pt, segmentType=None, smooth=False, name=None, identifier=None, **kwargs):
+        self.contours[-1].addPoint(pt, segmentType, smooth)
+
+    def endPath(self):
+        pass
+
+    def drawPoints(self, pointPen):
+        for contour in self.contours:
+            contour.drawPoints(pointPen)
+
+
+class OutlineProfiler(object):
+
+    """
+    Collects the time spent in each stage of the OutlinePen, segment and point counts
+    and the slowest glyphs.
+
+    Pass a profiler to `OutlinePen(..., profiler=profiler)`, without a profiler the pen
+    does not measure anything. Stages are nested: `closePath` includes the `connection`
+    it builds, `drawPoints` includes `clean`.
+
+        profiler = OutlineProfiler()
+        with profiler.glyph("a"):
+            pen = OutlinePen(glyphSet, profiler=profiler)
+            ...
+        print(profiler.report())
+        profiler.writeJSON("profile.json")
+    """
+
+    def __init__(self, slowest=25):
+        self.slowest = slowest
+        self.stages = dict()
+        self.counts = dict(segmentsIn=0, pointsIn=0, contoursOut=0, pointsOut=0)
+        self.glyphCount = 0
+        self.duration = 0
+        self._slowestGlyphs = []
+
+    def addStage(self, stage, duration, calls=1):
+        stageCalls, stageDuration = self.stages.get(stage, (0, 0))
+        self.stages[stage] = stageCalls + calls, stageDuration + duration
+
+    def wrap(self, stage, method, pointCount=None):
+        """
+        Return `method` measuring every call as `stage`.
+        With a `pointCount` every call also counts as an input segment with that amount of points.
+        """
+        counts = self.counts
+        perf_counter = time.perf_counter
+
+        def profiled(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.addStage(stage, perf_counter() - start)
+                if pointCount is not None:
+                    counts["segmentsIn"] += 1
+                    counts["pointsIn"] += pointCount
+
+        return profiled
+
+    def glyph(self, glyphName):
+        """
+        Measure everything within the `with` statement as the outline of a single glyph.
+        """
+        return _OutlineProfilerGlyph(self, glyphName)
+
+    def addGlyph(self, glyphName, duration, segmentsIn=0, pointsOut=0):
+        self.glyphCount += 1
+        self.duration += duration
+        self._pushSlowest((duration, str(glyphName), segmentsIn, pointsOut))
+
+    def _pushSlowest(self, item):
+        if len(self._slowestGlyphs) < self.slowest:
+            heapq.heappush(self._slowestGlyphs, item)
+        else:
+            heapq.heappushpop(self._slowestGlyphs, item)
+
+    def merge(self, other):
+        """
+        Add the results of an other profiler, or of its `asDict()`, like from a worker process.
+        """
+        if isinstance(other, OutlineProfiler):
+            other = other.asDict()
+        for stage, data in other["stages"].items():
+            self.addStage(stage, data["seconds"], data["calls"])
+        for key, value in other["counts"].items():
+            self.counts[key] = self.counts.get(key, 0) + value
+        for data in other["slowestGlyphs"]:
+            self._pushSlowest((data["seconds"], data["glyphName"], data["segmentsIn"], data["pointsOut"]))
+        self.glyphCount += other["glyphCount"]
+        self.duration += other["seconds"]
+
+    def asDict(self):
+        return dict(
+            glyphCount=self.glyphCount,
+            seconds=self.duration,
+            stages={stage: dict(calls=calls, seconds=duration) for stage, (calls, duration) in self.stages.items()},
+            counts=dict(self.counts),
+            slowestGlyphs=[
+                dict(glyphName=glyphName, seconds=duration, segmentsIn=segmentsIn, pointsOut=pointsOut)
+                for duration, glyphName, segmentsIn, pointsOut in sorted(self._slowestGlyphs, reverse=True)
+            ]
+        )
+
+    def writeJSON(self, path):
+        with open(path, "w") as f:
+            json.dump(self.asDict(), f, indent=2)
+
+    def report(self):
+        data = self.asDict()
+        lines = ["%s glyphs in %.3f sec" % (data["glyphCount"], data["seconds"]), ""]
+        lines.append("%-12s %10s %10s %12s" % ("stage", "calls", "sec", "usec/call"))
+        for stage, stageData in sorted(data["stages"].items(), key=lambda item: -item[1]["seconds"]):
+            calls = stageData["calls"]
+            lines.append("%-12s %10d %10.3f %12.1f" % (stage, calls, stageData["seconds"], stageData["seconds"] * 1000000 / max(calls, 1)))
+        lines.append("")
+        for key, value in data["counts"].items():
+            lines.append("%-12s %10d" % (key, value))
+        if data["slowestGlyphs"]:
+            lines.append("")
+            lines.append("%-30s %10s %10s %10s" % ("slowest glyphs", "sec", "segments", "points"))
+            for glyphData in data["slowestGlyphs"]:
+                lines.append("%-30s %10.4f %10d %10d" % (glyphData["glyphName"], glyphData["seconds"], glyphData["segmentsIn"], glyphData["pointsOut"]))
+        return "\n".join(lines)
+
+
+class _OutlineProfilerGlyph(object):
+
+    def __init__(self, profiler, glyphName):
+        self.profiler = profiler
+        self.glyphName = glyphName
+
+    def __enter__(self):
+        counts = self.profiler.counts
+        self.segmentsIn = counts["segmentsIn"]
+        self.pointsOut = counts["pointsOut"]
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        duration = time.perf_counter() - self.start
+        counts = self.profiler.counts
+        self.profiler.addGlyph(self.glyphName, duration, counts["segmentsIn"] - self.segmentsIn, counts["pointsOut"] - self.pointsOut)
+
+
+def _noCleanPointPen(pointPen):
+    return pointPen
+
+
+class CountingPointPen(AbstractPointPen):
+
+    """
+    Counts the contours and points drawn into an other point pen.
+    """
+
+    def __init__(self, pointPen, counts):
+        self.pointPen = pointPen
+        self.counts = counts
+
+    def beginPath(self, identifier=None, **kwargs):
+        self.counts["contoursOut"] += 1
+        self.pointPen.beginPath(identifier=identifier, **kwargs)
+
+    def endPath(self):
+        self.pointPen.endPath()
+
+    def addPoint(self, pt, segmentType=None, smooth=False, name=None, identifier=None, **kwargs):
+        self.counts["pointsOut"] += 1
+        self.pointPen.addPoint(pt, segmentType=segmentType, smooth=smooth, name=name, identifier=identifier, **kwargs)
+
+    def addComponent(self, baseGlyphName, transformation, identifier=None, **kwargs):
+        self.pointPen.addComponent(baseGlyphName, transformation, identifier=identifier, **kwargs)
+
+
 class OutlinePen(BasePen):
 
     pointClass = MathPoint
+    cleanPointPenClass = CleanPointPen
     magicCurve = 0.5522847498
+    maxCurveSubdivisions = 6
+    curveToleranceSamples = (.25, .5, .75)
+    # the numpy engine offsets shorter runs of lines one by one, like the python engine
+    minLineRun = 8
 
-    def __init__(self, glyphSet, offset=10, contrast=0, contrastAngle=0, connection="square", cap="round", miterLimit=None, closeOpenPaths=True, optimizeCurve=False, preserveComponents=False, filterDoubles=True):
+    def __init__(self, glyphSet, offset=10, contrast=0, contrastAngle=0, connection="square", cap="round", miterLimit=None, closeOpenPaths=True, optimizeCurve=False, preserveComponents=False, filterDoubles=True, engine="python", curveTolerance=None, profiler=None, outputPointPen=None, cleanup=True):
         BasePen.__init__(self, glyphSet)
 
+        if engine not in ("python", "numpy"):
+            raise ValueError("Unknown outline engine: %r" % engine)
+        if engine == "numpy" and numpy is None:
+            raise ImportError("The numpy outline engine requires numpy")
+        self.engine = engine
+        # runs of line segments waiting to be offset at once by the numpy engine
+        self._lineBuffer = []
+
         self.offset = abs(offset)
         self.contrast = abs(contrast)
         self.contrastAngle = contrastAngle
+        self._contrastCos = cos(radians(contrastAngle))
+        self._contrastSin = sin(radians(contrastAngle))
         self._inputmiterLimit = miterLimit
         if miterLimit is None:
             miterLimit = self.offset * 2
@@ -230,20 +602,26 @@ class OutlinePen(BasePen):
 
         self.closeOpenPaths = closeOpenPaths
         self.optimizeCurve = optimizeCurve
+        # when set, optimized curves are only split where the offset is off by more than the tolerance
+        self.curveTolerance = curveTolerance
+        # the amount of offset curve segments, after splitting
+        self.curveSegmentCount = 0
 
+        self.connection = connection
+        self.cap = cap
         self.connectionCallback = getattr(self, "connection%s" % (connection.title()))
         self.capCallback = getattr(self, "cap%s" % (cap.title()))
 
-        self.originalGlyph = Glyph()
+        self.originalGlyph = OutlineContourBuffer()
         self.originalPen = self.originalGlyph.getPen()
 
-        self.outerGlyph = Glyph()
+        self.outerGlyph = OutlineContourBuffer()
         self.outerPen = self.outerGlyph.getPen()
         self.outerCurrentPoint = None
         self.outerFirstPoint = None
         self.outerPrevPoint = None
 
-        self.innerGlyph = Glyph()
+        self.innerGlyph = OutlineContourBuffer()
         self.innerPen = self.innerGlyph.getPen()
         self.innerCurrentPoint = None
         self.innerFirstPoint = None
@@ -251,8 +629,9 @@ class OutlinePen(BasePen):
 
         self.prevPoint = None
         self.firstPoint = None
-        self.firstAngle = None
-        self.prevAngle = None
+        self.firstDirection = None
+        self.prevDirection = None
+        self.currentDirection = None
 
         self.shouldHandleMove = True
 
@@ -262,6 +641,43 @@ class OutlinePen(BasePen):
         self.filterDoubles = filterDoubles
         self.drawSettings()
 
+        # when set, every finished contour is drawn into this point pen and dropped right away,
+        # set the draw settings before drawing into the pen
+        self.outputPointPen = outputPointPen
+
+        self.profiler = profiler
+        if profiler is not None:
+            self._installProfiler(profiler)
+
+        # without cleanup the contours are drawn as they are built, points on straight lines are kept
+        self.cleanup = cleanup
+        if not cleanup:
+            self.cleanPointPenClass = _noCleanPointPen
+
+    def _installProfiler(self, profiler):
+        # replace the stages by measuring wrappers on the instance, without a profiler nothing is wrapped
+        self._lineTo = profiler.wrap("lineTo", self._lineTo, pointCount=1)
+        self._curveToOne = profiler.wrap("curveTo", self._curveToOne, pointCount=3)
+        self._qCurveToOne = profiler.wrap("qCurveTo", self._qCurveToOne, pointCount=2)
+        self._closePath = profiler.wrap("closePath", self._closePath)
+        self._endPath = profiler.wrap("endPath", self._endPath)
+        self.buildConnection = profiler.wrap("connection", self.buildConnection)
+        self.buildCap = profiler.wrap("cap", self.buildCap)
+
+        drawPoints = profiler.wrap("drawPoints", self.drawPoints)
+
+        def countingDrawPoints(pointPen):
+            drawPoints(CountingPointPen(pointPen, profiler.counts))
+
+        self.drawPoints = countingDrawPoints
+
+        def cleanPointPenClass(pointPen):
+            pen = CleanPointPen(pointPen)
+            pen.processContour = profiler.wrap("clean", pen.processContour)
+            return pen
+
+        self.cleanPointPenClass = cleanPointPenClass
+
     def _moveTo(self, pt):
         x, y = pt
         if self.offset == 0:
@@ -281,16 +697,33 @@ class OutlinePen(BasePen):
             self.outerPen.lineTo((x, y))
             self.innerPen.lineTo((x, y))
             return
+        if self.engine == "numpy":
+            self._lineBuffer.append((x, y))
+            return
+        self._addLine(x, y)
+
+    def _addLine(self, x, y):
         self.originalPen.lineTo((x, y))
 
+        prevPoint = self.prevPoint
         currentPoint = self.pointClass(x, y)
-        if currentPoint == self.prevPoint:
+        if currentPoint == prevPoint:
             return
-
-        self.currentAngle = self.prevPoint.angle(currentPoint)
-        thickness = self.getThickness(self.currentAngle)
-        self.innerCurrentPoint = self.prevPoint - self.pointClass(cos(self.currentAngle), sin(self.currentAngle)) * thickness
-        self.outerCurrentPoint = self.prevPoint + self.pointClass(cos(self.currentAngle), sin(self.currentAngle)) * thickness
+        self._offsetLine(currentPoint, prevPoint.direction(currentPoint))
+
+    def _offsetLine(self, currentPoint, direction):
+        # offset a line from the previous point in `direction`, the unit normal of the line
+        pointClass = self.pointClass
+        prevPoint = self.prevPoint
+        x = currentPoint.x
+        y = currentPoint.y
+        self.currentDirection = nx, ny = direction
+        thickness = self.getThickness(direction)
+        # offset vector, computed once and reused for both ends of the segment
+        dx = nx * thickness
+        dy = ny * thickness
+        self.innerCurrentPoint = pointClass(prevPoint.x - dx, prevPoint.y - dy)
+        self.outerCurrentPoint = pointClass(prevPoint.x + dx, prevPoint.y + dy)
 
         if self.shouldHandleMove:
             self.shouldHandleMove = False
@@ -301,59 +734,147 @@ class OutlinePen(BasePen):
             self.outerPen.moveTo(self.outerCurrentPoint)
             self.outerFirstPoint = self.outerCurrentPoint
 
-            self.firstAngle = self.currentAngle
+            self.firstDirection = self.currentDirection
         else:
             self.buildConnection()
 
-        self.innerCurrentPoint = currentPoint - self.pointClass(cos(self.currentAngle), sin(self.currentAngle)) * thickness
+        self.innerCurrentPoint = pointClass(x - dx, y - dy)
         self.innerPen.lineTo(self.innerCurrentPoint)
         self.innerPrevPoint = self.innerCurrentPoint
 
-        self.outerCurrentPoint = currentPoint + self.pointClass(cos(self.currentAngle), sin(self.currentAngle)) * thickness
+        self.outerCurrentPoint = pointClass(x + dx, y + dy)
         self.outerPen.lineTo(self.outerCurrentPoint)
         self.outerPrevPoint = self.outerCurrentPoint
 
         self.prevPoint = currentPoint
-        self.prevAngle = self.currentAngle
+        self.prevDirection = self.currentDirection
 
     def _curveToOne(self, pt1, pt2, pt3):
-        if self.optimizeCurve:
+        if self._lineBuffer:
+            self._flushLineBuffer()
+        if self.optimizeCurve and self.curveTolerance and self.offset != 0:
+            curves = self._subdivideCurve((self.prevPoint, pt1, pt2, pt3), self.maxCurveSubdivisions)
+        elif self.optimizeCurve:
             curves = splitCubicAtT(self.prevPoint, pt1, pt2, pt3, .5)
         else:
             curves = [(self.prevPoint, pt1, pt2, pt3)]
+        self.curveSegmentCount += len(curves)
         for curve in curves:
             p1, h1, h2, p2 = curve
             self._processCurveToOne(h1, h2, p2)
 
+    def _subdivideCurve(self, curve, depth):
+        """
+        Split a curve in halves until the offset of every part is within the `curveTolerance`.
+        """
+        if depth <= 0 or self._offsetCurveError(curve) <= self.curveTolerance:
+            return [curve]
+        first, second = splitCubicAtT(*curve, .5)
+        return self._subdivideCurve(first, depth - 1) + self._subdivideCurve(second, depth - 1)
+
+    def _offsetCurveError(self, curve):
+        """
+        Return the largest distance between the offset curves and the true offset of the curve,
+        sampled at a few points.
+        """
+        d1, d2, innerStart, outerStart, innerCurve, outerCurve, p3 = self._offsetCurve(self.pointClass(*curve[0]), curve[1], curve[2], curve[3])
+        return self._offsetError(curve, [innerStart] + list(innerCurve), [outerStart] + list(outerCurve))
+
+    def _offsetError(self, curve, inner, outer):
+        """
+        Return the largest distance between the inner and outer offset curves and the true offset of
+        the curve, sampled at a few points. All curves are cubic, a list of four points.
+        """
+        (x0, y0), (x1, y1), (x2, y2), (x3, y3) = curve
+        pointClass = self.pointClass
+        error = 0
+        for t in self.curveToleranceSamples:
+            mt = 1 - t
+            # tangent of the source curve
+            tx = 3 * (mt * mt * (x1 - x0) + 2 * mt * t * (x2 - x1) + t * t * (x3 - x2))
+            ty = 3 * (mt * mt * (y1 - y0) + 2 * mt * t * (y2 - y1) + t * t * (y3 - y2))
+            if tx == 0 and ty == 0:
+                continue
+            # point on the source curve
+            b0, b1, b2, b3 = mt * mt * mt, 3 * mt * mt * t, 3 * mt * t * t, t * t * t
+            x = b0 * x0 + b1 * x1 + b2 * x2 + b3 * x3
+            y = b0 * y0 + b1 * y1 + b2 * y2 + b3 * y3
+            direction = nx, ny = pointClass(0, 0).direction(pointClass(tx, ty))
+            thickness = self.getThickness(direction)
+            dx = nx * thickness
+            dy = ny * thickness
+            for points, sign in ((inner, -1), (outer, 1)):
+                p0, h1, h2, p1 = points
+                ox = b0 * p0.x + b1 * h1.x + b2 * h2.x + b3 * p1.x
+                oy = b0 * p0.y + b1 * h1.y + b2 * h2.y + b3 * p1.y
+                error = max(error, hypot(ox - (x + sign * dx), oy - (y + sign * dy)))
+        return error
+
+    def _offsetCurve(self, prevPoint, pt1, pt2, pt3):
+        """
+        Return the start and end directions, the inner and outer start points, the inner
+        and outer offset curves and the end point of the curve starting at `prevPoint`.
+        """
+        pointClass = self.pointClass
+        p1 = pointClass(*pt1)
+        p2 = pointClass(*pt2)
+        p3 = pointClass(*pt3)
+
+        if p1 == prevPoint:
+            p1 = pointOnACurve(prevPoint, p1, p2, p3, 0.01)
+        if p2 == p3:
+            p2 = pointOnACurve(prevPoint, p1, p2, p3, 0.99)
+
+        d1 = cos1, sin1 = prevPoint.direction(p1)
+        d2 = cos2, sin2 = p2.direction(p3)
+
+        tickness1 = self.getThickness(d1)
+        tickness2 = self.getThickness(d2)
+
+        dx1, dy1 = cos1 * tickness1, sin1 * tickness1
+        dx2, dy2 = cos2 * tickness2, sin2 * tickness2
+
+        # along the curve at the start and back along the curve at the end
+        bisx1, bisy1 = sin1 * tickness1, -cos1 * tickness1
+        bisx2, bisy2 = -sin2 * tickness2, cos2 * tickness2
+
+        intersectPoint = interSect((prevPoint, pointClass(prevPoint.x + cos1 * 100, prevPoint.y + sin1 * 100)),
+                                   (p3, pointClass(p3.x + cos2 * 100, p3.y + sin2 * 100)))
+
+        offsets = []
+        for sign in (-1, 1):
+            start = pointClass(prevPoint.x + sign * dx1, prevPoint.y + sign * dy1)
+            h1 = None
+            if intersectPoint is not None:
+                h1 = interSect((start, pointClass(start.x + bisx1, start.y + bisy1)), (intersectPoint, p1))
+            if h1 is None:
+                h1 = pointClass(p1.x + sign * dx1, p1.y + sign * dy1)
+
+            end = pointClass(p3.x + sign * dx2, p3.y + sign * dy2)
+
+            h2 = None
+            if intersectPoint is not None:
+                h2 = interSect((end, pointClass(end.x + bisx2, end.y + bisy2)), (intersectPoint, p2))
+            if h2 is None:
+                h2 = pointClass(p2.x + sign * dx1, p2.y + sign * dy1)
+            offsets.append((start, (h1, h2, end)))
+
+        (innerStart, innerCurve), (outerStart, outerCurve) = offsets
+        return d1, d2, innerStart, outerStart, innerCurve, outerCurve, p3
+
     def _processCurveToOne(self, pt1, pt2, pt3):
         if self.offset == 0:
             self.outerPen.curveTo(pt1, pt2, pt3)
             self.innerPen.curveTo(pt1, pt2, pt3)
             return
         self.originalPen.curveTo(pt1, pt2, pt3)
+        self._addOffsetCurves(*self._offsetCurve(self.prevPoint, pt1, pt2, pt3))
 
-        p1 = self.pointClass(*pt1)
-        p2 = self.pointClass(*pt2)
-        p3 = self.pointClass(*pt3)
-
-        if p1 == self.prevPoint:
-            p1 = pointOnACurve(self.prevPoint, p1, p2, p3, 0.01)
-        if p2 == p3:
-            p2 = pointOnACurve(self.prevPoint, p1, p2, p3, 0.99)
-
-        a1 = self.prevPoint.angle(p1)
-        a2 = p2.angle(p3)
-
-        self.currentAngle = a1
-        tickness1 = self.getThickness(a1)
-        tickness2 = self.getThickness(a2)
-
-        a1bis = self.prevPoint.angle(p1, 0)
-        a2bis = p3.angle(p2, 0)
-        intersectPoint = interSect((self.prevPoint, self.prevPoint + self.pointClass(cos(a1), sin(a1)) * 100),
-                                   (p3, p3 + self.pointClass(cos(a2), sin(a2)) * 100))
-        self.innerCurrentPoint = self.prevPoint - self.pointClass(cos(a1), sin(a1)) * tickness1
-        self.outerCurrentPoint = self.prevPoint + self.pointClass(cos(a1), sin(a1)) * tickness1
+    def _addOffsetCurves(self, d1, d2, innerStart, outerStart, innerCurve, outerCurve, endPoint):
+        # draw the offset curves, cubic or quadratic, ending the curve at `endPoint`
+        self.currentDirection = d1
+        self.innerCurrentPoint = innerStart
+        self.outerCurrentPoint = outerStart
 
         if self.shouldHandleMove:
             self.shouldHandleMove = False
@@ -364,58 +885,133 @@ class OutlinePen(BasePen):
             self.outerPen.moveTo(self.outerCurrentPoint)
             self.outerFirstPoint = self.outerPrevPoint = self.outerCurrentPoint
 
-            self.firstAngle = a1
+            self.firstDirection = d1
         else:
             self.buildConnection()
 
-        h1 = None
-        if intersectPoint is not None:
-            h1 = interSect((self.innerCurrentPoint, self.innerCurrentPoint + self.pointClass(cos(a1bis), sin(a1bis)) * tickness1),  (intersectPoint, p1))
-        if h1 is None:
-            h1 = p1 - self.pointClass(cos(a1), sin(a1)) * tickness1
-
-        self.innerCurrentPoint = p3 - self.pointClass(cos(a2), sin(a2)) * tickness2
-
-        h2 = None
-        if intersectPoint is not None:
-            h2 = interSect((self.innerCurrentPoint, self.innerCurrentPoint + self.pointClass(cos(a2bis), sin(a2bis)) * tickness2), (intersectPoint, p2))
-        if h2 is None:
-            h2 = p2 - self.pointClass(cos(a1), sin(a1)) * tickness1
-
-        self.innerPen.curveTo(h1, h2, self.innerCurrentPoint)
-        self.innerPrevPoint = self.innerCurrentPoint
-
-        ########
-        h1 = None
-        if intersectPoint is not None:
-            h1 = interSect((self.outerCurrentPoint, self.outerCurrentPoint + self.pointClass(cos(a1bis), sin(a1bis)) * tickness1), (intersectPoint, p1))
-        if h1 is None:
-            h1 = p1 + self.pointClass(cos(a1), sin(a1)) * tickness1
-
-        self.outerCurrentPoint = p3 + self.pointClass(cos(a2), sin(a2)) * tickness2
-
-        h2 = None
-        if intersectPoint is not None:
-            h2 = interSect((self.outerCurrentPoint, self.outerCurrentPoint + self.pointClass(cos(a2bis), sin(a2bis)) * tickness2), (intersectPoint, p2))
-        if h2 is None:
-            h2 = p2 + self.pointClass(cos(a1), sin(a1)) * tickness1
-        self.outerPen.curveTo(h1, h2, self.outerCurrentPoint)
-        self.outerPrevPoint = self.outerCurrentPoint
+        if len(innerCurve) == 2:
+            self.innerPen.qCurveTo(*innerCurve)
+            self.outerPen.qCurveTo(*outerCurve)
+        else:
+            self.innerPen.curveTo(*innerCurve)
+            self.outerPen.curveTo(*outerCurve)
+        self.innerCurrentPoint = self.innerPrevPoint = innerCurve[-1]
+        self.outerCurrentPoint = self.outerPrevPoint = outerCurve[-1]
+
+        self.prevPoint = endPoint
+        self.currentDirection = d2
+        self.prevDirection = d2
+
+    def _qCurveToOne(self, pt1, pt2):
+        # quadratic curves are offset as quadratic curves, not converted to cubic curves
+        if self._lineBuffer:
+            self._flushLineBuffer()
+        if self.optimizeCurve and self.curveTolerance and self.offset != 0:
+            curves = self._subdivideQCurve((self.prevPoint, pt1, pt2), self.maxCurveSubdivisions)
+        elif self.optimizeCurve:
+            curves = splitQuadraticAtT(self.prevPoint, pt1, pt2, .5)
+        else:
+            curves = [(self.prevPoint, pt1, pt2)]
+        self.curveSegmentCount += len(curves)
+        for curve in curves:
+            p1, h, p2 = curve
+            self._processQCurveToOne(h, p2)
+
+    def _subdivideQCurve(self, curve, depth):
+        """
+        Split a quadratic curve in halves until the offset of every part is within the `curveTolerance`.
+        """
+        if depth <= 0 or self._offsetQCurveError(curve) <= self.curveTolerance:
+            return [curve]
+        first, second = splitQuadraticAtT(*curve, .5)
+        return self._subdivideQCurve(first, depth - 1) + self._subdivideQCurve(second, depth - 1)
+
+    def _offsetQCurveError(self, curve):
+        """
+        Same as `_offsetCurveError` for a quadratic curve.
+        """
+        result = self._offsetQCurve(self.pointClass(*curve[0]), curve[1], curve[2])
+        if result is None:
+            return 0
+        d1, d2, innerStart, outerStart, innerCurve, outerCurve, p2 = result
+        return self._offsetError(
+            _quadraticToCubic(*curve),
+            _quadraticToCubic(innerStart, *innerCurve),
+            _quadraticToCubic(outerStart, *outerCurve)
+        )
+
+    def _offsetQCurve(self, prevPoint, pt1, pt2):
+        """
+        Return the start and end directions, the inner and outer start points, the inner and outer
+        offset quadratic curves and the end point of the quadratic curve starting at `prevPoint`,
+        `None` when all points are the same.
+
+        The ends are offset along their normals, the off curve point is the intersection of the
+        offset tangents.
+        """
+        pointClass = self.pointClass
+        p1 = pointClass(*pt1)
+        p2 = pointClass(*pt2)
+        if p1 == prevPoint or p1 == p2:
+            # the off curve point is on top of an on curve point, the curve is straight
+            d1 = d2 = prevPoint.direction(p2)
+            if d1 is None:
+                return None
+            tangent1 = tangent2 = p2 - prevPoint
+        else:
+            d1 = prevPoint.direction(p1)
+            d2 = p1.direction(p2)
+            tangent1 = p1 - prevPoint
+            tangent2 = p2 - p1
+
+        tickness1 = self.getThickness(d1)
+        tickness2 = self.getThickness(d2)
+        dx1, dy1 = d1[0] * tickness1, d1[1] * tickness1
+        dx2, dy2 = d2[0] * tickness2, d2[1] * tickness2
+
+        offsets = []
+        for sign in (-1, 1):
+            start = pointClass(prevPoint.x + sign * dx1, prevPoint.y + sign * dy1)
+            end = pointClass(p2.x + sign * dx2, p2.y + sign * dy2)
+            h = interSect((start, start + tangent1), (end, end + tangent2))
+            if h is None:
+                h = pointClass(p1.x + sign * (dx1 + dx2) * .5, p1.y + sign * (dy1 + dy2) * .5)
+            offsets.append((start, (h, end)))
+
+        (innerStart, innerCurve), (outerStart, outerCurve) = offsets
+        return d1, d2, innerStart, outerStart, innerCurve, outerCurve, p2
+
+    def _processQCurveToOne(self, pt1, pt2):
+        if self.offset == 0:
+            self.outerPen.qCurveTo(pt1, pt2)
+            self.innerPen.qCurveTo(pt1, pt2)
+            return
+        self.originalPen.qCurveTo(pt1, pt2)
 
-        self.prevPoint = p3
-        self.currentAngle = a2
-        self.prevAngle = a2
+        result = self._offsetQCurve(self.prevPoint, pt1, pt2)
+        if result is None:
+            return
+        self._addOffsetCurves(*result)
 
     def _closePath(self):
+        if self._lineBuffer:
+            # add the closing line to the run so it gets offset in the same batch
+            lastPoint = self._lineBuffer[-1]
+            if not self.pointClass(*lastPoint) == self.firstPoint:
+                self._lineBuffer.append((self.firstPoint.x, self.firstPoint.y))
+            self._flushLineBuffer()
         if self.shouldHandleMove:
             return
         if self.offset == 0:
             self.outerPen.closePath()
             self.innerPen.closePath()
+            self._streamContour()
             return
 
         if not self.prevPoint == self.firstPoint:
             self._lineTo(self.firstPoint)
+            if self._lineBuffer:
+                self._flushLineBuffer()
 
         self.originalPen.closePath()
 
@@ -425,15 +1021,18 @@ class OutlinePen(BasePen):
         self.outerPrevPoint = self.outerCurrentPoint
         self.outerCurrentPoint = self.outerFirstPoint
 
-        self.prevAngle = self.currentAngle
-        self.currentAngle = self.firstAngle
+        self.prevDirection = self.currentDirection
+        self.currentDirection = self.firstDirection
 
         self.buildConnection(close=True)
 
         self.innerPen.closePath()
         self.outerPen.closePath()
+        self._streamContour()
 
     def _endPath(self):
+        if self._lineBuffer:
+            self._flushLineBuffer()
         if self.shouldHandleMove:
             return
 
@@ -453,30 +1052,210 @@ class OutlinePen(BasePen):
 
             self.buildCap(outerContour, innerContour)
 
-            for point in innerContour:
-                outerContour.addPoint((point.x, point.y), segmentType=point.segmentType, smooth=point.smooth)
+            outerContour.points.extend(innerContour.points)
 
             self.innerGlyph.removeContour(innerContour)
 
+        self._streamContour()
+
+    def _streamContour(self):
+        # draw the finished contour into the output point pen and forget it
+        if self.outputPointPen is None:
+            return
+        self.drawPoints(self.outputPointPen)
+        self.originalGlyph.clear()
+        self.innerGlyph.clear()
+        self.outerGlyph.clear()
+        self.components = []
+
+    def _flushLineBuffer(self):
+        points = self._lineBuffer
+        self._lineBuffer = []
+        if len(points) < self.minLineRun:
+            for x, y in points:
+                self._addLine(x, y)
+            return
+        self.originalPen.lineToPoints(points)
+
+        prevPoint = self.prevPoint
+        coordinates = numpy.array([(prevPoint.x, prevPoint.y)] + points, dtype=float)
+        # drop points that are equal to their predecessor, like _lineTo does
+        rounded = numpy.round(coordinates * 1000000.) / 1000000.
+        keep = numpy.ones(len(coordinates), dtype=bool)
+        keep[1:] = numpy.any(rounded[1:] != rounded[:-1], axis=1)
+        coordinates = coordinates[keep]
+        if len(coordinates) < 2:
+            return
+
+        starts = coordinates[:-1]
+        ends = coordinates[1:]
+        normals = self._lineRunDirections(starts, ends)
+        thicknesses = self.offset + self.contrast * numpy.abs(normals[:, 0] * self._contrastCos - normals[:, 1] * self._contrastSin) ** 5
+        vectors = normals * thicknesses[:, None]
+        innerStarts, outerStarts, innerEnds, outerEnds = starts - vectors, starts + vectors, ends - vectors, ends + vectors
+        joins = self._lineRunJoins(normals, innerStarts, outerStarts, innerEnds, outerEnds)
+        pointClass = self.pointClass
+        directions = [tuple(normal) for normal in normals.tolist()]
+
+        # the start of the run, like the python engine
+        innerPen = self.innerPen
+        outerPen = self.outerPen
+        self.currentDirection = directions[0]
+        self.innerCurrentPoint = pointClass(*innerStarts[0].tolist())
+        self.outerCurrentPoint = pointClass(*outerStarts[0].tolist())
+        if self.shouldHandleMove:
+            self.shouldHandleMove = False
+            innerPen.moveTo(self.innerCurrentPoint)
+            self.innerFirstPoint = self.innerCurrentPoint
+            outerPen.moveTo(self.outerCurrentPoint)
+            self.outerFirstPoint = self.outerCurrentPoint
+            self.firstDirection = directions[0]
+        else:
+            self.buildConnection()
+
+        # the points of the run go straight into the contours, only joins the arrays can not
+        # build are drawn by the connection callback
+        innerPoints = joins["innerPoints"].tolist()
+        outerPoints = joins["outerPoints"].tolist()
+        innerIndex = outerIndex = 0
+        for joinIndex in joins["callbackJoins"]:
+            innerJoinIndex = joins["innerJoinStarts"][joinIndex]
+            outerJoinIndex = joins["outerJoinStarts"][joinIndex]
+            self._addLineRunPoints(innerPen, innerPoints[innerIndex:innerJoinIndex])
+            self._addLineRunPoints(outerPen, outerPoints[outerIndex:outerJoinIndex])
+            innerIndex = innerJoinIndex
+            outerIndex = outerJoinIndex
+
+            index = joinIndex + 1
+            innerFirst = pointClass(*innerEnds[joinIndex].tolist())
+            outerFirst = pointClass(*outerEnds[joinIndex].tolist())
+            innerLast = pointClass(*innerStarts[index].tolist())
+            outerLast = pointClass(*outerStarts[index].tolist())
+            self.prevDirection = directions[joinIndex]
+            self.currentDirection = directions[index]
+            if joins["outerSide"][joinIndex]:
+                self.connectionCallback(outerFirst, outerLast, outerPen, False)
+                innerPen.lineTo(innerLast)
+            else:
+                self.connectionCallback(innerFirst, innerLast, innerPen, False)
+                outerPen.lineTo(outerLast)
+        self._addLineRunPoints(innerPen, innerPoints[innerIndex:])
+        self._addLineRunPoints(outerPen, outerPoints[outerIndex:])
+
+        self.prevPoint = pointClass(*coordinates[-1].tolist())
+        self.prevDirection = self.currentDirection = directions[-1]
+        self.innerCurrentPoint = self.innerPrevPoint = pointClass(*innerEnds[-1].tolist())
+        self.outerCurrentPoint = self.outerPrevPoint = pointClass(*outerEnds[-1].tolist())
+
+    def _addLineRunPoints(self, pen, points):
+        # the first and the last point can neighbour a curve, keep them points like the python engine
+        # draws, equal points are detected when the smooth flags are guessed
+        if not points:
+            return
+        pointClass = self.pointClass
+        points[0] = pointClass(*points[0])
+        points[-1] = pointClass(*points[-1])
+        pen.lineToPoints(points)
+
+    def _lineRunDirections(self, starts, ends):
+        # same as MathPoint.direction for every segment at once
+        delta = ends - starts
+        lengths = numpy.sqrt((delta ** 2).sum(axis=1))
+        return numpy.stack((-delta[:, 1], delta[:, 0]), axis=1) / lengths[:, None]
+
+    def _lineRunJoins(self, normals, innerStarts, outerStarts, innerEnds, outerEnds):
+        """
+        Vectorized checkSmooth, checkInnerOuter, connectionSquare and connectionButt for the joins inside a run.
+
+        Returns the points of both sides after the start of the run, the index in those points where the
+        points of every join start, the joins left to the connection callback and the side of every join.
+        """
+        prevNormals = normals[:-1]
+        currentNormals = normals[1:]
+        fx, fy = prevNormals[:, 0], prevNormals[:, 1]
+        lx, ly = currentNormals[:, 0], currentNormals[:, 1]
+        dots = fx * lx + fy * ly
+        cross = fy * lx - fx * ly
+        # see checkSmooth
+        turns = (numpy.floor(numpy.degrees(numpy.arctan2(ly, lx))) - numpy.floor(numpy.degrees(numpy.arctan2(fy, fx)))) % 360
+        smooth = (dots >= smoothCosine) | ((dots > cornerCosine) & (numpy.minimum(turns, 360 - turns) <= smoothAngle))
+        turningBack = (cross == 0) & (dots < 0)
+        outerSide = numpy.where(turningBack, (fx > 0) | ((fx == 0) & (fy < 0)), cross > 0)
+        corner = ~smooth
+        joinCount = len(prevNormals)
+
+        # the square join points, `connectionSquare` for every join
+        cornerPoints = numpy.zeros((joinCount, 2, 2))
+        cornerCounts = numpy.zeros((joinCount, 2), dtype=bool)
+        if self.connection == "square" and joinCount:
+            outerSideColumn = outerSide[:, None]
+            first = numpy.where(outerSideColumn, outerEnds[:-1], innerEnds[:-1])
+            last = numpy.where(outerSideColumn, outerStarts[1:], innerStarts[1:])
+            # extend the previous line forward and the current line backward
+            tempFirst = first + numpy.stack((fy, -fx), axis=1) * self.miterLimit
+            tempLast = last - numpy.stack((ly, -lx), axis=1) * self.miterLimit
+
+            # interSect((first, tempFirst), (last, tempLast))
+            seg1 = tempFirst - first
+            seg2 = tempLast - last
+            denom = seg2[:, 1] * seg1[:, 0] - seg2[:, 0] * seg1[:, 1]
+            valid = numpy.round(denom * 1000000.) != 0
+            uanum = seg2[:, 0] * (first[:, 1] - last[:, 1]) - seg2[:, 1] * (first[:, 0] - last[:, 0])
+            with numpy.errstate(divide="ignore", invalid="ignore"):
+                ua = numpy.where(valid, uanum / numpy.where(valid, denom, 1), 0)
+            newPoints = first + ua[:, None] * seg1
+
+            if self._inputmiterLimit is not None:
+                distances = numpy.sqrt(((first - newPoints) ** 2).sum(axis=1))
+                limited = numpy.round(distances * 1000000.) / 1000000. > self._inputmiterLimit
+            else:
+                limited = numpy.zeros(joinCount, dtype=bool)
+            cornerPoints[:, 0] = numpy.where(limited[:, None], tempFirst, newPoints)
+            cornerPoints[:, 1] = tempLast
+            cornerCounts[:, 0] = valid
+            cornerCounts[:, 1] = valid & limited
+            callbackJoins = numpy.zeros(joinCount, dtype=bool)
+        elif self.connection == "butt":
+            callbackJoins = numpy.zeros(joinCount, dtype=bool)
+        else:
+            callbackJoins = corner
+        arrayCorner = corner & ~callbackJoins
+
+        joins = dict(callbackJoins=numpy.flatnonzero(callbackJoins).tolist(), outerSide=outerSide.tolist())
+        for side, isOuter, starts, ends in (("inner", False, innerStarts, innerEnds), ("outer", True, outerStarts, outerEnds)):
+            # every join has up to two corner points, the start of the next line and its end
+            slots = numpy.empty((joinCount, 4, 2))
+            slots[:, :2] = cornerPoints
+            slots[:, 2] = starts[1:]
+            slots[:, 3] = ends[1:]
+            used = numpy.empty((joinCount, 4), dtype=bool)
+            used[:, :2] = cornerCounts & (arrayCorner & (outerSide == isOuter))[:, None]
+            used[:, 2] = arrayCorner if self.filterDoubles else ~callbackJoins
+            used[:, 3] = True
+            joins[side + "Points"] = numpy.concatenate((ends[:1], slots[used]))
+            joins[side + "JoinStarts"] = (1 + numpy.cumsum(used.sum(axis=1)) - used.sum(axis=1)).tolist()
+        return joins
+
     def addComponent(self, glyphName, transform):
         if self.preserveComponents:
             self.components.append((glyphName, transform))
+            self._streamContour()
         else:
             BasePen.addComponent(self, glyphName, transform)
 
     # thickness
 
-    def getThickness(self, angle):
-        a2 = angle + pi * .5
-        f = abs(sin(a2 + radians(self.contrastAngle)))
+    def getThickness(self, direction):
+        x, y = direction
+        f = abs(x * self._contrastCos - y * self._contrastSin)
         f = f ** 5
         return self.offset + self.contrast * f
 
     # connections
 
     def buildConnection(self, close=False):
-        if not checkSmooth(self.prevAngle, self.currentAngle):
-            if checkInnerOuter(self.prevAngle, self.currentAngle):
+        if not checkSmooth(self.prevDirection, self.currentDirection):
+            if checkInnerOuter(self.prevDirection, self.currentDirection):
                 self.connectionCallback(self.outerPrevPoint, self.outerCurrentPoint, self.outerPen, close)
                 self.connectionInnerCorner(self.innerPrevPoint, self.innerCurrentPoint, self.innerPen, close)
             else:
@@ -487,52 +1266,65 @@ class OutlinePen(BasePen):
             self.outerPen.lineTo(self.outerCurrentPoint)
 
     def connectionSquare(self, first, last, pen, close):
-        angle_1 = radians(degrees(self.prevAngle)+90)
-        angle_2 = radians(degrees(self.currentAngle)+90)
+        for point in self.getSquareJoinPoints(first, last):
+            pen.lineTo(point)
 
-        tempFirst = first - self.pointClass(cos(angle_1), sin(angle_1)) * self.miterLimit
-        tempLast = last + self.pointClass(cos(angle_2), sin(angle_2)) * self.miterLimit
+        if not close:
+            pen.lineTo(last)
 
-        newPoint = interSect((first, tempFirst), (last, tempLast))
+    def getSquareJoinPoints(self, first, last):
+        # the corner points of a square join from `first` to `last`
+        x1, y1 = self.prevDirection
+        x2, y2 = self.currentDirection
 
-        if newPoint is not None:
+        # extend the previous line forward and the current line backward
+        miterLimit = self.miterLimit
+        tempFirst = self.pointClass(first.x + y1 * miterLimit, first.y - x1 * miterLimit)
+        tempLast = self.pointClass(last.x - y2 * miterLimit, last.y + x2 * miterLimit)
 
-            if self._inputmiterLimit is not None and roundFloat(newPoint.distance(first)) > self._inputmiterLimit:
-                pen.lineTo(tempFirst)
-                pen.lineTo(tempLast)
-            else:
-                pen.lineTo(newPoint)
+        newPoint = interSect((first, tempFirst), (last, tempLast))
 
-        if not close:
-            pen.lineTo(last)
+        if newPoint is None:
+            return []
+        if self._inputmiterLimit is not None and roundFloat(newPoint.distance(first)) > self._inputmiterLimit:
+            return [tempFirst, tempLast]
+        return [newPoint]
 
     def connectionRound(self, first, last, pen, close):
-        angle_1 = radians(degrees(self.prevAngle)+90)
-        angle_2 = radians(degrees(self.currentAngle)+90)
+        bcp1, bcp2 = self.getRoundJoinHandles(first, last)
+        pen.curveTo(bcp1, bcp2, last)
+
+    def getRoundJoinHandles(self, first, last):
+        # the off curve points of the curve of a round join from `first` to `last`
+        x1, y1 = self.prevDirection
+        x2, y2 = self.currentDirection
+        # backward along the previous line and backward along the current line
+        cos1, sin1 = -y1, x1
+        cos2, sin2 = -y2, x2
 
-        tempFirst = first - self.pointClass(sin(angle_1), -cos(angle_1))
-        tempLast = last + self.pointClass(sin(angle_2), -cos(angle_2))
+        tempFirst = self.pointClass(first.x - sin1, first.y + cos1)
+        tempLast = self.pointClass(last.x + sin2, last.y - cos2)
 
         centerPoint = interSect((first, tempFirst), (last, tempLast))
         if centerPoint is None:
             # the lines are parallel, let's just take the middle
             centerPoint = (first + last) / 2
 
-        angle_diff = (angle_1 - angle_2) % (2 * pi)
-        if angle_diff > pi:
-            angle_diff = 2 * pi - angle_diff
-        angle_half = angle_diff / 2
+        # half of the angle between both directions
+        dot = min(1, max(-1, x1 * x2 + y1 * y2))
+        cosHalf = sqrt((1 + dot) * .5)
+        sinHalf = sqrt((1 - dot) * .5)
 
         radius = centerPoint.distance(first)
-        D = radius * (1 - cos(angle_half))
-        if sin(angle_half) == 0:
+        D = radius * (1 - cosHalf)
+        if sinHalf == 0:
             handleLength = 0
         else:
-            handleLength = (4 * D / 3) / sin(angle_half)  # length of the bcp line
+            handleLength = (4 * D / 3) / sinHalf  # length of the bcp line
 
-        bcp1 = first - self.pointClass(cos(angle_1), sin(angle_1)) * handleLength
-        bcp2 = last + self.pointClass(cos(angle_2), sin(angle_2)) * handleLength
-        pen.curveTo(bcp1, bcp2, last)
+        bcp1 = self.pointClass(first.x - cos1 * handleLength, first.y - sin1 * handleLength)
+        bcp2 = self.pointClass(last.x + cos2 * handleLength, last.y + sin2 * handleLength)
+        return bcp1, bcp2
 
     def connectionButt(self, first, last, pen, close):
         if not close:
@@ -550,60 +1342,75 @@ class OutlinePen(BasePen):
         first = self.pointClass(first.x, first.y)
         last = self.pointClass(last.x, last.y)
 
-        self.capCallback(firstContour, lastContour, first, last, self.prevAngle)
+        self.capCallback(firstContour, lastContour, first, last, self.prevDirection)
 
         first = lastContour[-1]
         last = firstContour[0]
         first = self.pointClass(first.x, first.y)
         last = self.pointClass(last.x, last.y)
 
-        angle = radians(degrees(self.firstAngle) + 180)
-        self.capCallback(lastContour, firstContour, first, last, angle)
+        x, y = self.firstDirection
+        self.capCallback(lastContour, firstContour, first, last, (-x, -y))
 
-    def capButt(self, firstContour, lastContour, first, last, angle):
+    def capButt(self, firstContour, lastContour, first, last, direction):
         # not nothing
         pass
 
-    def capRound(self, firstContour, lastContour, first, last, angle):
-        hookedAngle = radians(degrees(angle) + 90)
-
-        p1 = first - self.pointClass(cos(hookedAngle), sin(hookedAngle)) * self.offset
+    def capRound(self, firstContour, lastContour, first, last, direction):
+        h1, h2, oncurve, h3, h4 = self.getRoundCapPoints(first, last, direction)
 
-        p2 = last - self.pointClass(cos(hookedAngle), sin(hookedAngle)) * self.offset
-
-        oncurve = p1 + (p2 - p1) * .5
+        firstContour[-1].smooth = True
 
-        roundness = .54  # should be self.magicCurve
+        firstContour.addPoint(h1)
+        firstContour.addPoint(h2)
+        firstContour.addPoint(oncurve, smooth=True, segmentType="curve")
 
-        h1 = first - self.pointClass(cos(hookedAngle), sin(hookedAngle)) * self.offset * roundness
-        h2 = oncurve + self.pointClass(cos(angle), sin(angle)) * self.offset * roundness
+        firstContour.addPoint(h3)
+        firstContour.addPoint(h4)
 
-        firstContour[-1].smooth = True
+        lastContour[0].segmentType = "curve"
+        lastContour[0].smooth = True
 
-        firstContour.addPoint((h1.x, h1.y))
-        firstContour.addPoint((h2.x, h2.y))
-        firstContour.addPoint((oncurve.x, oncurve.y), smooth=True, segmentType="curve")
+    def getRoundCapPoints(self, first, last, direction):
+        # the off curve, on curve and off curve points of the two curves of a round cap from `first` to `last`
+        angleCos, angleSin = direction
+        # backward along the line
+        hookedCos, hookedSin = -angleSin, angleCos
+        offset = self.offset
 
-        h1 = oncurve - self.pointClass(cos(angle), sin(angle)) * self.offset * roundness
-        h2 = last - self.pointClass(cos(hookedAngle), sin(hookedAngle)) * self.offset * roundness
+        p1x, p1y = first.x - hookedCos * offset, first.y - hookedSin * offset
+        p2x, p2y = last.x - hookedCos * offset, last.y - hookedSin * offset
 
-        firstContour.addPoint((h1.x, h1.y))
-        firstContour.addPoint((h2.x, h2.y))
+        oncurveX = p1x + (p2x - p1x) * .5
+        oncurveY = p1y + (p2y - p1y) * .5
 
-        lastContour[0].segmentType = "curve"
-        lastContour[0].smooth = True
+        roundness = .54  # should be self.magicCurve
 
-    def capSquare(self, firstContour, lastContour, first, last, angle):
-        angle = radians(degrees(angle) + 90)
+        return (
+            (first.x - hookedCos * offset * roundness, first.y - hookedSin * offset * roundness),
+            (oncurveX + angleCos * offset * roundness, oncurveY + angleSin * offset * roundness),
+            (oncurveX, oncurveY),
+            (oncurveX - angleCos * offset * roundness, oncurveY - angleSin * offset * roundness),
+            (last.x - hookedCos * offset * roundness, last.y - hookedSin * offset * roundness)
+        )
 
+    def capSquare(self, firstContour, lastContour, first, last, direction):
         firstContour[-1].smooth = True
         lastContour[0].smooth = True
 
-        p1 = first - self.pointClass(cos(angle), sin(angle)) * self.offset
-        firstContour.addPoint((p1.x, p1.y), smooth=False, segmentType="line")
+        for point in self.getSquareCapPoints(first, last, direction):
+            firstContour.addPoint(point, smooth=False, segmentType="line")
 
-        p2 = last - self.pointClass(cos(angle), sin(angle)) * self.offset
-        firstContour.addPoint((p2.x, p2.y), smooth=False, segmentType="line")
+    def getSquareCapPoints(self, first, last, direction):
+        # the corner points of a square cap from `first` to `last`
+        x, y = direction
+        # backward along the line
+        angleCos, angleSin = -y, x
+        offset = self.offset
+        return (
+            (first.x - angleCos * offset, first.y - angleSin * offset),
+            (last.x - angleCos * offset, last.y - angleSin * offset)
+        )
 
     def drawSettings(self, drawOriginal=False, drawInner=False, drawOuter=True):
         self.drawOriginal = drawOriginal
@@ -612,16 +1419,26 @@ class OutlinePen(BasePen):
 
     def drawPoints(self, pointPen):
         if self.drawInner:
-            reversePen = ReverseContourPointPen(pointPen)
-            self.innerGlyph.drawPoints(CleanPointPen(reversePen))
+            self.drawInnerPoints(pointPen)
         if self.drawOuter:
-            self.outerGlyph.drawPoints(CleanPointPen(pointPen))
-
+            self.drawOuterPoints(pointPen)
         if self.drawOriginal:
-            if self.drawOuter:
-                pointPen = ReverseContourPointPen(pointPen)
-            self.originalGlyph.drawPoints(CleanPointPen(pointPen))
+            self.drawOriginalPoints(pointPen)
+        self.drawComponents(pointPen)
+
+    def drawInnerPoints(self, pointPen):
+        reversePen = ReverseContourPointPen(pointPen)
+        self.innerGlyph.drawPoints(self.cleanPointPenClass(reversePen))
 
+    def drawOuterPoints(self, pointPen):
+        self.outerGlyph.drawPoints(self.cleanPointPenClass(pointPen))
+
+    def drawOriginalPoints(self, pointPen):
+        if self.drawOuter:
+            pointPen = ReverseContourPointPen(pointPen)
+        self.originalGlyph.drawPoints(self.cleanPointPenClass(pointPen))
+
+    def drawComponents(self, pointPen):
         for glyphName, transform in self.components:
             pointPen.addComponent(glyphName, transform)
 
@@ -636,6 +1453,453 @@ class OutlinePen(BasePen):
         return glyph
 
 
+def _addBounds(bounds, other):
+    if bounds is None:
+        return other
+    if other is None:
+        return bounds
+    return unionRect(bounds, other)
+
+
+def _listBounds(xs, ys):
+    if not xs:
+        return None
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+class OutlineBoundsPen(OutlinePen):
+
+    """
+    Collects the bounds of the outline the `OutlinePen` with the same arguments would draw,
+    without building any contours. Read them from `bounds`, after setting the draw settings.
+
+    Lines, joins and caps are measured exactly, curves by the control points of their offset
+    curves, which is conservative. With `exact` the extremes of the curves are used and the
+    bounds are the same as the bounds of the outline. The curves are offset in both modes,
+    the offset curves can reach far beyond the source curve grown by the thickness. Components are always outlined as decomposed.
+    """
+
+    def __init__(self, glyphSet, exact=False, **kwargs):
+        OutlinePen.__init__(self, glyphSet, **kwargs)
+        self.exact = exact
+        self.innerBounds = None
+        self.outerBounds = None
+        # the coordinates of the source and of the inner and outer sides of the current contour
+        self._originalXs = []
+        self._originalYs = []
+        self._innerXs = []
+        self._innerYs = []
+        self._outerXs = []
+        self._outerYs = []
+        # the offset vectors at the start of the contour and at the end of the previous segment
+        self._firstOffset = None
+        self._prevOffset = None
+
+    @property
+    def originalBounds(self):
+        return _listBounds(self._originalXs, self._originalYs)
+
+    @property
+    def bounds(self):
+        if self.offset == 0:
+            if self.drawInner or self.drawOuter:
+                return self.originalBounds
+            return None
+        bounds = None
+        if self.drawInner:
+            bounds = _addBounds(bounds, self.innerBounds)
+        if self.drawOuter:
+            bounds = _addBounds(bounds, self.outerBounds)
+        if self.drawOriginal:
+            bounds = _addBounds(bounds, self.originalBounds)
+        return bounds
+
+    def _moveTo(self, pt):
+        x, y = pt
+        self._originalXs.append(x)
+        self._originalYs.append(y)
+        p = self.pointClass(x, y)
+        self.prevPoint = p
+        self.firstPoint = p
+        self.shouldHandleMove = True
+
+    def _lineTo(self, pt):
+        x, y = pt
+        self._originalXs.append(x)
+        self._originalYs.append(y)
+        prevPoint = self.prevPoint
+        currentPoint = self.pointClass(x, y)
+        if self.offset == 0 or currentPoint == prevPoint:
+            return
+
+        direction = nx, ny = prevPoint.direction(currentPoint)
+        thickness = self.getThickness(direction)
+        dx = nx * thickness
+        dy = ny * thickness
+        if self._startSegment(prevPoint, direction, dx, dy):
+            px = prevPoint.x
+            py = prevPoint.y
+            self._innerXs.append(px - dx)
+            self._innerYs.append(py - dy)
+            self._outerXs.append(px + dx)
+            self._outerYs.append(py + dy)
+        self._innerXs.append(x - dx)
+        self._innerYs.append(y - dy)
+        self._outerXs.append(x + dx)
+        self._outerYs.append(y + dy)
+        self.prevDirection = direction
+        self._prevOffset = dx, dy
+        self.prevPoint = currentPoint
+
+    def _curveToOne(self, pt1, pt2, pt3):
+        prevPoint = self.prevPoint
+        if self.exact:
+            xMin, yMin, xMax, yMax = calcCubicBounds(prevPoint, pt1, pt2, pt3)
+            self._originalXs.extend((xMin, xMax))
+            self._originalYs.extend((yMin, yMax))
+        else:
+            self._originalXs.extend((pt1[0], pt2[0], pt3[0]))
+            self._originalYs.extend((pt1[1], pt2[1], pt3[1]))
+        if self.offset == 0:
+            self.prevPoint = self.pointClass(*pt3)
+            return
+
+        if self.optimizeCurve and self.curveTolerance:
+            curves = self._subdivideCurve((prevPoint, pt1, pt2, pt3), self.maxCurveSubdivisions)
+        elif self.optimizeCurve:
+            curves = splitCubicAtT(prevPoint, pt1, pt2, pt3, .5)
+        else:
+            curves = [(prevPoint, pt1, pt2, pt3)]
+        for p0, h1, h2, p1 in curves:
+            prevPoint = self.prevPoint
+            d1, d2, innerStart, outerStart, innerCurve, outerCurve, p3 = self._offsetCurve(prevPoint, h1, h2, p1)
+            if not self._startSegment(prevPoint, d1, outerStart.x - prevPoint.x, outerStart.y - prevPoint.y):
+                # the pen continues the offset curves from the end of the previous segment
+                prevDx, prevDy = self._prevOffset
+                innerStart = self.pointClass(prevPoint.x - prevDx, prevPoint.y - prevDy)
+                outerStart = self.pointClass(prevPoint.x + prevDx, prevPoint.y + prevDy)
+            self._addCurve(self._innerXs, self._innerYs, innerStart, innerCurve)
+            self._addCurve(self._outerXs, self._outerYs, outerStart, outerCurve)
+            outerEnd = outerCurve[-1]
+            self.prevDirection = d2
+            self._prevOffset = outerEnd.x - p3.x, outerEnd.y - p3.y
+            self.prevPoint = p3
+
+    def _qCurveToOne(self, pt1, pt2):
+        prevPoint = self.prevPoint
+        if self.exact:
+            xMin, yMin, xMax, yMax = calcQuadraticBounds(prevPoint, pt1, pt2)
+            self._originalXs.extend((xMin, xMax))
+            self._originalYs.extend((yMin, yMax))
+        else:
+            self._originalXs.extend((pt1[0], pt2[0]))
+            self._originalYs.extend((pt1[1], pt2[1]))
+        if self.offset == 0:
+            self.prevPoint = self.pointClass(*pt2)
+            return
+
+        if self.optimizeCurve and self.curveTolerance:
+            curves = self._subdivideQCurve((prevPoint, pt1, pt2), self.maxCurveSubdivisions)
+        elif self.optimizeCurve:
+            curves = splitQuadraticAtT(prevPoint, pt1, pt2, .5)
+        else:
+            curves = [(prevPoint, pt1, pt2)]
+        for p0, h, p1 in curves:
+            prevPoint = self.prevPoint
+            result = self._offsetQCurve(prevPoint, h, p1)
+            if result is None:
+                continue
+            d1, d2, innerStart, outerStart, innerCurve, outerCurve, p2 = result
+            if not self._startSegment(prevPoint, d1, outerStart.x - prevPoint.x, outerStart.y - prevPoint.y):
+                # the pen continues the offset curves from the end of the previous segment
+                prevDx, prevDy = self._prevOffset
+                innerStart = self.pointClass(prevPoint.x - prevDx, prevPoint.y - prevDy)
+                outerStart = self.pointClass(prevPoint.x + prevDx, prevPoint.y + prevDy)
+            self._addCurve(self._innerXs, self._innerYs, innerStart, innerCurve)
+            self._addCurve(self._outerXs, self._outerYs, outerStart, outerCurve)
+            outerEnd = outerCurve[-1]
+            self.prevDirection = d2
+            self._prevOffset = outerEnd.x - p2.x, outerEnd.y - p2.y
+            self.prevPoint = p2
+
+    def _addCurve(self, xs, ys, start, curve):
+        if len(curve) == 2:
+            h, end = curve
+            if self.exact:
+                xMin, yMin, xMax, yMax = calcQuadraticBounds(start, h, end)
+                xs.extend((xMin, xMax))
+                ys.extend((yMin, yMax))
+            else:
+                xs.extend((start.x, h.x, end.x))
+                ys.extend((start.y, h.y, end.y))
+            return
+        h1, h2, end = curve
+        if self.exact:
+            xMin, yMin, xMax, yMax = calcCubicBounds(start, h1, h2, end)
+            xs.extend((xMin, xMax))
+            ys.extend((yMin, yMax))
+        else:
+            xs.extend((start.x, h1.x, h2.x, end.x))
+            ys.extend((start.y, h1.y, h2.y, end.y))
+
+    def _startSegment(self, point, direction, dx, dy):
+        # start a segment at `point` offset by (dx, dy), return if the offset segment starts at a new point
+        if self.shouldHandleMove:
+            self.shouldHandleMove = False
+            self.firstDirection = direction
+            self._firstOffset = dx, dy
+            return True
+        if checkSmooth(self.prevDirection, direction):
+            return not self.filterDoubles
+        self._addJoin(point, direction, dx, dy, close=False)
+        return True
+
+    def _addJoin(self, point, direction, dx, dy, close):
+        # the join the `OutlinePen` draws at `point` between the previous segment and a segment in `direction`
+        pointClass = self.pointClass
+        prevDx, prevDy = self._prevOffset
+        self.currentDirection = direction
+        if checkInnerOuter(self.prevDirection, direction):
+            first = pointClass(point.x + prevDx, point.y + prevDy)
+            last = pointClass(point.x + dx, point.y + dy)
+            xs, ys = self._outerXs, self._outerYs
+        else:
+            first = pointClass(point.x - prevDx, point.y - prevDy)
+            last = pointClass(point.x - dx, point.y - dy)
+            xs, ys = self._innerXs, self._innerYs
+        connection = self.connection.lower()
+        if connection == "square":
+            for x, y in self.getSquareJoinPoints(first, last):
+                xs.append(x)
+                ys.append(y)
+        elif connection == "round":
+            bcp1, bcp2 = self.getRoundJoinHandles(first, last)
+            xMin, yMin, xMax, yMax = calcCubicBounds(first, bcp1, bcp2, last)
+            xs.extend((xMin, xMax))
+            ys.extend((yMin, yMax))
+        xs.append(last.x)
+        ys.append(last.y)
+
+    def _closePath(self):
+        if self.shouldHandleMove:
+            return
+        if self.offset != 0:
+            if not self.prevPoint == self.firstPoint:
+                self._lineTo(self.firstPoint)
+            if not checkSmooth(self.prevDirection, self.firstDirection):
+                self._addJoin(self.firstPoint, self.firstDirection, *self._firstOffset, close=True)
+        self._finishContour(_listBounds(self._innerXs, self._innerYs), _listBounds(self._outerXs, self._outerYs))
+
+    def _endPath(self):
+        if self.shouldHandleMove:
+            return
+        innerBounds = _listBounds(self._innerXs, self._innerYs)
+        outerBounds = _listBounds(self._outerXs, self._outerYs)
+        if self.offset != 0 and self.closeOpenPaths:
+            # the caps join both sides into a single outer contour
+            startX, startY = self.firstPoint
+            endX, endY = self.prevPoint
+            firstDx, firstDy = self._firstOffset
+            prevDx, prevDy = self._prevOffset
+            pointClass = self.pointClass
+            x, y = self.firstDirection
+            caps = (
+                (pointClass(endX + prevDx, endY + prevDy), pointClass(endX - prevDx, endY - prevDy), self.prevDirection),
+                (pointClass(startX - firstDx, startY - firstDy), pointClass(startX + firstDx, startY + firstDy), (-x, -y))
+            )
+            xs = []
+            ys = []
+            cap = self.cap.lower()
+            for first, last, direction in caps:
+                if cap == "square":
+                    for x, y in self.getSquareCapPoints(first, last, direction):
+                        xs.append(x)
+                        ys.append(y)
+                elif cap == "round":
+                    h1, h2, oncurve, h3, h4 = self.getRoundCapPoints(first, last, direction)
+                    for curve in ((first, h1, h2, oncurve), (oncurve, h3, h4, last)):
+                        xMin, yMin, xMax, yMax = calcCubicBounds(*curve)
+                        xs.extend((xMin, xMax))
+                        ys.extend((yMin, yMax))
+            outerBounds = _addBounds(_addBounds(outerBounds, innerBounds), _listBounds(xs, ys))
+            innerBounds = None
+        self._finishContour(innerBounds, outerBounds)
+
+    def _finishContour(self, innerBounds, outerBounds):
+        self.innerBounds = _addBounds(self.innerBounds, innerBounds)
+        self.outerBounds = _addBounds(self.outerBounds, outerBounds)
+        self._innerXs = []
+        self._innerYs = []
+        self._outerXs = []
+        self._outerYs = []
+
+    def addComponent(self, glyphName, transform):
+        BasePen.addComponent(self, glyphName, transform)
+
+
+class PackedContours(object):
+
+    """
+    Contours and components packed in flat arrays, cheap to hash, pickle and send to other processes.
+
+    `coordinates` is an array of doubles with the x and y of every point. `codes` is an array of bytes
+    with a code for every point: the index of the segment type in `segmentTypes`, with `smoothFlag`
+    added for smooth points and `contourFlag` for the first point of a contour. Components are kept
+    in `componentNames` and in `componentTransformations`, six doubles for every component, and are
+    drawn after the contours. Point names and identifiers are not kept.
+
+    Record with the `getPointPen`, draw with `drawPoints` or `draw`:
+
+        packed = PackedContours()
+        glyph.drawPoints(packed.getPointPen())
+        outlinedPacked = outlinePackedContours(packed, offset=20)
+
+    `tobytes` returns a single bytes object in little-endian byte order on every platform,
+    `frombytes` reads it back from any bytes-like object, like a memory mapped file.
+    """
+
+    segmentTypes = (None, "move", "line", "curve", "qcurve")
+    smoothFlag = 8
+    contourFlag = 16
+
+    _segmentTypeCodes = {segmentType: code for code, segmentType in enumerate(segmentTypes)}
+    # point count, component count and the length of the component names, padded to align the doubles
+    _header = struct.Struct("<IIIxxxx")
+
+    def __init__(self, coordinates=None, codes=None, componentNames=None, componentTransformations=None):
+        self.coordinates = array("d") if coordinates is None else coordinates
+        self.codes = array("B") if codes is None else codes
+        self.componentNames = [] if componentNames is None else componentNames
+        self.componentTransformations = array("d") if componentTransformations is None else componentTransformations
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __eq__(self, other):
+        if not isinstance(other, PackedContours):
+            return NotImplemented
+        return (
+            self.codes == other.codes
+            and self.coordinates == other.coordinates
+            and self.componentNames == other.componentNames
+            and self.componentTransformations == other.componentTransformations
+        )
+
+    def __hash__(self):
+        return hash(self.tobytes())
+
+    def __repr__(self):
+        return "<PackedContours points:%s components:%s>" % (len(self.codes), len(self.componentNames))
+
+    def __reduce__(self):
+        # pickle through the bytes, the same on every platform
+        return self.__class__.frombytes, (self.tobytes(), )
+
+    def getPointPen(self):
+        """
+        Return a point pen adding contours and components.
+        """
+        return PackedPointPen(self)
+
+    def drawPoints(self, pointPen):
+        segmentTypes = self.segmentTypes
+        smoothFlag = self.smoothFlag
+        contourFlag = self.contourFlag
+        coordinates = iter(self.coordinates)
+        inContour = False
+        for code, x, y in zip(self.codes, coordinates, coordinates):
+            if code & contourFlag:
+                if inContour:
+                    pointPen.endPath()
+                pointPen.beginPath()
+                inContour = True
+            pointPen.addPoint((x, y), segmentType=segmentTypes[code & 7], smooth=bool(code & smoothFlag))
+        if inContour:
+            pointPen.endPath()
+        transformations = self.componentTransformations
+        for index, glyphName in enumerate(self.componentNames):
+            pointPen.addComponent(glyphName, tuple(transformations[index * 6:index * 6 + 6]))
+
+    def draw(self, pen):
+        self.drawPoints(PointToSegmentPen(pen))
+
+    def tobytes(self):
+        """
+        Return the packed contours as a single bytes object, in little-endian byte order.
+        """
+        names = "\n".join(self.componentNames).encode("utf-8")
+        coordinates = self.coordinates
+        componentTransformations = self.componentTransformations
+        if sys.byteorder == "big":
+            coordinates = array("d", coordinates)
+            coordinates.byteswap()
+            componentTransformations = array("d", componentTransformations)
+            componentTransformations.byteswap()
+        return b"".join((
+            self._header.pack(len(self.codes), len(self.componentNames), len(names)),
+            coordinates.tobytes(),
+            componentTransformations.tobytes(),
+            self.codes.tobytes(),
+            names
+        ))
+
+    @classmethod
+    def frombytes(cls, data):
+        """
+        Return packed contours from the bytes made by `tobytes`.
+        The arrays are always copied, so more points can be added to the result.
+        """
+        data = memoryview(data)
+        pointCount, componentCount, namesLength = cls._header.unpack_from(data)
+        offset = cls._header.size
+        parts = []
+        for typecode, count in (("d", pointCount * 2), ("d", componentCount * 6), ("B", pointCount)):
+            part = array(typecode)
+            size = count * part.itemsize
+            part.frombytes(data[offset:offset + size])
+            if sys.byteorder == "big" and typecode == "d":
+                part.byteswap()
+            parts.append(part)
+            offset += size
+        coordinates, componentTransformations, codes = parts
+        names = bytes(data[offset:offset + namesLength]).decode("utf-8")
+        componentNames = names.split("\n") if componentCount else []
+        return cls(coordinates, codes, componentNames, componentTransformations)
+
+
+class PackedPointPen(AbstractPointPen):
+
+    """
+    A point pen adding contours and components to `PackedContours`.
+    """
+
+    def __init__(self, packed):
+        self.packed = packed
+        self._startContour = False
+
+    def beginPath(self, identifier=None, **kwargs):
+        self._startContour = True
+
+    def endPath(self):
+        # a contour without points is not kept
+        self._startContour = False
+
+    def addPoint(self, pt, segmentType=None, smooth=False, name=None, identifier=None, **kwargs):
+        packed = self.packed
+        code = packed._segmentTypeCodes[segmentType]
+        if smooth:
+            code |= packed.smoothFlag
+        if self._startContour:
+            code |= packed.contourFlag
+            self._startContour = False
+        packed.codes.append(code)
+        packed.coordinates.extend(pt)
+
+    def addComponent(self, glyphName, transformation, identifier=None, **kwargs):
+        self.packed.componentNames.append(glyphName)
+        self.packed.componentTransformations.extend(transformation)
+
+
 def outlineContours(
         contours,
         outPen,
@@ -649,13 +1913,21 @@ def outlineContours(
         optimizeCurve=False,
         preserveComponents=False,
         filterDoubles=True,
+        engine="python",
+        curveTolerance=None,
         drawOriginal=False,
         drawInner=True,
-        drawOuter=True
+        drawOuter=True,
+        stream=False
     ):
     """
     Outline a list of contours:
+
+    With `stream` every outlined contour is drawn into the `outPen` as soon as it is finished,
+    its inner, outer and original contours are then next to each other
+    instead of all inner contours first.
     """
+    pointPen = PointToSegmentPen(outPen)
     pen = OutlinePen(
         glyphSet=None,
         offset=offset,
@@ -667,13 +1939,33 @@ def outlineContours(
         closeOpenPaths=closeOpenPaths,
         optimizeCurve=optimizeCurve,
         preserveComponents=preserveComponents,
-        filterDoubles=filterDoubles
+        filterDoubles=filterDoubles,
+        engine=engine,
+        curveTolerance=curveTolerance,
+        outputPointPen=pointPen if stream else None
+    )
+    pen.drawSettings(
+        drawOriginal=drawOriginal,
+        drawInner=drawInner,
+        drawOuter=drawOuter
     )
     for contour in contours:
         contour.draw(pen)
+    pen.drawPoints(pointPen)
+
+
+def outlinePackedContours(packed, glyphSet=None, drawOriginal=False, drawInner=True, drawOuter=True, **kwargs):
+    """
+    Outline `PackedContours` with an `OutlinePen`, `kwargs` are the `OutlinePen` arguments,
+    and return the outline as `PackedContours`.
+    """
+    pen = OutlinePen(glyphSet, **kwargs)
+    packed.draw(pen)
     pen.drawSettings(
         drawOriginal=drawOriginal,
         drawInner=drawInner,
         drawOuter=drawOuter
     )
-    pen.draw(outPen)
+    result = PackedContours()
+    pen.drawPoints(result.getPointPen())
+    return result
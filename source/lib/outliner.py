@@ -0,0 +1,1510 @@
+"""
+Outline glyphs without RoboFont.
+
+The palette options (as returned by `OutlinerWindowController.getOptions()`)
+are translated into `OutlinePen` arguments here, so the palette, the batch
+workers and scripts all outline with exactly the same settings.
+
+Outline a UFO, or a source of a designspace, from the command line:
+
+    python -m outliner MyFont.ufo --stroke-width 30 --layer outlined
+    python -m outliner MyFont.designspace --source Bold --output Outlined.ufo
+
+Run `python -m outliner --help` for all options.
+"""
+import os
+import sys
+import pickle
+import shutil
+import sqlite3
+import hashlib
+import argparse
+import multiprocessing
+from math import atan2, pi
+from concurrent.futures import ProcessPoolExecutor
+
+from fontTools.misc.roundTools import otRound
+from fontTools.misc.transform import Transform
+from fontTools.misc.arrayTools import unionRect, calcBounds
+from fontTools.misc.bezierTools import segmentSegmentIntersections
+from fontTools.pens.basePen import decomposeQuadraticSegment, decomposeSuperBezierSegment
+from fontTools.pens.boundsPen import BoundsPen
+from fontTools.pens.pointPen import PointToSegmentPen, SegmentToPointPen
+from fontTools.pens.roundingPen import RoundingPointPen
+from fontTools.pens.transformPen import TransformPointPen
+from fontTools.pens.recordingPen import RecordingPen, DecomposingRecordingPen, RecordingPointPen
+
+from outlinePen import OutlinePen, OutlineBoundsPen, OutlineProfiler, PackedContours
+
+try:
+    import pathops
+except ImportError:
+    pathops = None
+
+
+lineJoinOptions = ["Square", "Round", "Butt"]
+endCapOptions = ["Square", "Round", "Butt", "Open"]
+
+# the palette defaults
+defaultOptions = dict(
+    strokeWidthField=20,
+    strokeContrastField=0,
+    strokeContrastAngleField=0,
+    miterLimitField=0,
+    lineJoinPopUpButton=0,
+    endCapPopUpButton=0,
+    outputStrokeSourceCheckbox=False,
+    outputStrokeLeftCheckbox=True,
+    outputStrokeRightCheckbox=True,
+    preserveComponentsCheckbox=True,
+    preserveBoundsCheckbox=False,
+    optimizeCurvesCheckbox=False,
+    optimizeDoublePointsCheckbox=True,
+    curveToleranceField=0,
+    removeOverlapCheckbox=False,
+    skipNonOverlappingCheckbox=True,
+    applyToRadioButtons=0,
+    outputLayerField="",
+)
+
+
+def getOutlinePenOptions(options):
+    """
+    Return the `OutlinePen` keyword arguments for the given palette options.
+    """
+    cap = endCapOptions[options["endCapPopUpButton"]].lower()
+    if cap == "open":
+        cap = "square"
+    closeOpenPaths = options["endCapPopUpButton"] != 3
+    return dict(
+        offset=options["strokeWidthField"],
+        contrast=options["strokeContrastField"],
+        contrastAngle=options["strokeContrastAngleField"],
+        connection=lineJoinOptions[options["lineJoinPopUpButton"]].lower(),
+        cap=cap,
+        miterLimit=options["miterLimitField"],
+        closeOpenPaths=closeOpenPaths,
+        optimizeCurve=options["optimizeCurvesCheckbox"],
+        # older settings and scripts may not have a curve tolerance, 0 splits every curve in half
+        curveTolerance=options.get("curveToleranceField") or None,
+        preserveComponents=options["preserveComponentsCheckbox"],
+        filterDoubles=options["optimizeDoublePointsCheckbox"],
+        cleanup=not options.get("draft", False)
+    )
+
+
+def getDraftOptions(options):
+    """
+    Return the options for a quick draft outline, previewed while dragging: butt joins, open ends
+    without caps, no curve optimization, no clean up of the points and no preserved bounds.
+    """
+    options = dict(options)
+    options.update(
+        lineJoinPopUpButton=lineJoinOptions.index("Butt"),
+        endCapPopUpButton=endCapOptions.index("Open"),
+        optimizeCurvesCheckbox=False,
+        preserveBoundsCheckbox=False,
+        removeOverlapCheckbox=False,
+        draft=True
+    )
+    return options
+
+
+def getDrawSettings(options):
+    """
+    Return the `OutlinePen.drawSettings` keyword arguments for the given palette options.
+    """
+    return dict(
+        drawOriginal=options["outputStrokeSourceCheckbox"],
+        drawInner=options["outputStrokeLeftCheckbox"],
+        drawOuter=options["outputStrokeRightCheckbox"]
+    )
+
+
+def recordGlyph(glyph, glyphSet, options):
+    """
+    Record the segments of a glyph as plain data that can be send to a worker process.
+    Components are decomposed with the `glyphSet`, unless they are preserved.
+    """
+    if options["preserveComponentsCheckbox"]:
+        pen = RecordingPen()
+    else:
+        pen = DecomposingRecordingPen(glyphSet)
+    glyph.draw(pen)
+    return pen.value
+
+
+def recordContours(glyph, glyphSet, options, selectedOnly=False):
+    """
+    Record every contour and every component of a glyph separately.
+    """
+    recordings = []
+    for contour in glyph:
+        if selectedOnly and not contour.selected:
+            continue
+        pen = RecordingPen()
+        contour.draw(pen)
+        recordings.append(pen.value)
+    for component in glyph.components:
+        if selectedOnly and not component.selected:
+            continue
+        if options["preserveComponentsCheckbox"]:
+            pen = RecordingPen()
+        else:
+            pen = DecomposingRecordingPen(glyphSet)
+        component.draw(pen)
+        recordings.append(pen.value)
+    return recordings
+
+
+def outlineRecording(recording, options, profiler=None):
+    """
+    Outline a recording made by `recordGlyph` and return the result as a point pen recording.
+    Overlaps are removed when the options ask for it.
+    """
+    pen = OutlinePen(None, profiler=profiler, **getOutlinePenOptions(options))
+    for operator, operands in recording:
+        getattr(pen, operator)(*operands)
+    pen.drawSettings(**getDrawSettings(options))
+    result = RecordingPointPen()
+    pen.drawPoints(result)
+    if not options.get("removeOverlapCheckbox"):
+        return result.value
+    if profiler is None:
+        return removeOverlapRecording(result.value, options)
+    return profiler.wrap("removeOverlap", removeOverlapRecording)(result.value, options)
+
+
+def _splitContours(recording):
+    # return the closed contours of a point pen recording as lists of (x, y, segmentType)
+    # and the recording of everything else: open contours and components
+    closed = []
+    other = []
+    contour = None
+    for item in recording:
+        method, args, kwargs = item
+        if method == "beginPath":
+            contour = [item]
+        elif method == "addPoint":
+            contour.append(item)
+        elif method == "endPath":
+            contour.append(item)
+            points = []
+            for method, args, kwargs in contour[1:-1]:
+                (x, y), segmentType = args[0], args[1] if len(args) > 1 else kwargs.get("segmentType")
+                points.append((x, y, segmentType))
+            if points and points[0][2] != "move":
+                closed.append(points)
+            else:
+                other.extend(contour)
+            contour = None
+        else:
+            other.append(item)
+    return closed, other
+
+
+def _contourSegments(points):
+    # return the segments of a closed contour as (segmentType, points) with the start point,
+    # None when it has no on curve points
+    for start, (x, y, segmentType) in enumerate(points):
+        if segmentType is not None:
+            break
+    else:
+        return None
+    count = len(points)
+    segments = []
+    segment = [(x, y)]
+    for index in range(start + 1, start + count + 1):
+        x, y, segmentType = points[index % count]
+        segment.append((x, y))
+        if segmentType is not None:
+            segments.append((segmentType, segment))
+            segment = [(x, y)]
+    return segments
+
+
+def _bezierPieces(segmentType, segment):
+    # split a segment with many off curve points in single bezier curves
+    if segmentType == "qcurve" and len(segment) > 3:
+        pieces = []
+        start = segment[0]
+        for pt1, pt2 in decomposeQuadraticSegment(segment[1:]):
+            pieces.append((start, pt1, pt2))
+            start = pt2
+        return pieces
+    if segmentType == "curve" and len(segment) > 4:
+        pieces = []
+        start = segment[0]
+        for pt1, pt2, pt3 in decomposeSuperBezierSegment(segment[1:]):
+            pieces.append((start, pt1, pt2, pt3))
+            start = pt3
+        return pieces
+    return [tuple(segment)]
+
+
+def _isConvexPolygon(points):
+    # return if a closed polygon is convex and turns around once, a curve with such a control polygon
+    # does not intersect itself
+    points = [point for index, point in enumerate(points) if point != points[index - 1]]
+    turning = 0
+    sign = 0
+    count = len(points)
+    if count < 3:
+        # a straight curve
+        return True
+    for index in range(count):
+        x0, y0 = points[index - 1]
+        x1, y1 = points[index]
+        x2, y2 = points[(index + 1) % count]
+        cross = (x1 - x0) * (y2 - y1) - (y1 - y0) * (x2 - x1)
+        dot = (x1 - x0) * (x2 - x1) + (y1 - y0) * (y2 - y1)
+        if cross == 0:
+            return False
+        if sign == 0:
+            sign = cross
+        elif (cross > 0) != (sign > 0):
+            return False
+        turning += atan2(cross, dot)
+    return abs(abs(turning) - 2 * pi) < 1e-6
+
+
+def _segmentsCross(segment, otherSegment, sharedPoints, tolerance=.01):
+    # return if the pieces of two neighbouring segments meet other than at their shared points
+    for piece in _bezierPieces(*segment):
+        for otherPiece in _bezierPieces(*otherSegment):
+            for intersection in segmentSegmentIntersections(piece, otherPiece):
+                x, y = intersection.pt
+                for sharedX, sharedY in sharedPoints:
+                    if abs(x - sharedX) <= tolerance and abs(y - sharedY) <= tolerance:
+                        break
+                else:
+                    return True
+    return False
+
+
+def _signedArea(points):
+    area = 0
+    x1, y1 = points[-1][:2]
+    for x2, y2, segmentType in points:
+        area += x1 * y2 - x2 * y1
+        x1, y1 = x2, y2
+    return area
+
+
+def contoursMayOverlap(contours):
+    """
+    Return if closed contours, lists of `(x, y, segmentType)`, may overlap. A quick and conservative check:
+    a curve whose control polygon is not convex may intersect itself. A sweep over the control bounds
+    of all segments looks for segments that may cross. Only neighbouring lines are not tested, other
+    neighbouring segments, and segments of a contour whose bounds only touch, are intersected. Contours without crossings may only overlap when one lies
+    within the bounds of an other with the same direction.
+    """
+    items = []
+    contourSegments = []
+    for contourIndex, points in enumerate(contours):
+        segments = _contourSegments(points)
+        if segments is None:
+            return True
+        contourSegments.append(segments)
+        count = len(segments)
+        for segmentIndex, (segmentType, segment) in enumerate(segments):
+            if len(segment) > 2 and not _isConvexPolygon(segment):
+                return True
+            xMin, yMin, xMax, yMax = calcBounds(segment)
+            items.append((xMin, xMax, yMin, yMax, contourIndex, segmentIndex, count))
+    items.sort()
+    active = []
+    for item in items:
+        xMin, xMax, yMin, yMax, contourIndex, segmentIndex, count = item
+        active = [other for other in active if other[1] >= xMin]
+        for otherXMin, otherXMax, otherYMin, otherYMax, otherContourIndex, otherSegmentIndex, otherCount in active:
+            if otherYMax < yMin or otherYMin > yMax:
+                continue
+            if otherContourIndex != contourIndex:
+                return True
+            segments = contourSegments[contourIndex]
+            segment = segments[segmentIndex]
+            otherSegment = segments[otherSegmentIndex]
+            difference = (segmentIndex - otherSegmentIndex) % count
+            if difference not in (1, count - 1):
+                # bounds meeting only at an edge, like the opposite quarters of a circle, are intersected
+                if otherXMax > xMin and otherYMax > yMin and otherYMin < yMax:
+                    return True
+                if _segmentsCross(segment, otherSegment, []):
+                    return True
+                continue
+            if len(segment[1]) == 2 and len(otherSegment[1]) == 2:
+                # neighbouring lines share a point, their bounds always touch
+                continue
+            if count == 2:
+                # the segments are neighbours at both ends
+                sharedPoints = [segment[1][0], otherSegment[1][0]]
+            elif difference == 1:
+                sharedPoints = [segment[1][0]]
+            else:
+                sharedPoints = [otherSegment[1][0]]
+            if _segmentsCross(segment, otherSegment, sharedPoints):
+                return True
+        active.append(item)
+
+    # no segments cross, contours can still lie within each other
+    contourBounds = [calcBounds([point[:2] for point in points]) for points in contours]
+    directions = [_signedArea(points) > 0 for points in contours]
+    for index1, (xMin1, yMin1, xMax1, yMax1) in enumerate(contourBounds):
+        for index2, (xMin2, yMin2, xMax2, yMax2) in enumerate(contourBounds):
+            if index1 == index2 or directions[index1] != directions[index2]:
+                continue
+            if xMin1 <= xMin2 and yMin1 <= yMin2 and xMax1 >= xMax2 and yMax1 >= yMax2:
+                return True
+    return False
+
+
+def removeOverlapRecording(recording, options):
+    """
+    Remove the overlaps of the closed contours of a point pen recording with skia-pathops.
+    Open contours and components are kept as they are. With the `skipNonOverlappingCheckbox` option
+    the recording is returned untouched when `contoursMayOverlap` tells there is nothing to remove.
+    """
+    if pathops is None:
+        raise ImportError("Removing overlaps requires skia-pathops")
+    closed, other = _splitContours(recording)
+    if not closed:
+        return recording
+    if options.get("skipNonOverlappingCheckbox", True) and not contoursMayOverlap(closed):
+        return recording
+    path = pathops.Path()
+    pointPen = PointToSegmentPen(path.getPen())
+    for points in closed:
+        pointPen.beginPath()
+        for x, y, segmentType in points:
+            pointPen.addPoint((x, y), segmentType=segmentType)
+        pointPen.endPath()
+    path = pathops.simplify(path, clockwise=False)
+    result = RecordingPointPen()
+    path.draw(SegmentToPointPen(result))
+    return result.value + other
+
+
+def getRecordingBounds(recordings, glyphSet=None):
+    """
+    Return the bounds of a list of segment recordings, components are decomposed with the `glyphSet`.
+    """
+    pen = BoundsPen(glyphSet)
+    for recording in recordings:
+        for operator, operands in recording:
+            getattr(pen, operator)(*operands)
+    return pen.bounds
+
+
+def getPointRecordingBounds(recording):
+    """
+    Return the bounds of the contours in a point pen recording, components are ignored.
+    """
+    pen = BoundsPen(None)
+    pointPen = PointToSegmentPen(pen)
+    for method, args, kwargs in recording:
+        if method != "addComponent":
+            getattr(pointPen, method)(*args, **kwargs)
+    return pen.bounds
+
+
+def getOutlineBounds(recording, options, glyphSet=None, exact=False):
+    """
+    Return the bounds of the outline of a segment recording without building it,
+    components are outlined decomposed with the `glyphSet`.
+    Curves are measured by their control points, unless `exact` is set.
+    """
+    pen = OutlineBoundsPen(glyphSet, exact=exact, **getOutlinePenOptions(options))
+    for operator, operands in recording:
+        getattr(pen, operator)(*operands)
+    pen.drawSettings(**getDrawSettings(options))
+    return pen.bounds
+
+
+def getPreserveBoundsTransform(sourceBounds, resultBounds):
+    """
+    Return the transformation that scales an outlined result around its center
+    back to the height of the source, or `None` when there is nothing to scale.
+    """
+    if not sourceBounds or not resultBounds:
+        return None
+    minx1, miny1, maxx1, maxy1 = sourceBounds
+    minx2, miny2, maxx2, maxy2 = resultBounds
+
+    h1 = maxy1 - miny1
+
+    w2 = maxx2 - minx2
+    h2 = maxy2 - miny2
+    if h2 == 0:
+        return None
+
+    scale = h1 / h2
+    centerx, centery = minx2 + w2 * .5, miny2 + h2 * .5
+    return Transform().translate(centerx, centery).scale(scale).translate(-centerx, -centery)
+
+
+def preserveRecordingBounds(recording, outlinedRecording, glyphSet, options):
+    """
+    Scale a point pen recording made by `outlineRecording` back to the height of the source `recording`.
+    """
+    sourceBounds = getRecordingBounds([recording], glyphSet)
+    resultBounds = getPointRecordingBounds(outlinedRecording)
+    if any(method == "addComponent" for method, args, kwargs in outlinedRecording):
+        # preserved components are not outlined, only measure the outline of their decomposed shapes
+        components = [(operator, operands) for operator, operands in recording if operator == "addComponent"]
+        componentBounds = getOutlineBounds(components, options, glyphSet, exact=True)
+        if resultBounds is None:
+            resultBounds = componentBounds
+        elif componentBounds is not None:
+            resultBounds = unionRect(resultBounds, componentBounds)
+
+    transform = getPreserveBoundsTransform(sourceBounds, resultBounds)
+    if transform is None:
+        return outlinedRecording
+    return transformPointRecording(outlinedRecording, transform)
+
+
+def _outlineRecordingsChunk(recordings, options, glyphNames=None):
+    if glyphNames is None:
+        return [outlineRecording(recording, options) for recording in recordings], None
+    profiler = OutlineProfiler()
+    result = []
+    for glyphName, recording in zip(glyphNames, recordings):
+        with profiler.glyph(glyphName):
+            result.append(outlineRecording(recording, options, profiler))
+    return result, profiler.asDict()
+
+
+def inRoboFont():
+    """
+    Return if this runs inside RoboFont.
+    """
+    return "mojo.roboFont" in sys.modules
+
+
+def getWorkerCount(workers):
+    """
+    Return the amount of worker processes to use, `None` or `0` uses all cpu cores.
+
+    Inside RoboFont `sys.executable` is the app and not a python that can run a worker,
+    so there everything is outlined in this process, with a single worker.
+    """
+    if inRoboFont():
+        return 1
+    if not workers:
+        return os.cpu_count() or 1
+    return workers
+
+
+def getProcessPool(workers):
+    """
+    Return a pool of `workers` processes. The processes are spawned, not forked, so they behave
+    the same on every platform, but they need a python executable that can import this module.
+    Get the amount of workers from `getWorkerCount`, it never asks for a pool inside RoboFont.
+    """
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _mapChunks(chunkFunction, items, options, workers=None, profiler=None, glyphNames=None, executor=None):
+    # run `chunkFunction(items, options, glyphNames)` over chunks of the items in a pool of worker processes
+    # a new pool, or the given `executor` with this amount of `workers`
+    items = list(items)
+    if profiler is not None and glyphNames is None:
+        glyphNames = list(range(len(items)))
+    workers = min(getWorkerCount(workers), len(items))
+    if workers <= 1:
+        result, profile = chunkFunction(items, options, glyphNames if profiler is not None else None)
+        if profile is not None:
+            profiler.merge(profile)
+        return result
+
+    # send a few chunks per worker to balance the load without paying a round trip per glyph
+    chunkSize = max(1, len(items) // (workers * 4))
+    chunks = [items[i:i + chunkSize] for i in range(0, len(items), chunkSize)]
+    if profiler is not None:
+        nameChunks = [glyphNames[i:i + chunkSize] for i in range(0, len(items), chunkSize)]
+    else:
+        nameChunks = [None] * len(chunks)
+    result = []
+    if executor is None:
+        with getProcessPool(workers) as executor:
+            results = list(executor.map(chunkFunction, chunks, [options] * len(chunks), nameChunks))
+    else:
+        results = executor.map(chunkFunction, chunks, [options] * len(chunks), nameChunks)
+    for chunkResult, profile in results:
+        result.extend(chunkResult)
+        if profile is not None:
+            profiler.merge(profile)
+    return result
+
+
+def outlineRecordings(recordings, options, workers=None, profiler=None, glyphNames=None, executor=None):
+    """
+    Outline a list of recordings in a pool of worker processes.
+
+    `workers` is the amount of processes, `None` or `0` uses all cpu cores.
+    With one worker, or only a single recording, everything is done in this process.
+    An existing `ProcessPoolExecutor` with that amount of workers is used when given.
+    The result list has the same order as the `recordings`.
+
+    With an `OutlineProfiler` every worker profiles its glyphs, the results are merged into
+    the `profiler`. `glyphNames` are used in the profile report, the index otherwise.
+    """
+    return _mapChunks(_outlineRecordingsChunk, recordings, options, workers, profiler, glyphNames, executor)
+
+
+def outlineRecordingParts(recording, options, profiler=None):
+    """
+    Outline a recording and return the inner, outer, original and component
+    point pen recordings separately, in the order the `OutlinePen` draws them.
+    """
+    return _outlineParts(recording, getOutlinePenOptions(options), getDrawSettings(options), profiler)
+
+
+def _outlineParts(recording, penOptions, drawSettings, profiler=None):
+    pen = OutlinePen(None, profiler=profiler, **penOptions)
+    for operator, operands in recording:
+        getattr(pen, operator)(*operands)
+    return _getPenParts(pen, drawSettings)
+
+
+def _getPenParts(pen, drawSettings):
+    pen.drawSettings(**drawSettings)
+    inner = RecordingPointPen()
+    outer = RecordingPointPen()
+    original = RecordingPointPen()
+    components = RecordingPointPen()
+    if pen.drawInner:
+        pen.drawInnerPoints(inner)
+    if pen.drawOuter:
+        pen.drawOuterPoints(outer)
+    if pen.drawOriginal:
+        pen.drawOriginalPoints(original)
+    pen.drawComponents(components)
+    return inner.value, outer.value, original.value, components.value
+
+
+def joinParts(parts):
+    """
+    Return a single point pen recording of outlined parts: all inner contours,
+    all outer contours, the source contours and the components.
+    """
+    result = []
+    for index in range(4):
+        for part in parts:
+            result.extend(part[index])
+    return result
+
+
+def isUniformTransform(transformation):
+    """
+    Return if a component transformation only moves and scales uniformly,
+    the outline of its base glyph can then be reused.
+    """
+    xx, xy, yx, yy, dx, dy = transformation
+    return xy == 0 and yx == 0 and xx == yy and xx > 0
+
+
+def scaleOptions(options, scale):
+    """
+    Return the options to outline a glyph that will be scaled with `scale`,
+    so the stroke has the requested size after scaling.
+    """
+    if scale == 1:
+        return options
+    options = dict(options)
+    options["strokeWidthField"] = options["strokeWidthField"] / scale
+    options["strokeContrastField"] = options["strokeContrastField"] / scale
+    options["miterLimitField"] = options["miterLimitField"] / scale
+    if options.get("curveToleranceField"):
+        options["curveToleranceField"] = options["curveToleranceField"] / scale
+    return options
+
+
+def _outlinePartsChunk(jobs, options, glyphNames=None):
+    profiler = None
+    if glyphNames is not None:
+        profiler = OutlineProfiler()
+    result = []
+    for index, (recording, scale) in enumerate(jobs):
+        if profiler is None:
+            result.append(outlineRecordingParts(recording, scaleOptions(options, scale)))
+        else:
+            with profiler.glyph(glyphNames[index]):
+                result.append(outlineRecordingParts(recording, scaleOptions(options, scale), profiler))
+    return result, profiler.asDict() if profiler is not None else None
+
+
+def _removeOverlapChunk(recordings, options, glyphNames=None):
+    if glyphNames is None:
+        return [removeOverlapRecording(recording, options) for recording in recordings], None
+    # the glyphs are counted when their contours are outlined, only the stage is profiled
+    profiler = OutlineProfiler()
+    removeOverlap = profiler.wrap("removeOverlap", removeOverlapRecording)
+    return [removeOverlap(recording, options) for recording in recordings], profiler.asDict()
+
+
+class ComponentOutliner(object):
+
+    """
+    Outlines glyphs with decomposed components, but outlines each base glyph only once.
+
+    Components that only move and scale uniformly reuse the outline of their base glyph,
+    outlined with a stroke width corrected for the scale, and placed with the component transformation.
+    Other components are decomposed and outlined as part of the glyph. The result is the
+    same as outlining the decomposed glyph with `outlineRecording`.
+
+    Call `prepare` to outline all glyphs in a pool of worker processes up front,
+    otherwise glyphs are outlined when asked for and only base glyphs are kept.
+    """
+
+    maxComponentDepth = 20
+
+    def __init__(self, glyphSet, options, profiler=None):
+        self.glyphSet = glyphSet
+        self.options = options
+        self.profiler = profiler
+        # (glyphName, scale): a list of ("contours", recording) and ("component", baseKey, transformation) items
+        self._plans = dict()
+        self._baseKeys = set()
+        # (glyphName, scale): the outlined parts of a base glyph
+        self._parts = dict()
+        # (glyphName, scale, itemIndex): the outlined parts made by `prepare`
+        self._prepared = dict()
+        # glyphName: the outline without overlaps made by `prepare`
+        self._preparedOutlines = dict()
+
+    def _plan(self, key, depth=0):
+        plan = self._plans.get(key)
+        if plan is not None:
+            return plan
+        glyphName, scale = key
+        pen = RecordingPen()
+        self.glyphSet[glyphName].draw(pen)
+        plan = []
+        contours = []
+        for operator, operands in pen.value:
+            if operator == "addComponent":
+                baseGlyphName, transformation = operands
+                if depth < self.maxComponentDepth and baseGlyphName in self.glyphSet and isUniformTransform(transformation):
+                    if contours:
+                        plan.append(("contours", contours))
+                        contours = []
+                    baseKey = (baseGlyphName, scale * transformation[0])
+                    self._baseKeys.add(baseKey)
+                    self._plan(baseKey, depth + 1)
+                    plan.append(("component", baseKey, tuple(transformation)))
+                    continue
+                decomposePen = DecomposingRecordingPen(self.glyphSet)
+                decomposePen.addComponent(baseGlyphName, transformation)
+                contours.extend(decomposePen.value)
+            else:
+                contours.append((operator, operands))
+        if contours:
+            plan.append(("contours", contours))
+        self._plans[key] = plan
+        return plan
+
+    def prepare(self, glyphNames, workers=None, executor=None):
+        """
+        Outline all contours of the glyphs and their base glyphs in a pool of worker processes,
+        see `outlineRecordings`. Base glyphs outlined before are not outlined again.
+        When the options ask for it, the overlaps of the glyphs are removed by the same workers.
+        """
+        for glyphName in glyphNames:
+            self._plan((glyphName, 1))
+        jobKeys = []
+        jobs = []
+        for key, plan in self._plans.items():
+            if key in self._parts:
+                continue
+            for index, item in enumerate(plan):
+                if item[0] == "contours" and key + (index, ) not in self._prepared:
+                    jobKeys.append(key + (index, ))
+                    jobs.append((item[1], key[1]))
+        names = None
+        if self.profiler is not None:
+            names = [glyphName if scale == 1 else "%s@%s" % (glyphName, scale) for glyphName, scale, index in jobKeys]
+        for jobKey, part in zip(jobKeys, _mapChunks(_outlinePartsChunk, jobs, self.options, workers, self.profiler, names, executor)):
+            self._prepared[jobKey] = part
+        if not self.options.get("removeOverlapCheckbox"):
+            return
+        # overlaps are removed from the complete glyphs, in the same pool of workers
+        glyphNames = [glyphName for glyphName in dict.fromkeys(glyphNames) if glyphName not in self._preparedOutlines]
+        outlines = [joinParts(self._getParts((glyphName, 1))) for glyphName in glyphNames]
+        names = glyphNames if self.profiler is not None else None
+        for glyphName, outline in zip(glyphNames, _mapChunks(_removeOverlapChunk, outlines, self.options, workers, self.profiler, names, executor)):
+            self._preparedOutlines[glyphName] = outline
+
+    def _outlineContours(self, key, index, recording):
+        part = self._prepared.pop(key + (index, ), None)
+        if part is not None:
+            return part
+        glyphName, scale = key
+        options = scaleOptions(self.options, scale)
+        if self.profiler is None:
+            return outlineRecordingParts(recording, options)
+        with self.profiler.glyph(glyphName if scale == 1 else "%s@%s" % key):
+            return outlineRecordingParts(recording, options, self.profiler)
+
+    def _getParts(self, key):
+        parts = self._parts.get(key)
+        if parts is not None:
+            return parts
+        parts = []
+        for index, item in enumerate(self._plan(key)):
+            if item[0] == "contours":
+                parts.append(self._outlineContours(key, index, item[1]))
+            else:
+                baseKey, transformation = item[1:]
+                for part in self._getParts(baseKey):
+                    parts.append(tuple(transformPointRecording(recording, transformation) for recording in part))
+        if key in self._baseKeys:
+            self._parts[key] = parts
+        else:
+            del self._plans[key]
+        return parts
+
+    def outline(self, glyphName):
+        """
+        Outline a glyph and return the result as a point pen recording.
+        Overlaps are removed when the options ask for it.
+        """
+        result = self._preparedOutlines.pop(glyphName, None)
+        if result is not None:
+            return result
+        result = joinParts(self._getParts((glyphName, 1)))
+        if not self.options.get("removeOverlapCheckbox"):
+            return result
+        if self.profiler is None:
+            return removeOverlapRecording(result, self.options)
+        return self.profiler.wrap("removeOverlap", removeOverlapRecording)(result, self.options)
+
+
+def transformPointRecording(recording, transformation):
+    """
+    Return a point pen recording transformed with `transformation`.
+    """
+    pen = RecordingPointPen()
+    transformPen = TransformPointPen(pen, transformation)
+    for method, args, kwargs in recording:
+        getattr(transformPen, method)(*args, **kwargs)
+    return pen.value
+
+
+class OutlineContourCache(object):
+
+    """
+    Remembers the outline of each contour recording made by `recordContours`.
+
+    Every call to `outline` only outlines the contours that are not in the cache,
+    contours that are no longer used are dropped. Changing the options clears the cache.
+    The result is the same as outlining all recordings with a single `OutlinePen`.
+    """
+
+    def __init__(self):
+        self._optionsKey = None
+        self._parts = dict()
+
+    def outline(self, recordings, options, pointPen):
+        penOptions = getOutlinePenOptions(options)
+        drawSettings = getDrawSettings(options)
+        optionsKey = tuple(sorted(penOptions.items())) + tuple(sorted(drawSettings.items()))
+        if optionsKey != self._optionsKey:
+            self._optionsKey = optionsKey
+            self._parts = dict()
+
+        parts = dict()
+        orderedParts = []
+        for recording in recordings:
+            key = tuple(recording)
+            part = parts.get(key)
+            if part is None:
+                part = self._parts.get(key)
+            if part is None:
+                part = _outlineParts(recording, penOptions, drawSettings)
+            parts[key] = part
+            orderedParts.append(part)
+        self._parts = parts
+
+        # the pen draws all inner contours, then all outer contours, the source and the components
+        for method, args, kwargs in joinParts(orderedParts):
+            getattr(pointPen, method)(*args, **kwargs)
+
+
+# headless
+
+
+class RecordedGlyph(object):
+
+    """
+    A glyph read from a ufoLib glyph set, with its outline kept as a point pen recording.
+    """
+
+    def __init__(self):
+        self.width = 0
+        self.height = 0
+        self.unicodes = []
+        self.note = None
+        self.image = None
+        self.guidelines = []
+        self.anchors = []
+        self.lib = dict()
+        self.points = []
+
+    @classmethod
+    def read(cls, glyphSet, glyphName):
+        glyph = cls()
+        pen = RecordingPointPen()
+        glyphSet.readGlyph(glyphName, glyph, pen)
+        glyph.points = pen.value
+        return glyph
+
+    def write(self, glyphSet, glyphName):
+        glyphSet.writeGlyph(glyphName, self, self.drawPoints)
+
+    def draw(self, pen):
+        self.drawPoints(PointToSegmentPen(pen))
+
+    def drawPoints(self, pointPen):
+        for method, args, kwargs in self.points:
+            getattr(pointPen, method)(*args, **kwargs)
+
+
+def getCachePath(path):
+    """
+    Return the path of the outline cache stored next to the UFO at `path`.
+    """
+    return os.path.splitext(os.path.normpath(path))[0] + ".outlinercache"
+
+
+def getCacheKey(glyph, glyphSet, options):
+    """
+    Return the `OutlineCache` key of a glyph: a hash of its contours and components,
+    with the contours of the base glyphs from the `glyphSet` unless components are preserved,
+    and of the options that change the outline. Other options, like the output layer, share the cached outlines.
+    """
+    outlineOptions = (
+        sorted(getOutlinePenOptions(options).items()),
+        sorted(getDrawSettings(options).items()),
+        options["preserveBoundsCheckbox"],
+        bool(options.get("removeOverlapCheckbox")),
+        options.get("skipNonOverlappingCheckbox", True)
+    )
+    key = hashlib.sha1(repr((OutlineCache.version, outlineOptions)).encode("utf-8"))
+    _updateGlyphHash(key, glyph, glyphSet, not options["preserveComponentsCheckbox"])
+    return key.hexdigest()
+
+
+def _updateGlyphHash(key, glyph, glyphSet, decompose, depth=0):
+    # hash the points packed in arrays, much faster than the repr of a recording
+    packed = PackedContours()
+    glyph.drawPoints(packed.getPointPen())
+    key.update(packed.tobytes())
+    if decompose and depth < ComponentOutliner.maxComponentDepth:
+        for baseGlyphName in packed.componentNames:
+            if baseGlyphName in glyphSet:
+                _updateGlyphHash(key, glyphSet[baseGlyphName], glyphSet, decompose, depth + 1)
+
+
+class OutlineCache(object):
+
+    """
+    A persistent cache of outlined glyphs in a single sqlite file, see `getCachePath`.
+
+    Outlines are stored as point pen recordings, before the bounds are preserved, by the
+    key from `getCacheKey`. A changed glyph or option gets a new key, old outlines are
+    removed, least recently used first, when the cache grows over `maxSize` bytes.
+    With `invalidate` the cache starts empty.
+
+        with OutlineCache(getCachePath(path)) as cache:
+            outlinedRecording = cache.get(key)
+    """
+
+    # change when the outline of the same glyph and options changes
+    version = 3
+
+    def __init__(self, path, maxSize=100 * 1024 * 1024, invalidate=False):
+        self.path = path
+        self.maxSize = maxSize
+        self.hits = 0
+        self.misses = 0
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS outlines (key TEXT PRIMARY KEY, data BLOB, size INTEGER, used INTEGER)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS outlinesUsed ON outlines (used)")
+        if invalidate:
+            self.clear()
+        # a counter instead of a time stamp, every get and set is a step
+        self._clock = self._connection.execute("SELECT MAX(used) FROM outlines").fetchone()[0] or 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM outlines").fetchone()[0]
+
+    def get(self, key):
+        """
+        Return the outlined point pen recording for `key`, `None` when it is not cached.
+        """
+        row = self._connection.execute("SELECT data FROM outlines WHERE key = ?", (key, )).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._clock += 1
+        self._connection.execute("UPDATE outlines SET used = ? WHERE key = ?", (self._clock, key))
+        return pickle.loads(row[0])
+
+    def set(self, key, recording):
+        """
+        Store an outlined point pen recording for `key`.
+        """
+        data = pickle.dumps(recording, pickle.HIGHEST_PROTOCOL)
+        self._clock += 1
+        self._connection.execute("INSERT OR REPLACE INTO outlines VALUES (?, ?, ?, ?)", (key, data, len(data), self._clock))
+
+    def prune(self):
+        """
+        Remove the least recently used outlines until the cache fits in `maxSize`.
+        """
+        size = 0
+        for used, dataSize in self._connection.execute("SELECT used, size FROM outlines ORDER BY used DESC"):
+            size += dataSize
+            if size > self.maxSize:
+                self._connection.execute("DELETE FROM outlines WHERE used <= ?", (used, ))
+                break
+
+    def clear(self):
+        """
+        Remove all outlines.
+        """
+        self._connection.execute("DELETE FROM outlines")
+
+    def close(self):
+        """
+        Prune, write and close the cache.
+        """
+        self.prune()
+        self._connection.commit()
+        self._connection.close()
+
+
+def recordGlyphSet(glyphSet, glyphNames):
+    """
+    Return a copy of the glyphs of a glyph set, with all their base glyphs, as `RecordedGlyph` objects
+    in a dictionary. The copy can be outlined in an other thread while the glyph set changes.
+    """
+    glyphs = dict()
+    glyphNames = list(glyphNames)
+    while glyphNames:
+        glyphName = glyphNames.pop()
+        if glyphName in glyphs or glyphName not in glyphSet:
+            continue
+        glyph = RecordedGlyph()
+        pen = RecordingPointPen()
+        glyphSet[glyphName].drawPoints(pen)
+        glyph.points = pen.value
+        glyphs[glyphName] = glyph
+        glyphNames.extend(args[0] for method, args, kwargs in glyph.points if method == "addComponent")
+    return glyphs
+
+
+def iterOutlineChunks(glyphSet, glyphNames, options, workers=None, chunkSize=64, profiler=None, cache=None):
+    """
+    Outline the glyphs of a glyph set chunk by chunk and yield a list of (glyphName, outlinedRecording)
+    for every chunk, the outlines are point pen recordings before the bounds are preserved.
+
+    All chunks are outlined by the same pool of worker processes, see `outlineRecordings`, and decomposed
+    components reuse the outline of their base glyph, see `ComponentOutliner`. Outlines found in the
+    optional `OutlineCache` are not outlined again, new outlines are added to it.
+    Stop iterating to cancel, the pool is shut down when the iterator is closed.
+    """
+    glyphNames = list(glyphNames)
+    workers = getWorkerCount(workers)
+    componentOutliner = None
+    if not options["preserveComponentsCheckbox"]:
+        componentOutliner = ComponentOutliner(glyphSet, options, profiler)
+    executor = None
+    if workers > 1 and len(glyphNames) > 1:
+        executor = getProcessPool(workers)
+    try:
+        for start in range(0, len(glyphNames), chunkSize):
+            chunk = glyphNames[start:start + chunkSize]
+            outlined = dict()
+            cacheKeys = dict()
+            if cache is not None:
+                for glyphName in chunk:
+                    cacheKeys[glyphName] = getCacheKey(glyphSet[glyphName], glyphSet, options)
+                    outlinedRecording = cache.get(cacheKeys[glyphName])
+                    if outlinedRecording is not None:
+                        outlined[glyphName] = outlinedRecording
+            missing = [glyphName for glyphName in chunk if glyphName not in outlined]
+            if not missing:
+                pass
+            elif componentOutliner is not None:
+                # outline every base glyph once and place it in the composites
+                componentOutliner.prepare(missing, workers=workers, executor=executor)
+                for glyphName in missing:
+                    outlined[glyphName] = componentOutliner.outline(glyphName)
+            else:
+                recordings = [recordGlyph(glyphSet[glyphName], glyphSet, options) for glyphName in missing]
+                for glyphName, outlinedRecording in zip(missing, outlineRecordings(recordings, options, workers, profiler, missing, executor)):
+                    outlined[glyphName] = outlinedRecording
+            if cache is not None:
+                for glyphName in missing:
+                    cache.set(cacheKeys[glyphName], outlined[glyphName])
+            yield [(glyphName, outlined[glyphName]) for glyphName in chunk]
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+def outlineGlyphSet(glyphSet, targetGlyphSet, options, glyphNames=None, profiler=None, cache=None):
+    """
+    Outline the glyphs of a ufoLib `glyphSet` into the `targetGlyphSet`, one glyph at a time.
+
+    Glyphs already in the target keep their metrics, unicodes and anchors, other glyphs get them
+    from the source. Decomposed components reuse the outline of their base glyph when possible,
+    see `ComponentOutliner`. When both glyph sets are the same, a glyph used as a base glyph is written once
+    every glyph using it is outlined, so components always decompose with the original base glyphs.
+    Other glyphs are written right away.
+    Every glyph is profiled with the optional `OutlineProfiler`. Outlines found in the optional
+    `OutlineCache` are not outlined again, new outlines are added to it.
+    Yields every outlined glyph name.
+    """
+    if glyphNames is None:
+        glyphNames = glyphSet.keys()
+    glyphNames = list(glyphNames)
+    inPlace = targetGlyphSet is glyphSet
+    lastUses = dict()
+    if inPlace:
+        lastUses = _getBaseGlyphLastUses(glyphSet, glyphNames)
+    componentOutliner = None
+    if not options["preserveComponentsCheckbox"]:
+        componentOutliner = ComponentOutliner(glyphSet, options, profiler)
+    # index: the glyphs to write after the glyph at that index is outlined
+    pending = dict()
+    for index, glyphName in enumerate(glyphNames):
+        # write the base glyphs the previous glyph was the last to use
+        for pendingGlyphName, pendingGlyph in pending.pop(index - 1, []):
+            pendingGlyph.write(targetGlyphSet, pendingGlyphName)
+        if glyphName not in glyphSet:
+            continue
+        glyph = RecordedGlyph.read(glyphSet, glyphName)
+        cachedRecording = None
+        if cache is not None:
+            cacheKey = getCacheKey(glyph, glyphSet, options)
+            cachedRecording = cache.get(cacheKey)
+        if componentOutliner is not None:
+            recording = RecordingPen()
+            glyph.draw(recording)
+            recording = recording.value
+        else:
+            recording = recordGlyph(glyph, glyphSet, options)
+        if cachedRecording is not None:
+            outlinedRecording = cachedRecording
+        elif componentOutliner is not None:
+            outlinedRecording = componentOutliner.outline(glyphName)
+        elif profiler is None:
+            outlinedRecording = outlineRecording(recording, options)
+        else:
+            with profiler.glyph(glyphName):
+                outlinedRecording = outlineRecording(recording, options, profiler)
+        if cache is not None and cachedRecording is None:
+            cache.set(cacheKey, outlinedRecording)
+        if options["preserveBoundsCheckbox"]:
+            outlinedRecording = preserveRecordingBounds(recording, outlinedRecording, glyphSet, options)
+
+        if not inPlace and glyphName in targetGlyphSet:
+            glyph = RecordedGlyph.read(targetGlyphSet, glyphName)
+        pen = RecordingPointPen()
+        roundingPen = RoundingPointPen(pen, otRound)
+        for method, args, kwargs in outlinedRecording:
+            getattr(roundingPen, method)(*args, **kwargs)
+        glyph.points = pen.value
+
+        lastUse = lastUses.get(glyphName, index)
+        if lastUse > index:
+            pending.setdefault(lastUse, []).append((glyphName, glyph))
+        else:
+            glyph.write(targetGlyphSet, glyphName)
+        yield glyphName
+
+    for index in sorted(pending):
+        for pendingGlyphName, glyph in pending[index]:
+            glyph.write(targetGlyphSet, pendingGlyphName)
+
+
+def _getBaseGlyphLastUses(glyphSet, glyphNames):
+    # return the index of the last glyph in `glyphNames` using a base glyph, directly or through other components
+    references = dict()
+    glyphNamesToRead = [glyphName for glyphName in glyphNames if glyphName in glyphSet]
+    while glyphNamesToRead:
+        newReferences = glyphSet.getComponentReferences(glyphNamesToRead)
+        references.update(newReferences)
+        glyphNamesToRead = list(dict.fromkeys(
+            baseGlyphName for baseGlyphNames in newReferences.values() for baseGlyphName in baseGlyphNames
+            if baseGlyphName not in references and baseGlyphName in glyphSet
+        ))
+    lastUses = dict()
+    for index, glyphName in enumerate(glyphNames):
+        baseGlyphNames = list(references.get(glyphName, []))
+        seen = set()
+        while baseGlyphNames:
+            baseGlyphName = baseGlyphNames.pop()
+            if baseGlyphName in seen:
+                continue
+            seen.add(baseGlyphName)
+            lastUses[baseGlyphName] = index
+            baseGlyphNames.extend(references.get(baseGlyphName, []))
+    return lastUses
+
+
+def outlineUFO(path, options, outputPath=None, sourceLayerName=None, glyphNames=None, profiler=None, cache=None):
+    """
+    Outline a UFO into the layer named in `options["outputLayerField"]`, the source layer when empty.
+
+    With an `outputPath` the UFO is copied there first and the source is left untouched.
+    Outlines are looked up in and added to the optional `OutlineCache`.
+    Yields every outlined glyph name.
+    """
+    from fontTools.ufoLib import UFOReader, UFOWriter
+
+    if outputPath is not None:
+        if os.path.exists(outputPath):
+            raise ValueError("Output UFO already exists: %s" % outputPath)
+        shutil.copytree(path, outputPath)
+    reader = UFOReader(path, validate=False)
+    writer = UFOWriter(outputPath or path, formatVersion=reader.formatVersionTuple, validate=False)
+
+    glyphSet = reader.getGlyphSet(sourceLayerName, validateRead=False)
+    targetLayerName = (options["outputLayerField"] or "").strip() or sourceLayerName
+    if targetLayerName is None:
+        targetLayerName = writer.getDefaultLayerName()
+    isNewLayer = targetLayerName not in writer.getLayerNames()
+    targetGlyphSet = writer.getGlyphSet(targetLayerName, defaultLayer=targetLayerName == writer.getDefaultLayerName(), validateWrite=False)
+    if outputPath is None and targetLayerName == (sourceLayerName or reader.getDefaultLayerName()):
+        # read and write the same glif files
+        glyphSet = targetGlyphSet
+
+    for glyphName in outlineGlyphSet(glyphSet, targetGlyphSet, options, glyphNames, profiler, cache):
+        yield glyphName
+
+    targetGlyphSet.writeContents()
+    if isNewLayer:
+        writer.writeLayerContents()
+
+
+def getDesignspaceSource(path, sourceName=None):
+    """
+    Return the UFO path and the layer name of a source in a designspace,
+    the default source when no `sourceName` is given.
+    """
+    from fontTools.designspaceLib import DesignSpaceDocument
+
+    document = DesignSpaceDocument.fromfile(path)
+    if sourceName is None:
+        source = document.findDefault()
+        if source is None:
+            raise ValueError("Designspace has no default source: %s" % path)
+    else:
+        for source in document.sources:
+            if sourceName in (source.name, source.styleName, source.filename):
+                break
+        else:
+            raise ValueError("Designspace has no source named %r: %s" % (sourceName, path))
+    return source.path, source.layerName
+
+
+def getPointStructure(recording):
+    """
+    Return the interpolation structure of a point pen recording: a tuple with,
+    for every contour, a tuple of the segment types of its points
+    and, for every component, its base glyph name.
+    """
+    structure = []
+    contour = None
+    for method, args, kwargs in recording:
+        if method == "beginPath":
+            contour = []
+        elif method == "addPoint":
+            segmentType = args[1] if len(args) > 1 else kwargs.get("segmentType")
+            contour.append(segmentType)
+        elif method == "endPath":
+            structure.append(tuple(contour))
+            contour = None
+        elif method == "addComponent":
+            structure.append(args[0] if args else kwargs["baseGlyphName"])
+    return tuple(structure)
+
+
+def describeIncompatibility(structures):
+    """
+    Compare the point structures of a glyph in several sources, a list of `(sourceName, structure)` items.
+    Return a description of the first difference, or `None` when they are compatible.
+    """
+    if len(structures) < 2:
+        return None
+    firstName, first = structures[0]
+    for sourceName, structure in structures[1:]:
+        if structure == first:
+            continue
+        if len(structure) != len(first):
+            return "%s contours/components in %r, %s in %r" % (len(first), firstName, len(structure), sourceName)
+        for index, (item1, item2) in enumerate(zip(first, structure)):
+            if item1 == item2:
+                continue
+            if isinstance(item1, str) or isinstance(item2, str):
+                return "item %s is %r in %r, %r in %r" % (index, item1, firstName, item2, sourceName)
+            if len(item1) != len(item2):
+                return "contour %s has %s points in %r, %s in %r" % (index, len(item1), firstName, len(item2), sourceName)
+            return "contour %s has different point types in %r and %r" % (index, firstName, sourceName)
+    return None
+
+
+def _readPointStructures(path, layerName, glyphNames=None):
+    from fontTools.ufoLib import UFOReader
+
+    glyphSet = UFOReader(path, validate=False).getGlyphSet(layerName, validateRead=False)
+    if glyphNames is None:
+        glyphNames = glyphSet.keys()
+    structures = dict()
+    for glyphName in glyphNames:
+        if glyphName in glyphSet:
+            structures[glyphName] = getPointStructure(RecordedGlyph.read(glyphSet, glyphName).points)
+    return structures
+
+
+def _outlineDesignspaceSources(path, sources, options, outputPath=None, glyphNames=None, profile=False, cacheSize=None, invalidateCache=False):
+    # outline all sources, a list of (sourceName, layerName), stored in the UFO at `path`
+    # return the point structures of every source before and after outlining, per source name
+    profiler = None
+    if profile:
+        profiler = OutlineProfiler()
+    cache = None
+    if cacheSize:
+        cache = OutlineCache(getCachePath(path), cacheSize, invalidateCache)
+    structures = dict()
+    for sourceName, layerName in sources:
+        structures[sourceName] = [_readPointStructures(path, layerName, glyphNames)]
+    for index, (sourceName, layerName) in enumerate(sources):
+        if outputPath is None or index > 0:
+            glyphs = outlineUFO(outputPath or path, options, sourceLayerName=layerName, glyphNames=glyphNames, profiler=profiler, cache=cache)
+        else:
+            glyphs = outlineUFO(path, options, outputPath=outputPath, sourceLayerName=layerName, glyphNames=glyphNames, profiler=profiler, cache=cache)
+        for glyphName in glyphs:
+            pass
+        targetLayerName = (options["outputLayerField"] or "").strip() or layerName
+        structures[sourceName].append(_readPointStructures(outputPath or path, targetLayerName, glyphNames))
+    if cache is not None:
+        cache.close()
+    return structures, profiler.asDict() if profiler is not None else None
+
+
+def outlineDesignspace(path, options, outputDirectory=None, glyphNames=None, workers=None, profiler=None, cacheSize=None, invalidateCache=False):
+    """
+    Outline every source of a designspace with the same options, one worker process per source UFO,
+    and check that the outlined glyphs are still point compatible across the sources.
+
+    Sources stored as layers of the same UFO are outlined one after another by the same worker,
+    they must write their outlines back into their own layer. With an `outputDirectory` the source
+    UFOs are copied there first, together with a designspace referring to the outlined layers.
+    With a `cacheSize`, in bytes, every source UFO gets an `OutlineCache` next to it,
+    emptied first with `invalidateCache`.
+
+    Returns a dictionary of glyph names and a description of the incompatibility, for every glyph
+    of which the outlines no longer interpolate. Glyphs with incompatible sources are reported too.
+    """
+    from fontTools.designspaceLib import DesignSpaceDocument
+
+    document = DesignSpaceDocument.fromfile(path)
+    if not document.sources:
+        raise ValueError("Designspace has no sources: %s" % path)
+    outputLayerName = (options["outputLayerField"] or "").strip()
+
+    jobs = dict()
+    for source in document.sources:
+        jobs.setdefault(os.path.abspath(source.path), []).append((source.name, source.layerName))
+    outputPaths = dict()
+    for ufoPath, sources in jobs.items():
+        if outputLayerName and len(sources) > 1:
+            raise ValueError("Sources %s are layers of the same UFO, they can not share the output layer %r" % (", ".join(repr(sourceName) for sourceName, layerName in sources), outputLayerName))
+        outputPaths[ufoPath] = None
+        if outputDirectory is not None:
+            outputPath = os.path.join(outputDirectory, os.path.basename(ufoPath))
+            if outputPath in outputPaths.values():
+                raise ValueError("Sources have the same UFO file name: %s" % os.path.basename(ufoPath))
+            outputPaths[ufoPath] = outputPath
+    if outputDirectory is not None and not os.path.exists(outputDirectory):
+        os.makedirs(outputDirectory)
+
+    ufoPaths = list(jobs)
+    workers = min(getWorkerCount(workers), len(ufoPaths))
+    arguments = [
+        (ufoPath, jobs[ufoPath], options, outputPaths[ufoPath], glyphNames, profiler is not None, cacheSize, invalidateCache)
+        for ufoPath in ufoPaths
+    ]
+    if workers <= 1:
+        results = [_outlineDesignspaceSources(*argument) for argument in arguments]
+    else:
+        with getProcessPool(workers) as executor:
+            results = list(executor.map(_outlineDesignspaceSources, *zip(*arguments)))
+
+    structures = dict()
+    for sourceStructures, profile in results:
+        structures.update(sourceStructures)
+        if profile is not None:
+            profiler.merge(profile)
+
+    if outputDirectory is not None:
+        for source in document.sources:
+            source.path = outputPaths[os.path.abspath(source.path)]
+            source.filename = os.path.basename(source.path)
+            if outputLayerName:
+                source.layerName = outputLayerName
+        document.write(os.path.join(outputDirectory, os.path.basename(path)))
+
+    incompatible = dict()
+    allGlyphNames = set()
+    for before, after in structures.values():
+        allGlyphNames.update(after)
+    for glyphName in sorted(allGlyphNames):
+        # sparse sources may not have every glyph
+        sourceNames = [source.name for source in document.sources if glyphName in structures[source.name][1]]
+        message = describeIncompatibility([(sourceName, structures[sourceName][1][glyphName]) for sourceName in sourceNames])
+        if message is None:
+            continue
+        if describeIncompatibility([(sourceName, structures[sourceName][0][glyphName]) for sourceName in sourceNames]) is not None:
+            message += " (the sources are not compatible)"
+        incompatible[glyphName] = message
+    return incompatible
+
+
+def getArgumentParser():
+    parser = argparse.ArgumentParser(
+        prog="python -m outliner",
+        description="Outline the glyphs of a UFO, or a designspace source, with the outliner settings."
+    )
+    parser.add_argument("path", help="a .ufo or .designspace file")
+    parser.add_argument("--source", help="the designspace source name, style name or file name, the default source when omitted")
+    parser.add_argument("--all-sources", action="store_true", help="outline every source of the designspace in parallel and check the outlines are still compatible")
+    parser.add_argument("--workers", type=int, default=0, help="the amount of worker processes for --all-sources, all cpu cores when omitted")
+    parser.add_argument("--source-layer", help="the layer to outline, the default layer when omitted")
+    parser.add_argument("--output", help="write a new UFO instead of changing the source UFO, a directory for --all-sources")
+    parser.add_argument("--layer", default="", help="the layer to write the outlines in, the source layer when omitted")
+    parser.add_argument("--glyphs", nargs="+", help="only outline these glyphs")
+    parser.add_argument("--profile", metavar="JSON", help="profile the outline stages, print a report and write it to this json file")
+    parser.add_argument("--cache", action=argparse.BooleanOptionalAction, default=True, help="keep the outlines in a cache file next to the UFO, only changed glyphs or options are outlined again")
+    parser.add_argument("--cache-size", type=int, default=100, metavar="MB", help="remove the least recently used outlines when the cache grows over this size")
+    parser.add_argument("--invalidate-cache", action="store_true", help="empty the cache before outlining")
+
+    group = parser.add_argument_group("outline options")
+    group.add_argument("--stroke-width", type=int, default=defaultOptions["strokeWidthField"])
+    group.add_argument("--stroke-contrast", type=int, default=defaultOptions["strokeContrastField"])
+    group.add_argument("--stroke-contrast-angle", type=float, default=defaultOptions["strokeContrastAngleField"])
+    group.add_argument("--miter-limit", type=int, default=defaultOptions["miterLimitField"])
+    group.add_argument("--line-join", choices=[option.lower() for option in lineJoinOptions], default=lineJoinOptions[defaultOptions["lineJoinPopUpButton"]].lower())
+    group.add_argument("--end-cap", choices=[option.lower() for option in endCapOptions], default=endCapOptions[defaultOptions["endCapPopUpButton"]].lower())
+    group.add_argument("--source-stroke", action=argparse.BooleanOptionalAction, default=defaultOptions["outputStrokeSourceCheckbox"], help="output the source stroke")
+    group.add_argument("--left-stroke", action=argparse.BooleanOptionalAction, default=defaultOptions["outputStrokeLeftCheckbox"], help="output the left stroke")
+    group.add_argument("--right-stroke", action=argparse.BooleanOptionalAction, default=defaultOptions["outputStrokeRightCheckbox"], help="output the right stroke")
+    group.add_argument("--preserve-components", action=argparse.BooleanOptionalAction, default=defaultOptions["preserveComponentsCheckbox"])
+    group.add_argument("--preserve-bounds", action=argparse.BooleanOptionalAction, default=defaultOptions["preserveBoundsCheckbox"])
+    group.add_argument("--optimize-curves", action=argparse.BooleanOptionalAction, default=defaultOptions["optimizeCurvesCheckbox"])
+    group.add_argument("--optimize-double-points", action=argparse.BooleanOptionalAction, default=defaultOptions["optimizeDoublePointsCheckbox"])
+    group.add_argument("--remove-overlap", action=argparse.BooleanOptionalAction, default=defaultOptions["removeOverlapCheckbox"], help="remove overlaps from the outlines, requires skia-pathops")
+    group.add_argument("--skip-non-overlapping", action=argparse.BooleanOptionalAction, default=defaultOptions["skipNonOverlappingCheckbox"], help="only remove overlaps when a quick check finds contours that may overlap")
+    group.add_argument("--curve-tolerance", type=float, default=defaultOptions["curveToleranceField"], help="split optimized curves only where the offset is off by more than this, 0 splits every curve in half")
+    return parser
+
+
+def getArgumentOptions(args):
+    """
+    Return the palette options for parsed command line arguments.
+    """
+    options = dict(defaultOptions)
+    options.update(
+        strokeWidthField=args.stroke_width,
+        strokeContrastField=args.stroke_contrast,
+        strokeContrastAngleField=args.stroke_contrast_angle,
+        miterLimitField=args.miter_limit,
+        lineJoinPopUpButton=[option.lower() for option in lineJoinOptions].index(args.line_join),
+        endCapPopUpButton=[option.lower() for option in endCapOptions].index(args.end_cap),
+        outputStrokeSourceCheckbox=args.source_stroke,
+        outputStrokeLeftCheckbox=args.left_stroke,
+        outputStrokeRightCheckbox=args.right_stroke,
+        preserveComponentsCheckbox=args.preserve_components,
+        preserveBoundsCheckbox=args.preserve_bounds,
+        optimizeCurvesCheckbox=args.optimize_curves,
+        optimizeDoublePointsCheckbox=args.optimize_double_points,
+        curveToleranceField=args.curve_tolerance,
+        removeOverlapCheckbox=args.remove_overlap,
+        skipNonOverlappingCheckbox=args.skip_non_overlapping,
+        outputLayerField=args.layer,
+    )
+    return options
+
+
+def main(args=None):
+    parser = getArgumentParser()
+    args = parser.parse_args(args)
+    options = getArgumentOptions(args)
+
+    path = args.path
+    sourceLayerName = args.source_layer
+    profiler = None
+    if args.profile:
+        profiler = OutlineProfiler()
+    cacheSize = args.cache_size * 1024 * 1024 if args.cache else None
+    isDesignspace = os.path.splitext(path)[1].lower() == ".designspace"
+    if args.all_sources:
+        if not isDesignspace:
+            parser.error("--all-sources requires a designspace")
+        try:
+            incompatible = outlineDesignspace(path, options, outputDirectory=args.output, glyphNames=args.glyphs, workers=args.workers, profiler=profiler, cacheSize=cacheSize, invalidateCache=args.invalidate_cache)
+        except ValueError as error:
+            parser.error(str(error))
+        print("Outlined all sources of %s" % (args.output or path))
+        if profiler is not None:
+            print(profiler.report())
+            profiler.writeJSON(args.profile)
+        if incompatible:
+            print("%s glyphs are not compatible:" % len(incompatible))
+            for glyphName, message in incompatible.items():
+                print("    %s: %s" % (glyphName, message))
+            return 1
+        return 0
+
+    try:
+        if isDesignspace:
+            path, layerName = getDesignspaceSource(path, args.source)
+            if sourceLayerName is None:
+                sourceLayerName = layerName
+        cache = None
+        if cacheSize:
+            cache = OutlineCache(getCachePath(path), cacheSize, args.invalidate_cache)
+        count = 0
+        try:
+            for glyphName in outlineUFO(path, options, outputPath=args.output, sourceLayerName=sourceLayerName, glyphNames=args.glyphs, profiler=profiler, cache=cache):
+                count += 1
+        finally:
+            if cache is not None:
+                cache.close()
+    except ValueError as error:
+        parser.error(str(error))
+    if cache is not None and cache.hits:
+        print("Outlined %s glyphs in %s, %s from the cache" % (count, args.output or path, cache.hits))
+    else:
+        print("Outlined %s glyphs in %s" % (count, args.output or path))
+    if profiler is not None:
+        print(profiler.report())
+        profiler.writeJSON(args.profile)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+import os
+import sys
+import time
+import types
+import unittest
+from unittest import mock
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(root, "source", "lib"))
+sys.path.insert(0, os.path.join(root, "benchmarks"))
+
+from fontTools.pens.recordingPen import RecordingPen  # noqa: E402
+from defcon import Font  # noqa: E402
+
+scheduled = []
+
+
+def installAppModules():
+    # outside RoboFont stand in for the modules of the app, only what the palette module needs to load
+    # return the names of the modules
+    def addModule(name, **attributes):
+        module = types.ModuleType(name)
+        module.__dict__.update(attributes)
+        sys.modules[name] = module
+        names.append(name)
+
+    names = []
+
+    class MerzPen(RecordingPen):
+
+        @property
+        def path(self):
+            return self.value
+
+    addModule("ezui", WindowController=object)
+    addModule("PyObjCTools")
+    addModule("PyObjCTools.AppHelper", callAfter=lambda function, *args: function(*args), callLater=lambda delay, function, *args: scheduled.append((function, args)))
+    addModule("merz", MerzPen=MerzPen)
+    addModule("mojo")
+    addModule("mojo.roboFont", OpenWindow=lambda controller: None, CurrentGlyph=None, CurrentFont=None)
+    addModule("mojo.subscriber", Subscriber=object, registerGlyphEditorSubscriber=None, unregisterGlyphEditorSubscriber=None)
+    addModule("mojo.extensions", getExtensionDefault=None, setExtensionDefault=None)
+    addModule("mojo.events", postEvent=None)
+    return names
+
+
+try:
+    import mojo.roboFont  # noqa: F401
+    appModuleNames = []
+except ImportError:
+    appModuleNames = installAppModules()
+
+import outline  # noqa: E402
+
+# other tests must not think they run inside RoboFont
+for name in appModuleNames:
+    del sys.modules[name]
+from outliner import defaultOptions, recordContours  # noqa: E402
+from benchmarkOutlinePen import mixedGlyph  # noqa: E402
+
+
+class PreviewGlyph(object):
+
+    def __init__(self):
+        self.layer = None
+
+    def naked(self):
+        return self
+
+
+class PreviewSubscriber(object):
+
+    def __init__(self):
+        self.paths = []
+
+    def previewDidFinish(self, path):
+        self.paths.append(path)
+
+
+def getRecordings():
+    font = Font()
+    glyph = font.newGlyph("a")
+    mixedGlyph(count=2).replay(glyph.getPen())
+    return recordContours(glyph, font, defaultOptions)
+
+
+def waitFor(condition, timeout=10):
+    end = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < end:
+        time.sleep(.01)
+
+
+class OutlinePreviewBrokerTest(unittest.TestCase):
+
+    def setUp(self):
+        del scheduled[:]
+        self.clock = time.perf_counter()
+        self.broker = outline.OutlinePreviewBroker()
+        self.outlinePreview = mock.patch.object(outline, "outlinePreview", wraps=outline.outlinePreview)
+        self.outlined = self.outlinePreview.start()
+
+    def tearDown(self):
+        self.outlinePreview.stop()
+        self.broker.stop()
+
+    def request(self, subscriber, glyph, recordings, options, inBackground=False, draft=False):
+        # requests further apart than the draft delay are outlined in full
+        if not draft:
+            self.clock += outline.draftPreviewDelay * 2
+        with mock.patch.object(time, "perf_counter", return_value=self.clock):
+            self.broker.request(subscriber, glyph, recordings, options, inBackground)
+
+    def test_sharedPreview(self):
+        glyph = PreviewGlyph()
+        recordings = getRecordings()
+        options = dict(defaultOptions)
+        first, second = PreviewSubscriber(), PreviewSubscriber()
+        self.request(first, glyph, recordings, options)
+        self.request(second, glyph, recordings, options)
+        # the glyph is outlined once for every glyph editor showing it
+        self.assertEqual(self.outlined.call_count, 1)
+        self.assertEqual(len(first.paths), 1)
+        self.assertEqual(second.paths, first.paths)
+        # the same request again is not outlined
+        self.request(first, glyph, list(recordings), dict(options))
+        self.assertEqual(self.outlined.call_count, 1)
+        # new options are outlined once, for both
+        self.request(first, glyph, recordings, dict(options, strokeWidthField=40))
+        self.request(second, glyph, recordings, dict(options, strokeWidthField=40))
+        self.assertEqual(self.outlined.call_count, 2)
+        self.assertEqual(len(first.paths), 2)
+        self.assertEqual(second.paths, first.paths)
+
+    def test_glyphKey(self):
+        recordings = getRecordings()
+        options = dict(defaultOptions)
+        first, second = PreviewSubscriber(), PreviewSubscriber()
+        # glyphs are told apart by their font data, not by the glyph editor
+        self.request(first, PreviewGlyph(), recordings, options)
+        self.request(second, PreviewGlyph(), recordings, options)
+        self.assertEqual(self.outlined.call_count, 2)
+        self.assertEqual(len(self.broker._glyphs), 2)
+        # a glyph without subscribers is forgotten
+        self.broker.unsubscribe(first)
+        self.broker.unsubscribe(second)
+        self.assertEqual(self.broker._glyphs, dict())
+
+    def test_draft(self):
+        glyph = PreviewGlyph()
+        recordings = getRecordings()
+        subscriber = PreviewSubscriber()
+        self.request(subscriber, glyph, recordings, dict(defaultOptions))
+        # updates in quick succession are drafts, the full outline follows when they stop
+        for strokeWidth in (30, 40):
+            self.request(subscriber, glyph, recordings, dict(defaultOptions, strokeWidthField=strokeWidth), draft=True)
+        self.assertEqual([call.args[2].get("draft", False) for call in self.outlined.call_args_list], [False, True, True])
+        self.assertEqual(len(scheduled), 2)
+        # only the idle call after the last update outlines again
+        for function, args in scheduled:
+            function(*args)
+        self.assertEqual([call.args[2].get("draft", False) for call in self.outlined.call_args_list], [False, True, True, False])
+        self.assertEqual(self.outlined.call_args_list[-1].args[2]["strokeWidthField"], 40)
+        self.assertEqual(len(subscriber.paths), 4)
+
+    def test_staleBackgroundRequests(self):
+        glyph = PreviewGlyph()
+        recordings = getRecordings()
+        subscriber = PreviewSubscriber()
+        self.request(subscriber, glyph, recordings, dict(defaultOptions), inBackground=True)
+        waitFor(lambda: subscriber.paths)
+        self.assertEqual(len(subscriber.paths), 1)
+        worker = self.broker._glyphs[id(glyph)]["worker"]
+        # requests made while the worker is busy replace each other, only the last one is outlined
+        with worker._condition:
+            for strokeWidth in (30, 40, 50):
+                self.request(subscriber, glyph, recordings, dict(defaultOptions, strokeWidthField=strokeWidth), inBackground=True)
+        waitFor(lambda: len(subscriber.paths) > 1)
+        time.sleep(.1)
+        self.assertEqual(self.outlined.call_count, 2)
+        self.assertEqual(self.outlined.call_args_list[-1].args[2]["strokeWidthField"], 50)
+        self.assertFalse(self.outlined.call_args_list[-1].args[2].get("draft", False))
+        self.assertEqual(len(subscriber.paths), 2)
+
+    def test_staleWorkerResult(self):
+        results = []
+        worker = outline.OutlinePreviewWorker(lambda glyph, path, options: results.append(options))
+        glyph = PreviewGlyph()
+        recordings = getRecordings()
+        # a result finished before a newer request is dropped
+        worker._finished(1, glyph, [], dict(defaultOptions))
+        with worker._condition:
+            worker.submit(glyph, recordings, dict(defaultOptions, strokeWidthField=30))
+            worker.submit(glyph, recordings, dict(defaultOptions, strokeWidthField=40))
+        waitFor(lambda: results)
+        worker._finished(1, glyph, [], dict(defaultOptions))
+        worker.stop()
+        self.assertEqual([options["strokeWidthField"] for options in results], [40])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+import os
+import sys
+import json
+import hashlib
+import unittest
+from math import cos, sin, radians
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(root, "source", "lib"))
+sys.path.insert(0, os.path.join(root, "benchmarks"))
+
+from fontTools.pens.boundsPen import BoundsPen  # noqa: E402
+from fontTools.pens.pointPen import PointToSegmentPen  # noqa: E402
+from fontTools.pens.recordingPen import RecordingPointPen  # noqa: E402
+
+from outlinePen import OutlinePen, OutlineBoundsPen, checkSmooth  # noqa: E402
+from benchmarkOutlinePen import shapes, iterSettings, polygonGlyph, outlineWithPen, outlineWithNumpyPen  # noqa: E402
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+baselinePath = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "outlinePenBaseline.json")
+
+
+def iterCases(shapeNames=None):
+    """
+    Yield a name, the recording and the `OutlinePen` keyword arguments of every benchmark case,
+    or of the cases of the given shapes.
+    """
+    for shapeName, shapeFactory in shapes.items():
+        if shapeNames is not None and shapeName not in shapeNames:
+            continue
+        recording = shapeFactory()
+        for settingsName, settings in iterSettings():
+            yield f"{shapeName}/{settingsName}", recording, settings
+
+
+def describeOutline(recording):
+    """
+    Return the amount of points and a digest of the points, rounded to 3 decimals, of a point pen recording.
+    """
+    digest = hashlib.sha1()
+    count = 0
+    for method, args, kwargs in recording.value:
+        if method == "addPoint":
+            (x, y), segmentType = args[:2]
+            # adding zero turns a rounded -0.0 into 0.0
+            digest.update(b"%.3f %.3f %s;" % (round(x, 3) + 0, round(y, 3) + 0, str(segmentType).encode()))
+            count += 1
+        else:
+            digest.update(method.encode())
+    return dict(points=count, digest=digest.hexdigest())
+
+
+def saveBaseline(path=baselinePath):
+    """
+    Record the outlines of the current `OutlinePen` as the baseline. The baseline holds the outlines
+    of the original pen, only record it again for an intended change of the output and say so in the commit.
+    """
+    baseline = {name: describeOutline(outlineWithPen(recording, None, **settings)) for name, recording, settings in iterCases()}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=1, sort_keys=True)
+
+
+def getPointLists(recording):
+    contours = []
+    for method, args, kwargs in recording.value:
+        if method == "beginPath":
+            contours.append([])
+        elif method == "addPoint":
+            contours[-1].append(args[:3])
+    return contours
+
+
+def getDirection(angle):
+    # the unit normal of a line in the direction of `angle` degrees
+    angle = radians(angle)
+    return -sin(angle), cos(angle)
+
+
+def getBounds(recording):
+    pen = BoundsPen(None)
+    recording.replay(PointToSegmentPen(pen))
+    return pen.bounds
+
+
+class OutlinePenTest(unittest.TestCase):
+
+    def assertOutlinesAlmostEqual(self, recording, other, tolerance=1e-9):
+        contours = getPointLists(recording)
+        otherContours = getPointLists(other)
+        self.assertEqual([len(contour) for contour in contours], [len(contour) for contour in otherContours])
+        for contour, otherContour in zip(contours, otherContours):
+            for ((x, y), segmentType, smooth), ((otherX, otherY), otherSegmentType, otherSmooth) in zip(contour, otherContour):
+                self.assertEqual((segmentType, smooth), (otherSegmentType, otherSmooth))
+                self.assertLessEqual(abs(x - otherX), tolerance)
+                self.assertLessEqual(abs(y - otherY), tolerance)
+
+    def test_baseline(self):
+        with open(baselinePath) as f:
+            baseline = json.load(f)
+        for name, recording, settings in iterCases():
+            with self.subTest(name):
+                self.assertEqual(describeOutline(outlineWithPen(recording, None, **settings)), baseline[name])
+
+    def test_smoothTurn(self):
+        # turns are compared in whole degrees
+        self.assertTrue(checkSmooth(getDirection(30.2), getDirection(34.1)))
+        self.assertTrue(checkSmooth(getDirection(30.2), getDirection(34.7)))
+        self.assertTrue(checkSmooth(getDirection(30.9), getDirection(34.8)))
+        self.assertFalse(checkSmooth(getDirection(30.6), getDirection(35.1)))
+        self.assertFalse(checkSmooth(getDirection(30.1), getDirection(35.2)))
+        self.assertTrue(checkSmooth(getDirection(34.7), getDirection(30.2)))
+        # also across the seam of the angles
+        self.assertTrue(checkSmooth(getDirection(359.2), getDirection(2.7)))
+        self.assertTrue(checkSmooth(getDirection(2.7), getDirection(359.2)))
+        self.assertTrue(checkSmooth(getDirection(88.2), getDirection(91.7)))
+        self.assertFalse(checkSmooth(getDirection(358.2), getDirection(3.7)))
+
+    def test_smoothSeam(self):
+        # the segments of a large polygon turn less than the smooth angle, also where the direction wraps around,
+        # so there are no joins: a point for every vertex and for the end of the closing segment
+        for connection in ("square", "round", "butt"):
+            result = outlineWithPen(polygonGlyph(count=200, radius=100000), None, offset=20, connection=connection)
+            contours = getPointLists(result)
+            self.assertEqual([len(contour) for contour in contours], [201, 201])
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_numpyEngine(self):
+        for name, recording, settings in iterCases():
+            with self.subTest(name):
+                self.assertOutlinesAlmostEqual(outlineWithNumpyPen(recording, None, **settings), outlineWithPen(recording, None, **settings))
+
+    def test_bounds(self):
+        cases = [(name, recording, settings, dict(drawInner=True, drawOuter=True)) for name, recording, settings in iterCases()]
+        # the other draw settings on open contours, with caps, and on closed contours
+        for name, recording, settings in iterCases(("open", "letters")):
+            cases.append((name, recording, settings, dict(drawOuter=True)))
+            cases.append((name, recording, settings, dict(drawInner=True, drawOriginal=True)))
+        for name, recording, settings, drawSettings in cases:
+            with self.subTest(name, **drawSettings):
+                pen = OutlinePen(None, **settings)
+                recording.replay(pen)
+                pen.drawSettings(**drawSettings)
+                result = RecordingPointPen()
+                pen.drawPoints(result)
+                expected = getBounds(result)
+
+                exactPen = OutlineBoundsPen(None, exact=True, **settings)
+                exactPen.drawSettings(**drawSettings)
+                recording.replay(exactPen)
+                for value, expectedValue in zip(exactPen.bounds, expected):
+                    self.assertAlmostEqual(value, expectedValue, places=6)
+
+                fastPen = OutlineBoundsPen(None, **settings)
+                fastPen.drawSettings(**drawSettings)
+                recording.replay(fastPen)
+                xMin, yMin, xMax, yMax = fastPen.bounds
+                self.assertLessEqual(xMin, expected[0] + 1e-6)
+                self.assertLessEqual(yMin, expected[1] + 1e-6)
+                self.assertGreaterEqual(xMax, expected[2] - 1e-6)
+                self.assertGreaterEqual(yMax, expected[3] - 1e-6)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--save"]:
+        saveBaseline()
+    else:
+        unittest.main()
@@ -0,0 +1,314 @@
+import os
+import io
+import sys
+import tempfile
+import subprocess
+import contextlib
+import unittest
+from unittest import mock
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(root, "source", "lib"))
+sys.path.insert(0, os.path.join(root, "benchmarks"))
+
+from defcon import Font  # noqa: E402
+from fontTools.pens.recordingPen import RecordingPointPen  # noqa: E402
+
+from outliner import (  # noqa: E402
+    defaultOptions, ComponentOutliner, recordGlyph, outlineRecording, outlineRecordings, iterOutlineChunks, pathops,
+    OutlineCache, getCacheKey, OutlineContourCache, recordContours, getOutlinePenOptions, getDrawSettings,
+    contoursMayOverlap, removeOverlapRecording, outlineGlyphSet, outlineUFO, main
+)
+import outliner  # noqa: E402
+from outlinePen import OutlinePen  # noqa: E402
+from benchmarkOutlinePen import curveGlyph, mixedGlyph, openGlyph, lettersGlyph  # noqa: E402
+
+
+def makeFont():
+    font = Font()
+    for glyphName, shapeFactory in (("o", lettersGlyph), ("a", mixedGlyph), ("circle", curveGlyph)):
+        shapeFactory().replay(font.newGlyph(glyphName).getPen())
+    openGlyph(count=2).replay(font.newGlyph("acute").getPen())
+    pen = font.newGlyph("aacute").getPen()
+    pen.addComponent("a", (1, 0, 0, 1, 0, 0))
+    pen.addComponent("acute", (1, 0, 0, 1, 120, 500))
+    # a scaled composite of a composite
+    font.newGlyph("aacute.sc").getPen().addComponent("aacute", (.8, 0, 0, .8, 10, 0))
+    # a mirrored component is decomposed
+    pen = font.newGlyph("mirror").getPen()
+    pen.addComponent("a", (-1, 0, 0, 1, 500, 0))
+    pen.addComponent("circle", (1, 0, 0, 1, 0, 0))
+    # contours before and after a component
+    glyph = font.newGlyph("mixedComponent")
+    pen = glyph.getPen()
+    mixedGlyph(count=1).replay(pen)
+    pen.addComponent("circle", (2, 0, 0, 2, 5, 5))
+    openGlyph(count=1).replay(pen)
+    return font
+
+
+def squareContour(x, y, size, clockwise=False):
+    points = [(x, y, "line"), (x + size, y, "line"), (x + size, y + size, "line"), (x, y + size, "line")]
+    if clockwise:
+        points.reverse()
+    return points
+
+
+def getPointRecording(contours):
+    pen = RecordingPointPen()
+    for points in contours:
+        pen.beginPath()
+        for x, y, segmentType in points:
+            pen.addPoint((x, y), segmentType=segmentType)
+        pen.endPath()
+    return pen.value
+
+
+def getGlyphRecordings(path, layerName=None):
+    font = Font(path)
+    layer = font.layers[layerName] if layerName else font.layers.defaultLayer
+    recordings = dict()
+    for glyph in layer:
+        pen = RecordingPointPen()
+        glyph.drawPoints(pen)
+        recordings[glyph.name] = pen.value
+    return recordings
+
+
+def iterOptions():
+    yield dict(defaultOptions, preserveComponentsCheckbox=False)
+    yield dict(defaultOptions, preserveComponentsCheckbox=False, strokeContrastField=10, strokeContrastAngleField=30,
+               lineJoinPopUpButton=1, endCapPopUpButton=1, outputStrokeSourceCheckbox=True)
+    yield dict(defaultOptions, preserveComponentsCheckbox=False, miterLimitField=5, optimizeCurvesCheckbox=True, curveToleranceField=.5)
+    if pathops is not None:
+        yield dict(defaultOptions, preserveComponentsCheckbox=False, removeOverlapCheckbox=True)
+
+
+class OutlinerTest(unittest.TestCase):
+
+    def assertRecordingsAlmostEqual(self, recording, other, tolerance=1e-6):
+        self.assertEqual([method for method, args, kwargs in recording], [method for method, args, kwargs in other])
+        for (method, args, kwargs), (otherMethod, otherArgs, otherKwargs) in zip(recording, other):
+            if method != "addPoint":
+                self.assertEqual(args, otherArgs)
+                continue
+            (x, y), (otherX, otherY) = args[0], otherArgs[0]
+            self.assertEqual(args[1:3], otherArgs[1:3])
+            self.assertLessEqual(abs(x - otherX), tolerance)
+            self.assertLessEqual(abs(y - otherY), tolerance)
+
+    def test_componentOutliner(self):
+        font = makeFont()
+        glyphNames = list(font.keys())
+        for options in iterOptions():
+            expected = {glyphName: outlineRecording(recordGlyph(font[glyphName], font, options), options) for glyphName in glyphNames}
+            lazy = ComponentOutliner(font, options)
+            pooled = ComponentOutliner(font, options)
+            pooled.prepare(glyphNames, workers=2)
+            for glyphName in glyphNames:
+                with self.subTest(glyphName, options=options):
+                    self.assertRecordingsAlmostEqual(lazy.outline(glyphName), expected[glyphName])
+                    self.assertRecordingsAlmostEqual(pooled.outline(glyphName), expected[glyphName])
+
+    def test_outlineRecordings(self):
+        font = makeFont()
+        glyphNames = list(font.keys()) * 3
+        for preserveComponents in (False, True):
+            options = dict(defaultOptions, preserveComponentsCheckbox=preserveComponents, lineJoinPopUpButton=1)
+            recordings = [recordGlyph(font[glyphName], font, options) for glyphName in glyphNames]
+            self.assertEqual(outlineRecordings(recordings, options, workers=2), outlineRecordings(recordings, options, workers=1))
+
+    def test_iterOutlineChunks(self):
+        font = makeFont()
+        glyphNames = list(font.keys())
+        for preserveComponents in (False, True):
+            options = dict(defaultOptions, preserveComponentsCheckbox=preserveComponents, strokeContrastField=10)
+            serial = [chunk for chunk in iterOutlineChunks(font, glyphNames, options, workers=1, chunkSize=3)]
+            pooled = [chunk for chunk in iterOutlineChunks(font, glyphNames, options, workers=2, chunkSize=3)]
+            self.assertEqual([[glyphName for glyphName, recording in chunk] for chunk in serial], [glyphNames[:3], glyphNames[3:6], glyphNames[6:]])
+            self.assertEqual(pooled, serial)
+
+    def test_outlineContourCache(self):
+        font = makeFont()
+        glyph = font["mixedComponent"]
+        outlinedContours = []
+        outlineParts = outliner._outlineParts
+
+        def countOutlineParts(recording, *args, **kwargs):
+            outlinedContours.append(recording)
+            return outlineParts(recording, *args, **kwargs)
+
+        for preserveComponents in (False, True):
+            options = dict(defaultOptions, preserveComponentsCheckbox=preserveComponents, outputStrokeSourceCheckbox=True)
+            cache = OutlineContourCache()
+            contourCount = len(recordContours(glyph, font, options))
+            for optionsChanged, contourChanged in ((True, False), (False, True), (False, False), (True, False)):
+                if optionsChanged:
+                    options = dict(options, strokeWidthField=options["strokeWidthField"] + 10)
+                if contourChanged:
+                    glyph[0][0].x += 5
+                with self.subTest(preserveComponents=preserveComponents, optionsChanged=optionsChanged, contourChanged=contourChanged):
+                    # the same as outlining the whole glyph with a single pen
+                    pen = OutlinePen(font, **getOutlinePenOptions(options))
+                    glyph.draw(pen)
+                    pen.drawSettings(**getDrawSettings(options))
+                    expected = RecordingPointPen()
+                    pen.drawPoints(expected)
+                    result = RecordingPointPen()
+                    del outlinedContours[:]
+                    with mock.patch.object(outliner, "_outlineParts", countOutlineParts):
+                        cache.outline(recordContours(glyph, font, options), options, result)
+                    self.assertEqual(result.value, expected.value)
+                    # only the changed contour is outlined again, all of them when the options change
+                    self.assertEqual(len(outlinedContours), contourCount if optionsChanged else int(contourChanged))
+
+    def test_contoursMayOverlap(self):
+        # a circle, its control polygons are convex
+        circle = [
+            (100, 0, "curve"), (155, 0, None), (200, 45, None), (200, 100, "curve"), (200, 155, None), (155, 200, None),
+            (100, 200, "curve"), (45, 200, None), (0, 155, None), (0, 100, "curve"), (0, 45, None), (45, 0, None)
+        ]
+        # a curve with handles crossing each other may loop
+        loop = [(0, 0, "line"), (300, 100, None), (-100, 100, None), (200, 0, "curve")]
+        self.assertFalse(contoursMayOverlap([squareContour(0, 0, 100), squareContour(200, 0, 100)]))
+        self.assertFalse(contoursMayOverlap([squareContour(0, 0, 100), squareContour(25, 25, 50, clockwise=True)]))
+        self.assertFalse(contoursMayOverlap([circle, squareContour(300, 0, 100)]))
+        self.assertTrue(contoursMayOverlap([squareContour(0, 0, 100), squareContour(50, 50, 100)]))
+        self.assertTrue(contoursMayOverlap([squareContour(0, 0, 100), squareContour(25, 25, 50)]))
+        self.assertTrue(contoursMayOverlap([[(0, 0, "line"), (100, 100, "line"), (100, 0, "line"), (0, 100, "line")]]))
+        self.assertTrue(contoursMayOverlap([loop]))
+        # a contour touching itself in a point
+        self.assertTrue(contoursMayOverlap([[(x, y, "line") for x, y in ((0, 0), (100, 0), (100, 100), (200, 100), (200, 200), (100, 200), (100, 100), (0, 100))]]))
+        self.assertTrue(contoursMayOverlap([circle, squareContour(150, 150, 100)]))
+
+    @unittest.skipIf(pathops is None, "skia-pathops is not installed")
+    def test_removeOverlapRecording(self):
+        options = dict(defaultOptions, removeOverlapCheckbox=True)
+        separate = getPointRecording([squareContour(0, 0, 100), squareContour(200, 0, 100)])
+        self.assertIs(removeOverlapRecording(separate, options), separate)
+        removed = removeOverlapRecording(separate, dict(options, skipNonOverlappingCheckbox=False))
+        self.assertEqual([method for method, args, kwargs in removed].count("beginPath"), 2)
+
+        overlapping = getPointRecording([squareContour(0, 0, 100), squareContour(50, 50, 100)])
+        component = ("addComponent", ("acute", (1, 0, 0, 1, 0, 0)), {})
+        for skipNonOverlapping in (True, False):
+            removed = removeOverlapRecording(overlapping + [component], dict(options, skipNonOverlappingCheckbox=skipNonOverlapping))
+            self.assertEqual([method for method, args, kwargs in removed].count("beginPath"), 1)
+            self.assertEqual(len([method for method, args, kwargs in removed if method == "addPoint"]), 8)
+            # components are kept
+            self.assertEqual(removed[-1], component)
+
+    def test_outlineGlyphSetInPlace(self):
+        from fontTools.ufoLib import UFOReader, UFOWriter
+
+        with tempfile.TemporaryDirectory() as directory:
+            sourcePath = os.path.join(directory, "source.ufo")
+            makeFont().save(sourcePath)
+            # base glyphs before and after the composites using them
+            glyphNames = ["a", "acute", "aacute", "circle", "mirror", "aacute.sc", "o", "mixedComponent"]
+            for preserveComponents in (False, True):
+                options = dict(defaultOptions, preserveComponentsCheckbox=preserveComponents)
+                with self.subTest(preserveComponents=preserveComponents):
+                    outputPath = os.path.join(directory, "output%s.ufo" % preserveComponents)
+                    inPlacePath = os.path.join(directory, "inPlace%s.ufo" % preserveComponents)
+                    for path in (outputPath, inPlacePath):
+                        makeFont().save(path)
+                    glyphSet = UFOReader(sourcePath).getGlyphSet()
+                    writer = UFOWriter(outputPath)
+                    self.assertEqual(list(outlineGlyphSet(glyphSet, writer.getGlyphSet(), options, glyphNames)), glyphNames)
+                    writer = UFOWriter(inPlacePath)
+                    glyphSet = writer.getGlyphSet()
+                    # every base glyph is written after the last glyph using it, components decompose the original outlines
+                    self.assertEqual(list(outlineGlyphSet(glyphSet, glyphSet, options, glyphNames)), glyphNames)
+                    self.assertEqual(getGlyphRecordings(inPlacePath), getGlyphRecordings(outputPath))
+
+    def test_commandLine(self):
+        with tempfile.TemporaryDirectory() as directory:
+            sourcePath = os.path.join(directory, "source.ufo")
+            makeFont().save(sourcePath)
+            options = dict(defaultOptions, strokeWidthField=30, lineJoinPopUpButton=1, outputLayerField="outline")
+            expectedPath = os.path.join(directory, "expected.ufo")
+            list(outlineUFO(sourcePath, options, outputPath=expectedPath))
+            expected = getGlyphRecordings(expectedPath, "outline")
+
+            outputPath = os.path.join(directory, "output.ufo")
+            arguments = [sourcePath, "--output", outputPath, "--stroke-width", "30", "--line-join", "round", "--layer", "outline"]
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                self.assertEqual(main(arguments), 0)
+            self.assertEqual(output.getvalue(), "Outlined %s glyphs in %s\n" % (len(expected), outputPath))
+            self.assertEqual(getGlyphRecordings(outputPath, "outline"), expected)
+            # the source is untouched, a second run outlines from the cache kept next to it
+            self.assertNotIn("outline", Font(sourcePath).layers)
+            self.assertTrue(os.path.exists(os.path.join(directory, "source.outlinercache")))
+            outputPath = os.path.join(directory, "cached.ufo")
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                self.assertEqual(main([sourcePath, "--output", outputPath] + arguments[3:]), 0)
+            self.assertEqual(output.getvalue(), "Outlined %s glyphs in %s, %s from the cache\n" % (len(expected), outputPath, len(expected)))
+            self.assertEqual(getGlyphRecordings(outputPath, "outline"), expected)
+
+            with contextlib.redirect_stderr(io.StringIO()):
+                with self.assertRaises(SystemExit):
+                    main([sourcePath, "--all-sources"])
+
+            # run as a module
+            outputPath = os.path.join(directory, "module.ufo")
+            subprocess.run(
+                [sys.executable, "-m", "outliner", sourcePath, "--output", outputPath, "--no-cache"] + arguments[3:],
+                cwd=os.path.join(root, "source", "lib"), check=True, capture_output=True
+            )
+            self.assertEqual(getGlyphRecordings(outputPath, "outline"), expected)
+
+    def test_cacheKey(self):
+        font = makeFont()
+        options = dict(defaultOptions, preserveComponentsCheckbox=False)
+        key = getCacheKey(font["aacute"], font, options)
+        self.assertEqual(getCacheKey(font["aacute"], font, dict(options, outputLayerField="outline")), key)
+        for name, value in (("strokeWidthField", 30), ("outputStrokeSourceCheckbox", True), ("preserveBoundsCheckbox", True), ("removeOverlapCheckbox", True)):
+            with self.subTest(name):
+                self.assertNotEqual(getCacheKey(font["aacute"], font, dict(options, **{name: value})), key)
+        with mock.patch.object(OutlineCache, "version", OutlineCache.version + 1):
+            self.assertNotEqual(getCacheKey(font["aacute"], font, options), key)
+        # a changed base glyph changes the key of a decomposed composite, not of a preserved one
+        preserved = getCacheKey(font["aacute"], font, dict(options, preserveComponentsCheckbox=True))
+        font["acute"][0][0].x += 10
+        self.assertNotEqual(getCacheKey(font["aacute"], font, options), key)
+        self.assertEqual(getCacheKey(font["aacute"], font, dict(options, preserveComponentsCheckbox=True)), preserved)
+
+    def test_outlineCache(self):
+        font = makeFont()
+        glyphNames = list(font.keys())
+        options = dict(defaultOptions, preserveComponentsCheckbox=False)
+        expected = [chunk for chunk in iterOutlineChunks(font, glyphNames, options, workers=1)]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "test.outlinercache")
+            with OutlineCache(path) as cache:
+                self.assertEqual([chunk for chunk in iterOutlineChunks(font, glyphNames, options, workers=1, cache=cache)], expected)
+                self.assertEqual((cache.hits, cache.misses), (0, len(glyphNames)))
+            with OutlineCache(path) as cache:
+                self.assertEqual([chunk for chunk in iterOutlineChunks(font, glyphNames, options, workers=1, cache=cache)], expected)
+                self.assertEqual((cache.hits, cache.misses), (len(glyphNames), 0))
+            with OutlineCache(path, invalidate=True) as cache:
+                self.assertEqual(len(cache), 0)
+
+    def test_outlineCachePrune(self):
+        recording = [("beginPath", (), {}), ("endPath", (), {})]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "test.outlinercache")
+            with OutlineCache(path) as cache:
+                for key in "abc":
+                    cache.set(key, recording)
+                cache.get("a")
+                size = len(cache._connection.execute("SELECT data FROM outlines").fetchone()[0])
+                # the least recently used outline does not fit
+                cache.maxSize = size * 2
+            with OutlineCache(path) as cache:
+                self.assertEqual(len(cache), 2)
+                self.assertIsNone(cache.get("b"))
+                self.assertEqual(cache.get("a"), recording)
+                self.assertEqual(cache.get("c"), recording)
+
+
+if __name__ == "__main__":
+    unittest.main()
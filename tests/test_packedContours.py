@@ -0,0 +1,97 @@
+import os
+import sys
+import mmap
+import struct
+import pickle
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "source", "lib"))
+
+from fontTools.pens.recordingPen import RecordingPointPen  # noqa: E402
+
+from outlinePen import OutlinePen, PackedContours, outlinePackedContours  # noqa: E402
+
+
+def makePackedContours():
+    packed = PackedContours()
+    pointPen = packed.getPointPen()
+    pointPen.beginPath()
+    pointPen.addPoint((0, 0), segmentType="line")
+    pointPen.addPoint((100, 0), segmentType="line")
+    pointPen.addPoint((150, 50))
+    pointPen.addPoint((150, 100))
+    pointPen.addPoint((100, 150), segmentType="curve", smooth=True)
+    pointPen.addPoint((0, 150))
+    pointPen.addPoint((0, 100), segmentType="qcurve")
+    pointPen.endPath()
+    pointPen.beginPath()
+    pointPen.addPoint((200, 0), segmentType="move")
+    pointPen.addPoint((300, 100), segmentType="line")
+    pointPen.endPath()
+    pointPen.addComponent("acute", (1, 0, 0, 1, 10, 20))
+    return packed
+
+
+class PackedContoursTest(unittest.TestCase):
+
+    def test_drawPoints(self):
+        packed = makePackedContours()
+        pointPen = RecordingPointPen()
+        packed.drawPoints(pointPen)
+        methods = [method for method, args, kwargs in pointPen.value]
+        self.assertEqual(methods, ["beginPath"] + ["addPoint"] * 7 + ["endPath", "beginPath", "addPoint", "addPoint", "endPath", "addComponent"])
+        self.assertEqual(pointPen.value[5][1][:3], ((100.0, 150.0), "curve", True))
+        self.assertEqual(pointPen.value[-1], ("addComponent", ("acute", (1, 0, 0, 1, 10, 20)), {}))
+
+    def test_bytes(self):
+        packed = makePackedContours()
+        self.assertEqual(PackedContours.frombytes(packed.tobytes()), packed)
+        self.assertEqual(hash(PackedContours.frombytes(packed.tobytes())), hash(packed))
+
+    def test_littleEndian(self):
+        packed = makePackedContours()
+        data = packed.tobytes()
+        header = PackedContours._header
+        self.assertEqual(header.unpack_from(data)[:2], (9, 1))
+        self.assertEqual(struct.unpack_from("<4d", data, header.size), (0, 0, 100, 0))
+
+    def test_pickleWritableBuffer(self):
+        packed = makePackedContours()
+        fromBuffer = PackedContours.frombytes(bytearray(packed.tobytes()))
+        self.assertEqual(pickle.loads(pickle.dumps(fromBuffer)), packed)
+
+    def test_addToWritableBuffer(self):
+        packed = makePackedContours()
+        fromBuffer = PackedContours.frombytes(bytearray(packed.tobytes()))
+        pointPen = fromBuffer.getPointPen()
+        pointPen.beginPath()
+        pointPen.addPoint((0, 0), segmentType="move")
+        pointPen.endPath()
+        pointPen.addComponent("grave", (1, 0, 0, 1, 0, 0))
+        self.assertEqual(len(fromBuffer), len(packed) + 1)
+        self.assertEqual(fromBuffer.componentNames, ["acute", "grave"])
+
+    def test_pickleMemoryMap(self):
+        packed = makePackedContours()
+        with tempfile.TemporaryFile() as file:
+            file.write(packed.tobytes())
+            file.flush()
+            data = mmap.mmap(file.fileno(), 0)
+            fromMap = PackedContours.frombytes(data)
+            self.assertEqual(fromMap, packed)
+            self.assertEqual(pickle.loads(pickle.dumps(fromMap)), packed)
+            del fromMap
+
+    def test_outline(self):
+        packed = makePackedContours()
+        pen = OutlinePen(None, offset=10, preserveComponents=True)
+        packed.draw(pen)
+        pen.drawSettings(drawOriginal=False, drawInner=True, drawOuter=True)
+        expected = PackedContours()
+        pen.drawPoints(expected.getPointPen())
+        self.assertEqual(outlinePackedContours(packed, offset=10, preserveComponents=True), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()